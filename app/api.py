@@ -1,12 +1,56 @@
-from exception_handlers import EXCEPTION_HANDLERS_DICT
-from fastapi import FastAPI
+import random
+from typing import Annotated, AsyncIterator, Optional
+from uuid import UUID
 
-from app.controllers.order import OrderController
-from app.models.order import CreateOrderModel, CreateOrderResponseModel
+import orjson
+from fastapi import FastAPI, Header, Path, Query, Request
+from fastapi.responses import Response, StreamingResponse
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from pydantic import constr
+from starlette.exceptions import HTTPException
+from starlette.status import (
+    HTTP_201_CREATED,
+    HTTP_400_BAD_REQUEST,
+    HTTP_404_NOT_FOUND,
+    HTTP_409_CONFLICT,
+    HTTP_503_SERVICE_UNAVAILABLE,
+)
+
+from app.controllers.admission import admission_controller, client_identity
+from app.controllers.circuit_breaker import exchange_breaker
+from app.controllers.exchange_executor import exchange_executor
+from app.controllers.order import (
+    IDEMPOTENCY_KEY_REUSED_MESSAGE,
+    OrderController,
+    decode_cursor,
+    exchange_registry,
+    idempotency_cache,
+    instrument_stats,
+    order_event_hub,
+    order_fingerprint,
+    order_response_cache,
+    scoped_idempotency_key,
+)
+from app.controllers.order_events import order_failed_event, order_placed_event, sse_stream
+from app.decoders import decode_order, decode_order_batch, order_adapter, order_batch_adapter, request_body_schema
+from app.exception_handlers import DEFAULT_PROD_CLIENT_ERROR_MESSAGE, EXCEPTION_HANDLERS_DICT
+from app.middleware import AdmissionControlMiddleware, MetricsMiddleware, ServerTimingMiddleware
+from app.models.order import (
+    CreateOrderResponseModel,
+    OrderListQueryModel,
+    OrderResponseModel,
+)
 from app.response_types import APIResponse
+from app.serializers import created_order_body
 from app.settings import settings
+from app.timing import phase
 from app.tortoise_config import lifespan
 
+ORDER_STATUS_CREATED = "created"
+ORDER_STATUS_INVALID = "invalid"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+SSE_MEDIA_TYPE = "text/event-stream"
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
     docs_url=f"/{settings.PROJECT_NAME}/docs",
@@ -15,6 +59,23 @@ app = FastAPI(
     default_response_class=APIResponse,
     lifespan=lifespan,
 )
+app.add_middleware(
+    AdmissionControlMiddleware,
+    controller=admission_controller,
+    exempt_paths=settings.ADMISSION_EXEMPT_PATHS,
+    client_header=settings.RATE_LIMIT_CLIENT_HEADER,
+)
+app.add_middleware(
+    ServerTimingMiddleware,
+    enabled=settings.SERVER_TIMING_ENABLED,
+    profile_sample_rate=settings.PROFILER_SAMPLE_RATE,
+    profile_header_enabled=settings.PROFILER_HEADER_ENABLED,
+    profile_dir=settings.PROFILER_DIR,
+    profile_interval=settings.PROFILER_INTERVAL,
+    max_concurrent_profiles=settings.PROFILER_MAX_CONCURRENT,
+)
+# Added last, so that it is the outermost middleware and also times the requests rejected by the admission control.
+app.add_middleware(MetricsMiddleware)
 
 
 @app.get("/healthcheck", status_code=200)
@@ -24,15 +85,272 @@ async def healthcheck() -> APIResponse:
 
     This function returns an APIResponse indicating the health status
     of the application. It is used to verify that the application is
-    running and able to respond to requests.
+    running and able to respond to requests. It also reports the load of
+    the stock exchange executor, the state of its circuit breaker, the state
+    of the breakers of the other venues and the load of the admission control.
 
     Returns:
         APIResponse: A response object containing the status of the application.
     """
-    return APIResponse({"status": "healthy"})
+    return APIResponse(
+        {
+            "status": "healthy",
+            "exchange": {**exchange_executor.stats(), "circuit_breaker": exchange_breaker.stats()},
+            "venues": {
+                adapter.name: adapter.breaker.stats()
+                for adapter in exchange_registry.adapters()
+                if adapter is not exchange_registry.default
+            },
+            "admission": admission_controller.stats(),
+        }
+    )
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics() -> Response:
+    """
+    Expose the application metrics in the Prometheus text format.
+
+    Returns:
+        Response: The current value of every registered metric.
+    """
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
+@app.post(
+    "/orders",
+    status_code=201,
+    response_model=CreateOrderResponseModel,
+    openapi_extra=request_body_schema(order_adapter),
+)
+async def create_order(
+    request: Request,
+    idempotency_key: Annotated[Optional[str], Header(min_length=1, max_length=255)] = None,
+) -> Response:
+    """
+    Create an order and hand it over for placement on the stock exchange.
+
+    The raw body is decoded and validated by `decode_order` rather than by FastAPI, see
+    `settings.ORDER_FAST_DECODING`.
+
+    The response body is encoded from the order by `created_order_body`, skipping the response
+    model validation and the `APIResponse` envelope rendering; `CreateOrderResponseModel` only
+    documents the response.
 
+    With an `Idempotency-Key` header a retried request does not create and place the order again.
+    The response to the first request is kept in an in-process cache for `settings.IDEMPOTENCY_CACHE_TTL`
+    seconds and replayed byte for byte to requests with the same key, without a database query.
+    Once the key has left the cache, or on another instance, the unique `idempotency_key` column
+    catches the duplicate and the response is rendered again from the stored order. Keys are
+    scoped to the client, identified like for the rate limit, so clients cannot collide on a key.
 
-@app.post("/orders", status_code=201)
-async def create_order(model: CreateOrderModel) -> CreateOrderResponseModel:
+    Args:
+        request (Request): The FastAPI request object.
+        idempotency_key (Optional[str], optional): The `Idempotency-Key` header. Defaults to None.
+
+    Returns:
+        Response: A response object containing the created order.
+
+    Raises:
+        RequestValidationError: If the body is not a valid order.
+        HTTPException: 409 if the idempotency key was already used for a different order.
+    """
     # add versioning
-    return await OrderController.create(model)
+    body = await request.body()
+    with phase("decode"):
+        model = decode_order(body)
+    if idempotency_key is None:
+        order = await OrderController.create(model)
+        with phase("serialize"):
+            body = created_order_body(order)
+        return Response(body, status_code=HTTP_201_CREATED, media_type=APIResponse.media_type)
+
+    idempotency_key = scoped_idempotency_key(
+        client_identity(request.scope, settings.RATE_LIMIT_CLIENT_HEADER.lower().encode()), idempotency_key
+    )
+    fingerprint = order_fingerprint(model)
+    cached = idempotency_cache.get(idempotency_key)
+    if cached is not None:
+        cached_fingerprint, body = cached
+        if cached_fingerprint != fingerprint:
+            raise HTTPException(status_code=HTTP_409_CONFLICT, detail=IDEMPOTENCY_KEY_REUSED_MESSAGE)
+        return Response(body, status_code=HTTP_201_CREATED, media_type=APIResponse.media_type)
+
+    order = await OrderController.create(model, idempotency_key=idempotency_key)
+    with phase("serialize"):
+        body = created_order_body(order)
+    idempotency_cache.set(idempotency_key, (fingerprint, body), ttl=settings.IDEMPOTENCY_CACHE_TTL)
+    return Response(body, status_code=HTTP_201_CREATED, media_type=APIResponse.media_type)
+
+
+@app.post("/orders/batch", status_code=201, openapi_extra=request_body_schema(order_batch_adapter))
+async def create_orders(request: Request) -> APIResponse:
+    """
+    Create a basket of orders with a single bulk insert.
+
+    The body is a list of orders in the same format as for `POST /orders`, decoded by
+    `decode_order_batch`. Every item is validated on its own. The response lists one result per
+    item, in request order, with the status `created` and the created order, or `invalid` and the error.
+
+    Args:
+        request (Request): The FastAPI request object.
+
+    Returns:
+        APIResponse: A response object containing the result of each item.
+
+    Raises:
+        RequestValidationError: If the body is not a list of 1 to `settings.ORDER_BATCH_MAX_SIZE` items.
+    """
+    body = await request.body()
+    with phase("decode"):
+        models = decode_order_batch(body)
+    orders = await OrderController.create_many(models)
+    results = [
+        (
+            {
+                "status": ORDER_STATUS_CREATED,
+                "order": CreateOrderResponseModel.model_validate(order).model_dump(mode="json"),
+            }
+            if order is not None
+            else {"status": ORDER_STATUS_INVALID, "error": {"message": DEFAULT_PROD_CLIENT_ERROR_MESSAGE}}
+        )
+        for order in orders
+    ]
+    return APIResponse({"orders": results}, status_code=201)
+
+
+@app.get("/orders")
+async def list_orders(request: Request, query: Annotated[OrderListQueryModel, Query()]) -> Response:
+    """
+    List orders, oldest first, filtered by instrument, side, creation time and placement state.
+
+    By default one page of at most `limit` orders is returned together with the cursor of the
+    next page, which is passed as `cursor` to fetch it. With the header `Accept: application/x-ndjson`
+    all matching orders after `cursor` are streamed instead, one JSON document per line.
+
+    Args:
+        request (Request): The FastAPI request object.
+        query (OrderListQueryModel): The filters, the cursor and the page size.
+
+    Returns:
+        Response: A page of orders, or a stream of all matching orders.
+
+    Raises:
+        HTTPException: 400 if the cursor is malformed.
+    """
+    if query.cursor:
+        try:
+            decode_cursor(query.cursor)
+        except ValueError:
+            raise HTTPException(status_code=HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+    if NDJSON_MEDIA_TYPE in request.headers.get("accept", ""):
+
+        async def export() -> AsyncIterator[bytes]:
+            async for row in OrderController.iter_orders(query, settings.ORDER_EXPORT_CHUNK_SIZE):
+                yield orjson.dumps(row, option=orjson.OPT_APPEND_NEWLINE)
+
+        return StreamingResponse(export(), media_type=NDJSON_MEDIA_TYPE)
+
+    orders, next_cursor = await OrderController.list_orders(query)
+    return APIResponse({"orders": orders, "next_cursor": next_cursor})
+
+
+# Registered before `/orders/{order_id}`, which would match `/orders/stream` as well.
+@app.get("/orders/stream", response_class=StreamingResponse)
+async def stream_orders(
+    order_id: Annotated[Optional[list[UUID]], Query()] = None,
+    instrument: Annotated[Optional[list[constr(min_length=12, max_length=12)]], Query()] = None,
+) -> StreamingResponse:
+    """
+    Stream the placements of orders as server-sent events, instead of polling `GET /orders/{order_id}`.
+
+    Every `order_placed` event carries the order `id`, `instrument` and `order_placed_at`; an order
+    that will never be placed, e.g. because the venue rejected it, is reported by an `order_failed`
+    event with its `failed_at` and `error` instead. Events can be limited to some orders and
+    instruments by repeating the `order_id` and `instrument` parameters; without them every event is
+    streamed. Orders given by id that were already placed or failed when the stream was opened are
+    reported right away. Events are pushed by the database through one shared connection per
+    worker, see `OrderEventHub`.
+
+    Args:
+        order_id (list[UUID], optional): The orders of interest. Defaults to None.
+        instrument (list[str], optional): The instruments of interest. Defaults to None.
+
+    Returns:
+        StreamingResponse: The event stream, open until the client disconnects or for about
+            `settings.ORDER_STREAM_MAX_AGE` seconds.
+
+    Raises:
+        HTTPException: 503 if this worker has no room for another subscriber.
+    """
+    if order_event_hub.full:
+        raise HTTPException(status_code=HTTP_503_SERVICE_UNAVAILABLE, detail="Too many subscribers, retry later")
+    subscription = order_event_hub.subscribe({str(order) for order in order_id or ()}, instrument or ())
+    try:
+        if order_id:
+            for order in await OrderController.get_finished_orders(order_id):
+                subscription.put(order_placed_event(order) if order.order_placed_at else order_failed_event(order))
+    except BaseException:
+        order_event_hub.unsubscribe(subscription)
+        raise
+    return StreamingResponse(
+        sse_stream(
+            order_event_hub,
+            subscription,
+            settings.ORDER_STREAM_KEEPALIVE,
+            max_age=settings.ORDER_STREAM_MAX_AGE * random.uniform(0.9, 1),
+        ),
+        media_type=SSE_MEDIA_TYPE,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/orders/{order_id}", response_model=OrderResponseModel)
+async def get_order(order_id: UUID) -> Response:
+    """
+    Retrieve an order, including whether and when it was placed on the stock exchange.
+
+    Serialized responses are kept in an in-process LRU cache. Placed and failed orders no longer change
+    and are cached for `settings.ORDER_CACHE_TTL` seconds; pending orders may be placed by another
+    process at any time and are only cached for `settings.ORDER_CACHE_PENDING_TTL` seconds.
+
+    Args:
+        order_id (UUID): The id of the order.
+
+    Returns:
+        Response: A response object containing the order.
+
+    Raises:
+        HTTPException: 404 if there is no order with this id.
+    """
+    body = order_response_cache.get(order_id)
+    if body is None:
+        order = await OrderController.get_order_by_id(order_id)
+        if order is None:
+            raise HTTPException(status_code=HTTP_404_NOT_FOUND, detail="Order not found")
+        body = APIResponse(OrderResponseModel.model_validate(order).model_dump(mode="json")).body
+        ttl = (
+            settings.ORDER_CACHE_TTL if order.order_placed_at or order.failed_at else settings.ORDER_CACHE_PENDING_TTL
+        )
+        order_response_cache.set(order_id, body, ttl=ttl)
+    return Response(body, media_type=APIResponse.media_type)
+
+
+@app.get("/instruments/{instrument}/stats")
+async def get_instrument_stats(instrument: Annotated[str, Path(min_length=12, max_length=12)]) -> APIResponse:
+    """
+    Retrieve the order counts and quantities of an instrument, per side.
+
+    The stats are served from in-memory counters, without querying the database. The counters are
+    updated by the creation, placement and failure events of every process, see `InstrumentStatsStore`,
+    and rebuilt from the database every `INSTRUMENT_STATS_REBUILD_INTERVAL` seconds. `rebuilt_at` is
+    the time of the last rebuild.
+
+    Args:
+        instrument (str): The instrument.
+
+    Returns:
+        APIResponse: A response object containing the stats, all zero if the instrument has no orders.
+    """
+    return APIResponse(instrument_stats.get(instrument))
@@ -0,0 +1,186 @@
+import asyncio
+import math
+import time
+from collections import deque
+
+from starlette.exceptions import HTTPException
+from starlette.status import HTTP_429_TOO_MANY_REQUESTS, HTTP_503_SERVICE_UNAVAILABLE
+from starlette.types import Scope
+
+from app.cache import LRUCache
+from app.metrics import ADMISSION_IN_FLIGHT, ADMISSION_QUEUED, ADMISSION_REJECTED, ADMISSION_WAIT_SECONDS
+from app.settings import settings
+
+RATE_LIMITED_MESSAGE = "Too many requests, retry later"
+OVERLOADED_MESSAGE = "The service is overloaded, retry later"
+
+REJECTED_RATE_LIMITED = "rate_limited"
+REJECTED_QUEUE_FULL = "queue_full"
+REJECTED_QUEUE_TIMEOUT = "queue_timeout"
+
+
+def client_identity(scope: Scope, client_header: bytes = b"") -> str:
+    """
+    Return the identity of the client of a request.
+
+    Args:
+        scope (Scope): The ASGI scope of the request.
+        client_header (bytes, optional): The lowercase name of the header identifying the client, e.g. `x-api-key`.
+            The client address is used if it is empty or missing. Defaults to b"".
+
+    Returns:
+        str: The header value or the client address, empty if neither is known.
+    """
+    if client_header:
+        for name, value in scope["headers"]:
+            if name == client_header:
+                return value.decode("latin-1")
+    client = scope.get("client")
+    return client[0] if client else ""
+
+
+class AdmissionController:
+    """
+    Decides which requests are handled when, so that an overload is shed instead of queued.
+
+    At most `max_concurrency` requests are handled at a time. Further requests wait in a FIFO
+    queue of at most `max_queue` requests for up to `queue_timeout` seconds; a request that finds
+    the queue full or is not admitted in time is rejected with 503 right away. The time requests
+    spend waiting, and with it the latency of the admitted ones, therefore stays bounded however
+    many requests arrive, instead of all of them waiting for the database pool until they time out.
+
+    Before that, every client is rate limited by a token bucket refilled with `rate` tokens per
+    second and holding at most `burst` tokens; a request without a token is rejected with 429.
+    The buckets of the `max_clients` most recent clients are kept. A `max_concurrency` or `rate`
+    of 0 disables the respective limit.
+
+    The controller is meant to be used from the event loop only and is therefore not thread-safe.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        max_queue: int,
+        queue_timeout: float,
+        rate: float,
+        burst: int,
+        max_clients: int,
+    ) -> None:
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.rate = rate
+        self.burst = burst
+        self._in_flight = 0
+        self._waiters: deque[asyncio.Future] = deque()
+        self._buckets = LRUCache(max_clients)
+        ADMISSION_IN_FLIGHT.set_function(lambda: self._in_flight)
+        ADMISSION_QUEUED.set_function(lambda: len(self._waiters))
+
+    def stats(self) -> dict:
+        """
+        Return a snapshot of the controller.
+
+        Returns:
+            dict: The number of requests being handled and waiting, and the concurrency limit.
+        """
+        return {"in_flight": self._in_flight, "queued": len(self._waiters), "max_concurrency": self.max_concurrency}
+
+    async def acquire(self, client: str) -> None:
+        """
+        Wait until a request of `client` may be handled. Every acquire must be followed by a `release`.
+
+        Args:
+            client (str): The client identifier the rate limit applies to.
+
+        Raises:
+            HTTPException: 429 if the client exceeded its rate, 503 if the request could not be admitted.
+        """
+        if self.rate > 0:
+            retry_after = self._take_token(client)
+            if retry_after:
+                ADMISSION_REJECTED.labels(REJECTED_RATE_LIMITED).inc()
+                raise HTTPException(
+                    status_code=HTTP_429_TOO_MANY_REQUESTS,
+                    detail=RATE_LIMITED_MESSAGE,
+                    headers={"Retry-After": str(math.ceil(retry_after))},
+                )
+        if self.max_concurrency <= 0:
+            return
+        if self._in_flight < self.max_concurrency and not self._waiters:
+            self._in_flight += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            self._reject(REJECTED_QUEUE_FULL)
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        started = time.perf_counter()
+        try:
+            # `release` hands its slot over to the waiter, so `_in_flight` stays unchanged.
+            await asyncio.wait_for(asyncio.shield(waiter), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._abandon(waiter)
+            self._reject(REJECTED_QUEUE_TIMEOUT)
+        except BaseException:
+            # E.g. the client disconnected while waiting.
+            self._abandon(waiter)
+            raise
+        finally:
+            ADMISSION_WAIT_SECONDS.observe(time.perf_counter() - started)
+
+    def release(self) -> None:
+        """Free the slot of a handled request, handing it over to the longest waiting request if any."""
+        if self.max_concurrency <= 0:
+            return
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._in_flight -= 1
+
+    def _abandon(self, waiter: asyncio.Future) -> None:
+        if waiter.done():
+            # The slot was handed over just before the waiter gave up, pass it on.
+            self.release()
+        else:
+            waiter.cancel()
+            self._waiters.remove(waiter)
+
+    def _reject(self, reason: str) -> None:
+        ADMISSION_REJECTED.labels(reason).inc()
+        raise HTTPException(
+            status_code=HTTP_503_SERVICE_UNAVAILABLE, detail=OVERLOADED_MESSAGE, headers={"Retry-After": "1"}
+        )
+
+    def _take_token(self, client: str) -> float:
+        """
+        Take a token from the bucket of a client.
+
+        Args:
+            client (str): The client identifier.
+
+        Returns:
+            float: 0 if a token was taken, otherwise the number of seconds until the next token.
+        """
+        now = time.monotonic()
+        # A bucket that has not been used for `burst / rate` seconds is full again, so it may expire.
+        ttl = self.burst / self.rate
+        tokens, updated_at = self._buckets.get(client) or (self.burst, now)
+        tokens = min(self.burst, tokens + (now - updated_at) * self.rate)
+        if tokens < 1:
+            self._buckets.set(client, (tokens, now), ttl)
+            return (1 - tokens) / self.rate
+        self._buckets.set(client, (tokens - 1, now), ttl)
+        return 0.0
+
+
+admission_controller = AdmissionController(
+    max_concurrency=settings.ADMISSION_MAX_CONCURRENCY,
+    max_queue=settings.ADMISSION_MAX_QUEUE,
+    queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT,
+    rate=settings.RATE_LIMIT_PER_SECOND,
+    burst=settings.RATE_LIMIT_BURST,
+    max_clients=settings.RATE_LIMIT_MAX_CLIENTS,
+)
@@ -0,0 +1,82 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+from app.metrics import BATCH_WRITER_BATCH_SIZE, BATCH_WRITER_WAIT_SECONDS
+
+
+class BatchWriter:
+    """
+    Coalesces concurrent writes into batches.
+
+    Items passed to `write` are collected until either `max_batch_size` items are pending or
+    `max_delay` seconds have passed since the first of them arrived. The whole batch is then
+    handed to `flush` at once, and every caller of `write` resumes once that flush has finished.
+    If the flush fails, every caller of the batch gets the exception.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        flush: Callable[[list], Awaitable[None]],
+        max_batch_size: int,
+        max_delay: float,
+    ) -> None:
+        self.name = name
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self._flush = flush
+        self._pending: list[tuple[Any, asyncio.Future, float]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flushing: set[asyncio.Task] = set()
+
+    async def write(self, item: Any) -> None:
+        """
+        Add an item to the current batch and wait until the batch has been flushed.
+
+        Args:
+            item (Any): The item to write.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future, time.perf_counter()))
+        if len(self._pending) >= self.max_batch_size:
+            self._start_flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_delay, self._start_flush)
+        await future
+
+    async def close(self) -> None:
+        """Flush the pending items and wait for all running flushes to finish."""
+        self._start_flush()
+        if self._flushing:
+            await asyncio.gather(*self._flushing, return_exceptions=True)
+
+    def _start_flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        task = asyncio.ensure_future(self._flush_batch(batch))
+        self._flushing.add(task)
+        task.add_done_callback(self._flushing.discard)
+
+    async def _flush_batch(self, batch: list[tuple[Any, asyncio.Future, float]]) -> None:
+        started = time.perf_counter()
+        BATCH_WRITER_BATCH_SIZE.labels(self.name).observe(len(batch))
+        wait_seconds = BATCH_WRITER_WAIT_SECONDS.labels(self.name)
+        for _, _, enqueued in batch:
+            wait_seconds.observe(started - enqueued)
+
+        try:
+            await self._flush([item for item, _, _ in batch])
+        except Exception as exc:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(exc)
+        else:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_result(None)
@@ -0,0 +1,172 @@
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable
+
+from app.controllers.stock_exchange import OrderPlacementError
+from app.metrics import CIRCUIT_BREAKER_REJECTED_CALLS, CIRCUIT_BREAKER_STATE, CIRCUIT_BREAKER_TRANSITIONS
+from app.settings import settings
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+# Numeric value of each state for the state gauge.
+STATE_VALUES = {STATE_CLOSED: 0, STATE_HALF_OPEN: 1, STATE_OPEN: 2}
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker that stops calling a failing dependency for a while.
+
+    While `closed`, the outcome of the last `window_size` calls is kept. Once at least
+    `minimum_calls` of them were made and the share of failures reaches `failure_rate_threshold`,
+    the breaker `open`s: calls are rejected with `CircuitOpenError` without calling the dependency.
+    After `open_seconds` the breaker is `half_open` and lets `half_open_calls` trial calls through.
+    A successful trial closes the breaker again, a failed one opens it for another `open_seconds`.
+
+    Only exceptions listed in `failure_exceptions` count as failures. Exceptions listed in
+    `ignored_exceptions`, e.g. an order rejected by a venue that is up and answering, count as
+    successful calls even if they are subclasses of a failure exception. The breaker is meant to be
+    used from the event loop only and is therefore not thread-safe.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_exceptions: tuple[type[BaseException], ...],
+        failure_rate_threshold: float,
+        window_size: int,
+        minimum_calls: int,
+        open_seconds: float,
+        half_open_calls: int,
+        ignored_exceptions: tuple[type[BaseException], ...] = (),
+    ) -> None:
+        self.name = name
+        self.failure_exceptions = failure_exceptions
+        self.ignored_exceptions = ignored_exceptions
+        self.failure_rate_threshold = failure_rate_threshold
+        self.minimum_calls = minimum_calls
+        self.open_seconds = open_seconds
+        self.half_open_calls = half_open_calls
+        self._outcomes: deque[bool] = deque(maxlen=window_size)
+        self._state = STATE_CLOSED
+        self._opened_at = 0.0
+        self._trial_calls = 0
+        CIRCUIT_BREAKER_STATE.labels(name).set_function(lambda: STATE_VALUES[self.state])
+
+    @property
+    def state(self) -> str:
+        """The current state, an open breaker turns half-open once `open_seconds` have passed."""
+        if self._state == STATE_OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._transition(STATE_HALF_OPEN)
+        return self._state
+
+    @property
+    def failure_rate(self) -> float:
+        """Share of failed calls in the sliding window."""
+        if not self._outcomes:
+            return 0.0
+        return sum(self._outcomes) / len(self._outcomes)
+
+    def stats(self) -> dict:
+        """
+        Return a snapshot of the breaker.
+
+        Returns:
+            dict: The state, the failure rate and the number of calls in the sliding window.
+        """
+        return {"state": self.state, "failure_rate": round(self.failure_rate, 3), "calls": len(self._outcomes)}
+
+    async def call(self, func: Callable[..., Awaitable[Any]], *args: Any) -> Any:
+        """
+        Await `func(*args)` unless the breaker is open, and record the outcome.
+
+        Args:
+            func (Callable[..., Awaitable[Any]]): The async callable guarded by the breaker.
+            *args (Any): Positional arguments passed to `func`.
+
+        Returns:
+            Any: The return value of `func`.
+
+        Raises:
+            CircuitOpenError: If the breaker is open, or half-open with all trial calls in flight.
+        """
+        state = self.state
+        if state == STATE_OPEN or (state == STATE_HALF_OPEN and self._trial_calls >= self.half_open_calls):
+            CIRCUIT_BREAKER_REJECTED_CALLS.labels(self.name).inc()
+            raise CircuitOpenError(f"Circuit breaker `{self.name}` is {state}")
+        trial = state == STATE_HALF_OPEN
+        if trial:
+            self._trial_calls += 1
+
+        try:
+            result = await func(*args)
+        except self.ignored_exceptions:
+            self._record(failed=False, trial=trial)
+            raise
+        except self.failure_exceptions:
+            self._record(failed=True, trial=trial)
+            raise
+        except BaseException:
+            if trial and self._trial_calls:
+                self._trial_calls -= 1
+            raise
+        self._record(failed=False, trial=trial)
+        return result
+
+    def _record(self, failed: bool, trial: bool) -> None:
+        if trial and self._trial_calls:
+            self._trial_calls -= 1
+        if self._state == STATE_HALF_OPEN:
+            self._transition(STATE_OPEN if failed else STATE_CLOSED)
+            return
+        self._outcomes.append(failed)
+        if (
+            self._state == STATE_CLOSED
+            and len(self._outcomes) >= self.minimum_calls
+            and self.failure_rate >= self.failure_rate_threshold
+        ):
+            self._transition(STATE_OPEN)
+
+    def _transition(self, state: str) -> None:
+        self._state = state
+        if state == STATE_OPEN:
+            self._opened_at = time.monotonic()
+        if state != STATE_HALF_OPEN:
+            self._outcomes.clear()
+        self._trial_calls = 0
+        CIRCUIT_BREAKER_TRANSITIONS.labels(self.name, state).inc()
+
+
+def venue_breaker(name: str, ignored_exceptions: tuple[type[BaseException], ...] = ()) -> CircuitBreaker:
+    """
+    Build the circuit breaker of one venue from the `CIRCUIT_BREAKER_*` settings.
+
+    Every venue has its own breaker, so that an outage of one venue does not stop the placements on the others.
+
+    Args:
+        name (str): The venue name, used as the metric label.
+        ignored_exceptions (tuple[type[BaseException], ...], optional): Errors that do not count as failures.
+            Defaults to ().
+
+    Returns:
+        CircuitBreaker: The breaker.
+    """
+    return CircuitBreaker(
+        name=name,
+        failure_exceptions=(OrderPlacementError,),
+        failure_rate_threshold=settings.CIRCUIT_BREAKER_FAILURE_RATE,
+        window_size=settings.CIRCUIT_BREAKER_WINDOW_SIZE,
+        minimum_calls=settings.CIRCUIT_BREAKER_MINIMUM_CALLS,
+        open_seconds=settings.CIRCUIT_BREAKER_OPEN_SECONDS,
+        half_open_calls=settings.CIRCUIT_BREAKER_HALF_OPEN_CALLS,
+        ignored_exceptions=ignored_exceptions,
+    )
+
+
+# The breaker of the default venue, the `place_order` stock exchange.
+exchange_breaker = venue_breaker("stock_exchange")
@@ -0,0 +1,291 @@
+import asyncio
+import time
+from typing import Callable, Optional, Protocol
+
+import httpx
+import orjson
+
+from app.controllers.circuit_breaker import CircuitBreaker
+from app.controllers.exchange_executor import ExchangeExecutor, ExchangeSaturatedError
+from app.controllers.stock_exchange import OrderPlacementError
+from app.metrics import EXCHANGE_CALL_SECONDS
+from app.models.order import Order
+
+VENUE_STATUS_PLACED = "placed"
+
+# Client errors that say nothing about the order but that the venue is struggling, so they count as failures.
+_TRANSIENT_CLIENT_ERRORS = frozenset({408, 429})
+
+
+class OrderRejectedError(OrderPlacementError):
+    """The venue is up but refused the order, e.g. with a 4xx response. Not a failure of the venue."""
+
+
+class ExchangeAdapter(Protocol):
+    """
+    A venue orders can be placed on.
+
+    `place` places one order and raises `OrderPlacementError` if the venue did not accept it.
+    `place_many` places up to `max_batch_size` orders at once and returns, in order, None for
+    every placed order and the error for every rejected one; it only raises `OrderPlacementError`
+    if the venue could not be reached at all. Venues without a batch API have a `max_batch_size` of 1.
+    Calls to the venue go through its own `breaker`.
+    """
+
+    name: str
+    max_batch_size: int
+    breaker: CircuitBreaker
+
+    async def place(self, order: Order) -> None: ...
+
+    async def place_many(self, orders: list[Order]) -> list[Optional[Exception]]: ...
+
+    async def close(self) -> None: ...
+
+
+class LegacyExchangeAdapter:
+    """
+    Adapter for a blocking `place_order` function, which is run in an `ExchangeExecutor` thread pool.
+    """
+
+    max_batch_size = 1
+
+    def __init__(
+        self, name: str, place_order: Callable[[Order], None], executor: ExchangeExecutor, breaker: CircuitBreaker
+    ) -> None:
+        self.name = name
+        self.executor = executor
+        self.breaker = breaker
+        self._place_order = place_order
+
+    async def place(self, order: Order) -> None:
+        """
+        Place an order with the blocking function, without blocking the event loop.
+
+        Args:
+            order (Order): The order to be placed.
+
+        Raises:
+            OrderPlacementError: If the venue did not accept the order.
+            ExchangeSaturatedError: If the executor cannot accept another call.
+        """
+        await self.executor.run(self._place_order, order)
+
+    async def place_many(self, orders: list[Order]) -> list[Optional[Exception]]:
+        """
+        Place orders one by one, concurrently.
+
+        Args:
+            orders (list[Order]): The orders to be placed.
+
+        Returns:
+            list[Optional[Exception]]: None for every placed order, the error for every rejected one.
+        """
+
+        async def place(order: Order) -> Optional[Exception]:
+            try:
+                await self.place(order)
+            except (OrderPlacementError, ExchangeSaturatedError) as exc:
+                return exc
+            return None
+
+        return list(await asyncio.gather(*(place(order) for order in orders)))
+
+    async def close(self) -> None:
+        """Nothing to release, the executor is shut down by its owner."""
+
+
+def _venue_payload(order: Order) -> dict:
+    return {
+        "id": str(order.id),
+        "type": order.type.value,
+        "side": order.side.value,
+        "instrument": order.instrument,
+        "limit_price": None if order.limit_price is None else str(order.limit_price),
+        "quantity": order.quantity,
+    }
+
+
+class HttpExchangeAdapter:
+    """
+    Adapter for a venue with an HTTP JSON API, called natively from the event loop.
+
+    Orders are sent as `POST {base_url}/orders`, with the order id as `Idempotency-Key` so that a
+    retried placement is not executed twice, and batches as `POST {base_url}/orders/batch` with
+    `{"orders": [...]}`, answered with `{"results": [{"status": "placed"} | {"status": ..., "error": ...}]}`.
+    Connections are kept alive in a pool of at most `max_connections` per adapter, which is opened
+    on first use.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        base_url: str,
+        max_connections: int,
+        timeout: float,
+        max_batch_size: int,
+        breaker: CircuitBreaker,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ) -> None:
+        """
+        Initialize an HttpExchangeAdapter instance.
+
+        Args:
+            name (str): The venue name.
+            base_url (str): The base URL of the venue API.
+            max_connections (int): Maximum number of pooled connections, all of them kept alive.
+            timeout (float): Timeout of a call in seconds.
+            max_batch_size (int): Maximum number of orders sent in one batch call.
+            breaker (CircuitBreaker): The breaker of the venue, which should ignore `OrderRejectedError`.
+            transport (httpx.AsyncBaseTransport, optional): Transport replacing the network, e.g. in tests.
+                Defaults to None.
+        """
+        self.name = name
+        self.base_url = base_url
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.max_batch_size = max_batch_size
+        self.breaker = breaker
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+
+    async def place(self, order: Order) -> None:
+        """
+        Place an order on the venue.
+
+        Args:
+            order (Order): The order to be placed.
+
+        Raises:
+            OrderRejectedError: If the venue refused the order with a client error.
+            OrderPlacementError: If the venue could not be reached or failed.
+        """
+        await self._post(
+            "/orders",
+            _venue_payload(order),
+            headers={"Idempotency-Key": str(order.id)},
+        )
+
+    async def place_many(self, orders: list[Order]) -> list[Optional[Exception]]:
+        """
+        Place orders on the venue with one batch call.
+
+        Args:
+            orders (list[Order]): The orders to be placed, at most `max_batch_size`.
+
+        Returns:
+            list[Optional[Exception]]: None for every placed order, the error for every rejected one.
+
+        Raises:
+            OrderRejectedError: If the venue refused the batch with a client error.
+            OrderPlacementError: If the venue could not be reached or failed.
+        """
+        response = await self._post("/orders/batch", {"orders": [_venue_payload(order) for order in orders]})
+        try:
+            results = orjson.loads(response.content)["results"]
+        except (ValueError, KeyError, TypeError) as exc:
+            raise OrderPlacementError(f"Venue `{self.name}` answered a malformed batch result") from exc
+        if len(results) != len(orders):
+            raise OrderPlacementError(f"Venue `{self.name}` answered {len(results)} results for {len(orders)} orders")
+        return [
+            (
+                None
+                if result.get("status") == VENUE_STATUS_PLACED
+                else OrderRejectedError(result.get("error") or f"Rejected by venue `{self.name}`")
+            )
+            for result in results
+        ]
+
+    async def close(self) -> None:
+        """Close the pooled connections."""
+        client, self._client = self._client, None
+        if client is not None:
+            await client.aclose()
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections, max_keepalive_connections=self.max_connections
+                ),
+                transport=self._transport,
+            )
+        return self._client
+
+    async def _post(self, path: str, payload: dict, headers: Optional[dict] = None) -> httpx.Response:
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            try:
+                response = await self._get_client().post(
+                    path,
+                    content=orjson.dumps(payload),
+                    headers={"Content-Type": "application/json", **(headers or {})},
+                )
+            except httpx.HTTPError as exc:
+                outcome = "placement_error"
+                raise OrderPlacementError(f"Venue `{self.name}` is not available: {exc!r}") from exc
+            if response.is_client_error and response.status_code not in _TRANSIENT_CLIENT_ERRORS:
+                outcome = "rejected"
+                raise OrderRejectedError(f"Venue `{self.name}` rejected the order with {response.status_code}")
+            if response.is_error:
+                outcome = "placement_error"
+                raise OrderPlacementError(f"Venue `{self.name}` answered {response.status_code}")
+            outcome = "success"
+            return response
+        finally:
+            EXCHANGE_CALL_SECONDS.labels(outcome).observe(time.perf_counter() - started)
+
+
+class ExchangeRegistry:
+    """
+    Routes orders to a venue by the prefix of their instrument.
+
+    The adapter registered for the longest prefix of the instrument is used, or `default` if no
+    registered prefix matches.
+    """
+
+    def __init__(self, default: ExchangeAdapter) -> None:
+        self.default = default
+        self._venues: dict[str, ExchangeAdapter] = {}
+
+    def register(self, prefix: str, adapter: ExchangeAdapter) -> None:
+        """
+        Route the instruments starting with `prefix` to `adapter`.
+
+        Args:
+            prefix (str): The instrument prefix, e.g. `BTC`.
+            adapter (ExchangeAdapter): The venue adapter.
+        """
+        self._venues[prefix] = adapter
+
+    @property
+    def prefixes(self) -> list[str]:
+        """The registered instrument prefixes."""
+        return list(self._venues)
+
+    def adapters(self) -> list[ExchangeAdapter]:
+        """Return every distinct adapter, the default one first."""
+        adapters = {id(adapter): adapter for adapter in (self.default, *self._venues.values())}
+        return list(adapters.values())
+
+    def adapter_for(self, instrument: str) -> ExchangeAdapter:
+        """
+        Return the adapter an instrument is routed to.
+
+        Args:
+            instrument (str): The instrument of the order.
+
+        Returns:
+            ExchangeAdapter: The adapter of the longest matching prefix, or the default adapter.
+        """
+        for prefix in sorted(self._venues, key=len, reverse=True):
+            if instrument.startswith(prefix):
+                return self._venues[prefix]
+        return self.default
+
+    async def close(self) -> None:
+        """Close every registered adapter and the default one."""
+        await asyncio.gather(*(adapter.close() for adapter in self.adapters()))
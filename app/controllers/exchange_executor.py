@@ -0,0 +1,125 @@
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from app.settings import settings
+
+
+class ExchangeSaturatedError(Exception):
+    pass
+
+
+class ExchangeExecutor:
+    """
+    Runs blocking stock exchange calls in a bounded thread pool.
+
+    The calls are submitted to a `ThreadPoolExecutor` so that they never block the event loop.
+    At most `max_workers` calls run at the same time and at most `queue_size` further calls
+    may wait for a free worker; any call beyond that is rejected with `ExchangeSaturatedError`
+    instead of growing the executor's unbounded internal queue.
+    """
+
+    def __init__(self, max_workers: int, queue_size: int) -> None:
+        self.max_workers = max_workers
+        self.queue_size = queue_size
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._running = 0
+
+    @property
+    def in_flight(self) -> int:
+        """Number of calls currently running in a worker thread."""
+        return self._running
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of calls submitted but still waiting for a free worker thread."""
+        return self._pending - self._running
+
+    @property
+    def is_saturated(self) -> bool:
+        """`True` if no further call can be accepted right now."""
+        return self._pending >= self.max_workers + self.queue_size
+
+    def stats(self) -> dict:
+        """
+        Return a snapshot of the executor load.
+
+        Returns:
+            dict: The in-flight count, queue depth and configured limits.
+        """
+        return {
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "max_workers": self.max_workers,
+            "queue_size": self.queue_size,
+        }
+
+    async def run(self, func: Callable, *args: Any) -> Any:
+        """
+        Run a blocking callable in the pool and wait for its result.
+
+        Args:
+            func (Callable): The blocking callable, e.g. `place_order`.
+            *args (Any): Positional arguments passed to `func`.
+
+        Returns:
+            Any: The return value of `func`.
+
+        Raises:
+            ExchangeSaturatedError: If all workers are busy and the wait queue is full.
+        """
+        with self._lock:
+            if self.is_saturated:
+                raise ExchangeSaturatedError("Stock exchange executor is saturated")
+            self._pending += 1
+        try:
+            future = self._get_pool().submit(self._call, func, args)
+        except BaseException:
+            self._release()
+            raise
+        future.add_done_callback(self._on_done)
+        return await asyncio.wrap_future(future)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Shut down the worker threads.
+
+        Calls that are already queued are still executed. A new pool is created lazily
+        if the executor is used again afterwards.
+
+        Args:
+            wait (bool, optional): Block until all queued calls are done. Defaults to True.
+        """
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait)
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="exchange")
+        return self._pool
+
+    def _call(self, func: Callable, args: tuple) -> Any:
+        with self._lock:
+            self._running += 1
+        try:
+            return func(*args)
+        finally:
+            with self._lock:
+                self._running -= 1
+
+    def _on_done(self, future: Future) -> None:
+        self._release()
+
+    def _release(self) -> None:
+        with self._lock:
+            self._pending -= 1
+
+
+exchange_executor = ExchangeExecutor(
+    max_workers=settings.EXCHANGE_MAX_WORKERS,
+    queue_size=settings.EXCHANGE_QUEUE_SIZE,
+)
@@ -0,0 +1,158 @@
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Optional
+
+from tortoise.backends.base.client import BaseDBAsyncClient
+
+from app.controllers.order_events import EVENT_ORDER_FAILED, EVENT_ORDER_PLACED, EVENT_ORDERS_CREATED
+from app.models.order import OrderSide
+
+CENTS = Decimal("0.01")
+
+# One scan of the order table, with the totals and the unplaced part of every instrument and side.
+# Orders given up for good are not counted as unplaced, they will never be placed.
+INSTRUMENT_STATS_SQL = """
+    SELECT
+        "instrument",
+        "side",
+        COUNT(*) AS "orders",
+        SUM("quantity") AS "quantity",
+        SUM(CASE WHEN "order_placed_at" IS NULL AND "failed_at" IS NULL THEN 1 ELSE 0 END) AS "unplaced_orders",
+        SUM(CASE WHEN "order_placed_at" IS NULL AND "failed_at" IS NULL THEN "quantity" ELSE 0 END)
+            AS "unplaced_quantity",
+        SUM(CASE WHEN "order_placed_at" IS NULL AND "failed_at" IS NULL THEN "quantity" * "limit_price" ELSE 0 END)
+            AS "unplaced_limit_notional"
+    FROM "order"
+    GROUP BY "instrument", "side"
+"""
+
+
+class SideStats:
+    """
+    Counters of the orders of one instrument and side.
+
+    `unplaced_limit_notional` is the sum of quantity times limit price of the unplaced limit
+    orders; unplaced market orders have no price and only count towards `unplaced_quantity`.
+    """
+
+    __slots__ = ("orders", "quantity", "unplaced_orders", "unplaced_quantity", "unplaced_limit_notional")
+
+    def __init__(
+        self,
+        orders: int = 0,
+        quantity: int = 0,
+        unplaced_orders: int = 0,
+        unplaced_quantity: int = 0,
+        unplaced_limit_notional: Decimal = Decimal("0.00"),
+    ) -> None:
+        self.orders = orders
+        self.quantity = quantity
+        self.unplaced_orders = unplaced_orders
+        self.unplaced_quantity = unplaced_quantity
+        self.unplaced_limit_notional = unplaced_limit_notional
+
+    def to_dict(self) -> dict:
+        return {
+            "orders": self.orders,
+            "quantity": self.quantity,
+            "unplaced_orders": self.unplaced_orders,
+            "unplaced_quantity": self.unplaced_quantity,
+            "unplaced_limit_notional": str(self.unplaced_limit_notional),
+        }
+
+
+class InstrumentStatsStore:
+    """
+    In-memory order counters per instrument and side, answering stats without querying the database.
+
+    The counters are rebuilt from a single aggregate query by `rebuild`, at startup and then
+    periodically, and are kept up to date in between by `record_created` and `record_placed`,
+    which receive the creation, placement and failure events of the order event hub. On Postgres
+    these are notified by triggers and cover the orders of every process, e.g. of the other API
+    workers, the importer and the dispatcher. Events missed while the hub reconnects are only
+    made up for by the next rebuild; `rebuilt_at` tells how fresh it is. The counters cover the
+    orders still in the order table, not the archived ones.
+    """
+
+    def __init__(self) -> None:
+        self._stats: dict[tuple[str, str], SideStats] = {}
+        self.rebuilt_at: Optional[datetime] = None
+
+    def get(self, instrument: str) -> dict:
+        """
+        Return the stats of an instrument.
+
+        Args:
+            instrument (str): The instrument.
+
+        Returns:
+            dict: The counters of each side, zero if the instrument has no orders, and the time of the last rebuild.
+        """
+        return {
+            "instrument": instrument,
+            **{side.value: self._stats.get((instrument, side.value), SideStats()).to_dict() for side in OrderSide},
+            "rebuilt_at": self.rebuilt_at.isoformat() if self.rebuilt_at else None,
+        }
+
+    def record_created(self, event: dict) -> None:
+        """
+        Count the new orders of an `orders_created` event, other events are ignored.
+
+        Args:
+            event (dict): An event of the order event hub.
+        """
+        if event["event"] != EVENT_ORDERS_CREATED:
+            return
+        stats = self._stats_of(event["instrument"], event["side"])
+        stats.orders += event["orders"]
+        stats.quantity += event["quantity"]
+        stats.unplaced_orders += event["unplaced_orders"]
+        stats.unplaced_quantity += event["unplaced_quantity"]
+        stats.unplaced_limit_notional += Decimal(event["unplaced_limit_notional"]).quantize(CENTS)
+
+    def record_placed(self, event: dict) -> None:
+        """
+        Take the order of an `order_placed` or `order_failed` event out of the unplaced ones.
+
+        Other events, and placement events without the side of the order, which the placement
+        trigger sent before the migration adding it, are ignored.
+
+        Args:
+            event (dict): An event of the order event hub.
+        """
+        if event["event"] not in (EVENT_ORDER_PLACED, EVENT_ORDER_FAILED) or "side" not in event:
+            return
+        quantity = event["quantity"]
+        notional = Decimal(0) if event["limit_price"] is None else Decimal(event["limit_price"]) * quantity
+        stats = self._stats_of(event["instrument"], event["side"])
+        stats.unplaced_orders = max(stats.unplaced_orders - 1, 0)
+        stats.unplaced_quantity = max(stats.unplaced_quantity - quantity, 0)
+        stats.unplaced_limit_notional = max(stats.unplaced_limit_notional - notional, Decimal("0.00"))
+
+    async def rebuild(self, client: BaseDBAsyncClient) -> None:
+        """
+        Replace all counters with the result of one aggregate query.
+
+        Args:
+            client (BaseDBAsyncClient): The database to count on, preferably a read replica.
+        """
+        rows = await client.execute_query_dict(INSTRUMENT_STATS_SQL)
+        self._stats = {
+            (row["instrument"], row["side"]): SideStats(
+                orders=int(row["orders"]),
+                quantity=int(row["quantity"] or 0),
+                unplaced_orders=int(row["unplaced_orders"] or 0),
+                unplaced_quantity=int(row["unplaced_quantity"] or 0),
+                # SQLite computes the notional as a float.
+                unplaced_limit_notional=Decimal(str(row["unplaced_limit_notional"] or 0)).quantize(CENTS),
+            )
+            for row in rows
+        }
+        self.rebuilt_at = datetime.now(timezone.utc)
+
+    def _stats_of(self, instrument: str, side: str) -> SideStats:
+        key = (instrument, side)
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = self._stats[key] = SideStats()
+        return stats
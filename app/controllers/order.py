@@ -1,77 +1,770 @@
-from datetime import datetime
+import asyncio
+import logging
+import random
+import time
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime, timedelta
+from hashlib import sha256
+from typing import AsyncIterator, Optional
 from uuid import UUID
 
+from starlette.exceptions import HTTPException
+from starlette.status import HTTP_409_CONFLICT, HTTP_503_SERVICE_UNAVAILABLE
+from tortoise.exceptions import IntegrityError
+from tortoise.expressions import F, Q, RawSQL
+from tortoise.transactions import in_transaction
+
+from app.cache import LRUCache
+from app.controllers.batch_writer import BatchWriter
+from app.controllers.circuit_breaker import (
+    STATE_CLOSED,
+    STATE_HALF_OPEN,
+    CircuitOpenError,
+    exchange_breaker,
+    venue_breaker,
+)
+from app.controllers.exchange_adapters import (
+    ExchangeAdapter,
+    ExchangeRegistry,
+    HttpExchangeAdapter,
+    LegacyExchangeAdapter,
+    OrderRejectedError,
+)
+from app.controllers.exchange_executor import ExchangeSaturatedError, exchange_executor
+from app.controllers.instrument_stats import InstrumentStatsStore
+from app.controllers.order_events import (
+    OrderEventHub,
+    order_failed_event,
+    order_placed_event,
+    orders_created_events,
+)
+from app.controllers.partitions import OrderPartitionMaintainer
+from app.controllers.periodic_scheduler import PeriodicScheduler, advisory_lock_key
+from app.controllers.placement_scheduler import PlacementScheduler
 from app.controllers.stock_exchange import OrderPlacementError, place_order
-from app.models.order import CreateOrderModel, Order
+from app.db import read_connection
+from app.metrics import EXCHANGE_CALL_SECONDS, ORDER_PLACEMENTS_FAILED, UNPLACED_ORDERS
+from app.models.order import BaseOrderModel, CreateOrderModel, Order, OrderListQueryModel
+from app.settings import PLACEMENT_MODE_INLINE, SATURATION_POLICY_REJECT, settings
+from app.timing import phase
+
+logger = logging.getLogger(__name__)
+
+EXCHANGE_SATURATED_MESSAGE = "Stock exchange is busy, please retry later"
+IDEMPOTENCY_KEY_REUSED_MESSAGE = "Idempotency-Key was already used for a different order"
+
+ORDER_LIST_FIELDS = ("id", "type", "side", "instrument", "limit_price", "quantity", "created_at", "order_placed_at")
+
+# Serializes the claims of all sweepers, see `OrderController._claim_orders`.
+CLAIM_LOCK_KEY = advisory_lock_key("order_claim")
+
+# Whether an older pending order of the same instrument waits for a later attempt, i.e. is leased, backing off
+# or deferred. Only orders attempted before have a `next_attempt_at`, so the partial index of the waiting orders
+# keeps the check to a few index entries, however large the backlog of the instrument.
+WAITING_PREDECESSOR_SQL = """EXISTS (
+    SELECT 1 FROM "order" "older"
+    WHERE "older"."instrument" = "order"."instrument" AND "older"."created_at" < "order"."created_at"
+        AND "older"."order_placed_at" IS NULL AND "older"."failed_at" IS NULL
+        AND "older"."next_attempt_at" IS NOT NULL AND "older"."next_attempt_at" > {now}
+)"""
+
+
+def _retry_delay(attempts: int) -> float:
+    """
+    Return the delay in seconds before the next placement attempt.
+
+    The delay doubles with every attempt, starting at `settings.SWEEPER_BACKOFF_BASE` and capped at
+    `settings.SWEEPER_BACKOFF_MAX`. Half of it is random jitter, so orders that failed together
+    during an exchange outage are not all retried at the same moment.
+
+    Args:
+        attempts (int): The number of placement attempts made so far.
+
+    Returns:
+        float: The delay in seconds.
+    """
+    delay = min(settings.SWEEPER_BACKOFF_MAX, settings.SWEEPER_BACKOFF_BASE * 2 ** max(attempts - 1, 0))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def _timestamp_literal(moment: datetime) -> str:
+    """Render a naive UTC datetime as an SQL literal that compares right with the stored timestamps of every dialect."""
+    return moment.strftime("'%Y-%m-%d %H:%M:%S.%f+00:00'")
+
+
+def _timed_place_order(order: Order) -> None:
+    """
+    Call `place_order` and record its duration and outcome.
+
+    Args:
+        order (Order): The order to be placed on the stock exchange.
+    """
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        place_order(order)
+        outcome = "success"
+    except OrderPlacementError:
+        outcome = "placement_error"
+        raise
+    finally:
+        EXCHANGE_CALL_SECONDS.labels(outcome).observe(time.perf_counter() - started)
+
+
+async def refresh_unplaced_orders_metric(interval: float) -> None:
+    """
+    Refresh the unplaced orders gauge every `interval` seconds, until cancelled.
+
+    The count runs on a timer rather than on every scrape, so scrapes never hit the database.
+
+    Args:
+        interval (float): The number of seconds between two refreshes.
+    """
+    while True:
+        try:
+            UNPLACED_ORDERS.set(await OrderController.count_unplaced_orders())
+        except Exception:
+            logger.exception("Failed to refresh the unplaced orders metric")
+        await asyncio.sleep(interval)
+
+
+async def rebuild_instrument_stats() -> None:
+    """Rebuild the counters of `instrument_stats` from the read replica, or the primary if there is none."""
+    await instrument_stats.rebuild(read_connection() or Order._meta.db)
+
+
+async def rebuild_instrument_stats_periodically(interval: float) -> None:
+    """
+    Rebuild the counters of `instrument_stats` every `interval` seconds, until cancelled.
+
+    Every worker keeps its own counters, so every worker runs this loop, whether or not it runs the
+    periodic jobs. A random jitter of up to a tenth of the interval keeps the workers apart.
+
+    Args:
+        interval (float): The number of seconds between two rebuilds.
+    """
+    while True:
+        await asyncio.sleep(interval + random.uniform(0, interval / 10))
+        try:
+            await rebuild_instrument_stats()
+        except Exception:
+            logger.exception("Failed to rebuild the instrument stats")
+
+
+def _publish_created(orders: list[Order]) -> None:
+    """Publish the creation of orders to this process, on Postgres the creation trigger does it for every process."""
+    if Order._meta.db.capabilities.dialect != "postgres":
+        for event in orders_created_events(orders):
+            order_event_hub.publish(event)
+
+
+async def _insert_orders(orders: list[Order]) -> None:
+    """
+    Insert orders with a single bulk insert in one transaction.
+
+    Args:
+        orders (list[Order]): The unsaved orders to insert.
+    """
+    async with in_transaction() as connection:
+        await Order.bulk_create(orders, using_db=connection)
+    for order in orders:
+        # `bulk_create` does not flag the instances as stored, later saves must update them.
+        order._saved_in_db = True
+    _publish_created(orders)
+
+
+def build_exchange_registry() -> ExchangeRegistry:
+    """
+    Build the venue routing from the settings.
+
+    Orders are placed with `place_order` in the exchange executor unless their instrument starts
+    with one of the prefixes of `settings.EXCHANGE_VENUES`. Every venue has its own circuit breaker,
+    which does not count orders the venue rejected as failures.
+
+    Returns:
+        ExchangeRegistry: The registry.
+    """
+    registry = ExchangeRegistry(
+        default=LegacyExchangeAdapter(
+            name="stock_exchange", place_order=_timed_place_order, executor=exchange_executor, breaker=exchange_breaker
+        )
+    )
+    for prefix, base_url in settings.EXCHANGE_VENUES.items():
+        registry.register(
+            prefix,
+            HttpExchangeAdapter(
+                name=prefix,
+                base_url=base_url,
+                max_connections=settings.EXCHANGE_HTTP_MAX_CONNECTIONS,
+                timeout=settings.EXCHANGE_HTTP_TIMEOUT,
+                max_batch_size=settings.EXCHANGE_HTTP_BATCH_SIZE,
+                breaker=venue_breaker(prefix, ignored_exceptions=(OrderRejectedError,)),
+            ),
+        )
+    return registry
+
+
+exchange_registry = build_exchange_registry()
+
+
+def _venue_routes() -> list[tuple[ExchangeAdapter, Q]]:
+    """
+    Return every venue with a filter on the instruments routed to it.
+
+    An instrument is routed to the longest registered prefix it starts with, so it belongs to a prefix
+    if it starts with it but with none of the longer prefixes extending it, and to the default venue
+    if it starts with no prefix at all.
+
+    Returns:
+        list[tuple[ExchangeAdapter, Q]]: The default venue and its filter first, then one entry per prefix.
+    """
+    prefixes = exchange_registry.prefixes
+    routes = [(exchange_registry.default, Q(*(~Q(instrument__startswith=prefix) for prefix in prefixes)))]
+    for prefix in prefixes:
+        longer = [other for other in prefixes if other != prefix and other.startswith(prefix)]
+        routes.append(
+            (
+                exchange_registry.adapter_for(prefix),
+                Q(Q(instrument__startswith=prefix), *(~Q(instrument__startswith=other) for other in longer)),
+            )
+        )
+    return routes
+
+
+order_writer = BatchWriter(
+    name="order_insert",
+    flush=_insert_orders,
+    max_batch_size=settings.ORDER_WRITE_MAX_BATCH_SIZE,
+    max_delay=settings.ORDER_WRITE_MAX_DELAY,
+)
+
+# Marks a batch of orders as placed. `= ANY($2)` keeps a single prepared statement for every batch size.
+MARK_ORDERS_PLACED_SQL = 'UPDATE "order" SET "order_placed_at" = $1, "updated_at" = $1 WHERE "id" = ANY($2::uuid[])'
+
+
+async def _mark_orders_placed(orders: list[Order]) -> None:
+    """
+    Record the placement of orders with a single UPDATE of their `order_placed_at`.
+
+    The orders of a batch share one timestamp, taken when the batch is flushed, which is at most
+    `settings.ORDER_ACK_MAX_DELAY` seconds after the exchange confirmed the placements.
+
+    Args:
+        orders (list[Order]): The orders placed on the stock exchange.
+    """
+    placed_at = datetime.utcnow()
+    connection = Order._meta.db
+    if connection.capabilities.dialect == "postgres":
+        db_placed_at = Order._meta.fields_map["order_placed_at"].to_db_value(placed_at, Order)
+        await connection.execute_query(MARK_ORDERS_PLACED_SQL, [db_placed_at, [order.id for order in orders]])
+    else:
+        await Order.filter(id__in=[order.id for order in orders]).update(
+            order_placed_at=placed_at, updated_at=placed_at
+        )
+    for order in orders:
+        order.order_placed_at = placed_at
+        order.updated_at = placed_at
+
+
+order_ack_writer = BatchWriter(
+    name="order_ack",
+    flush=_mark_orders_placed,
+    max_batch_size=settings.ORDER_ACK_MAX_BATCH_SIZE,
+    max_delay=settings.ORDER_ACK_MAX_DELAY,
+)
+
+
+def encode_cursor(row: dict) -> str:
+    """
+    Encode the keyset position of an order row as an opaque cursor.
+
+    Args:
+        row (dict): The order row, with at least `created_at` and `id`.
+
+    Returns:
+        str: The cursor.
+    """
+    return urlsafe_b64encode(f"{row['created_at'].isoformat()}|{row['id']}".encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    """
+    Decode a cursor created by `encode_cursor`.
+
+    Args:
+        cursor (str): The cursor.
+
+    Returns:
+        tuple[datetime, UUID]: The `created_at` and `id` of the last order before the cursor.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    created_at, order_id = urlsafe_b64decode(cursor.encode()).decode().split("|")
+    return datetime.fromisoformat(created_at), UUID(order_id)
+
+
+def _serialize_row(row: dict) -> dict:
+    """Make an order row from `ORDER_LIST_FIELDS` JSON serializable, keeping decimals exact."""
+    if row["limit_price"] is not None:
+        row["limit_price"] = str(row["limit_price"])
+    return row
+
+
+def order_fingerprint(model: BaseOrderModel) -> dict:
+    """Return the fields that identify the order of a request, to tell a retry from a reused key."""
+    return model.model_dump()
+
+
+def scoped_idempotency_key(client: str, key: str) -> str:
+    """
+    Return the idempotency key of a request as stored and cached, scoped to the client that chose it.
+
+    Two clients choosing the same `Idempotency-Key` thereby get two orders rather than one
+    replaying the order of the other. The key is hashed to keep it within the 255 characters of
+    the column, however long the client identity and the key are.
+
+    Args:
+        client (str): The client identity, see `client_identity`.
+        key (str): The `Idempotency-Key` header.
+
+    Returns:
+        str: The hex SHA-256 digest of both, header values cannot contain the newline separating them.
+    """
+    return sha256(f"{client}\n{key}".encode()).hexdigest()
+
+
+def _stored_fingerprint(order: Order) -> dict:
+    """Return the `order_fingerprint` of the request that created a stored order."""
+    return order_fingerprint(
+        CreateOrderModel.model_construct(
+            type=order.type.value,
+            side=order.side.value,
+            instrument=order.instrument,
+            limit_price=order.limit_price,
+            quantity=order.quantity,
+        )
+    )
+
+
+# Serialized `GET /orders/{id}` responses, keyed by order id.
+order_response_cache = LRUCache(max_size=settings.ORDER_CACHE_SIZE)
+
+# Order fingerprint and serialized `POST /orders` response, keyed by `scoped_idempotency_key`.
+idempotency_cache = LRUCache(max_size=settings.IDEMPOTENCY_CACHE_SIZE)
+
+# Order counters per instrument and side, served by `GET /instruments/{instrument}/stats`.
+instrument_stats = InstrumentStatsStore()
+
+# Placement events of all processes, fanned out to the `GET /orders/stream` clients of this worker.
+order_event_hub = OrderEventHub(
+    max_subscribers=settings.ORDER_STREAM_MAX_SUBSCRIBERS,
+    max_queue=settings.ORDER_STREAM_MAX_QUEUE,
+    reconnect_delay=settings.ORDER_EVENTS_RECONNECT_DELAY,
+)
+# An order placed by another process is not served from the stale cached response of this one.
+order_event_hub.add_callback(lambda event: "id" in event and order_response_cache.invalidate(UUID(event["id"])))
+# Orders are counted from the events, whichever process created, placed or gave them up, this one included.
+order_event_hub.add_callback(instrument_stats.record_created)
+order_event_hub.add_callback(instrument_stats.record_placed)
 
 
 class OrderController:
     @staticmethod
-    async def create(model: CreateOrderModel) -> Order:
+    async def create(model: BaseOrderModel, idempotency_key: Optional[str] = None) -> Order:
         """
-        Creates a new order in the database and attempts to place it on the stock exchange.
+        Creates a new order in the database and hands it over for placement on the stock exchange.
+
+        The stored order doubles as its own outbox entry: an order whose `order_placed_at` is null
+        is pending placement, so the single `INSERT` commits the order and its placement job
+        atomically. With the default `outbox` placement mode the method returns right after that
+        commit and the placement dispatcher (`python -m app.dispatcher`) places the order.
 
-        This method takes a `CreateOrderModel` instance, creates a new order in the database with
-        the provided data, and attempts to place the order using the `place_order` function.
-        If an `OrderPlacementError` is raised during the placement, the error is caught, and the
-        order remains unplaced.
+        With `settings.ORDER_WRITE_COALESCING` enabled, the insert is handed to `order_writer`, which
+        commits the orders of concurrent requests together with a single bulk insert.
+
+        With the `inline` placement mode the order is additionally placed during the request
+        using the `place_order` function. If an `OrderPlacementError` is raised during the
+        placement, the error is caught, and the order remains pending for the dispatcher.
+        If the exchange executor is saturated and the saturation policy is `reject`, the order
+        is not stored and a 503 is returned so that the client can retry later. An order is not
+        placed inline while an older order of its instrument is still pending, so that it does not
+        overtake it: it is released to the dispatcher instead, which places it after the older one.
+
+        An order with an `idempotency_key` is stored with it in a unique column. If another order
+        already holds the key, no order is created or placed and the existing one is returned instead,
+        provided it has the same fields. Such orders are always inserted on their own, never coalesced,
+        so that a duplicate key does not fail the bulk insert of unrelated orders.
 
         Args:
-            model (CreateOrderModel): The data required to create a new order.
+            model (BaseOrderModel): The data required to create a new order.
+            idempotency_key (Optional[str], optional): The key of the request, see `scoped_idempotency_key`.
+                Defaults to None.
 
         Returns:
-            Order: The created order instance.
+            Order: The created order instance, or the existing order holding `idempotency_key`.
+
+        Raises:
+            HTTPException: 503 if placing inline, the exchange executor is saturated and the policy is `reject`.
+            HTTPException: 409 if the idempotency key was already used for an order with different fields.
         """
-        order = await Order.create(**model.model_dump(exclude_unset=True))
-        await OrderController._place_order(order)
+        place_inline = settings.PLACEMENT_MODE == PLACEMENT_MODE_INLINE
+        if (
+            place_inline
+            and settings.EXCHANGE_SATURATION_POLICY == SATURATION_POLICY_REJECT
+            and exchange_executor.is_saturated
+        ):
+            raise HTTPException(status_code=HTTP_503_SERVICE_UNAVAILABLE, detail=EXCHANGE_SATURATED_MESSAGE)
+        # An order placed inline is leased to this request, so that no sweeper claims it meanwhile.
+        lease = (
+            {"attempts": 1, "next_attempt_at": datetime.utcnow() + timedelta(seconds=settings.SWEEPER_CLAIM_TIMEOUT)}
+            if place_inline
+            else {}
+        )
+        order_data = {**model.model_dump(exclude_unset=True), **lease}
+        with phase("db_insert"):
+            if idempotency_key is not None:
+                try:
+                    order = await Order.create(**order_data, idempotency_key=idempotency_key)
+                    _publish_created([order])
+                except IntegrityError:
+                    order = await Order.get_or_none(idempotency_key=idempotency_key)
+                    if order is None:
+                        raise
+                    if _stored_fingerprint(order) != order_fingerprint(model):
+                        raise HTTPException(status_code=HTTP_409_CONFLICT, detail=IDEMPOTENCY_KEY_REUSED_MESSAGE)
+                    return order
+            elif settings.ORDER_WRITE_COALESCING:
+                order = Order(**order_data)
+                await order_writer.write(order)
+            else:
+                order = await Order.create(**order_data)
+                _publish_created([order])
+        if place_inline and await OrderController._has_pending_predecessor(order):
+            await OrderController._release_lease(order)
+        elif place_inline:
+            await OrderController._place_order(order)
         return order
 
     @staticmethod
-    async def place_failed_orders():
+    async def _has_pending_predecessor(order: Order) -> bool:
+        """Return whether an older order of the same instrument has been neither placed nor given up yet."""
+        return await Order.filter(
+            instrument=order.instrument,
+            created_at__lt=order.created_at,
+            order_placed_at__isnull=True,
+            failed_at__isnull=True,
+        ).exists()
+
+    @staticmethod
+    async def _release_lease(order: Order) -> None:
+        """Hand an order leased for inline placement over to the dispatcher, as if it had not been leased."""
+        order.attempts = 0
+        order.next_attempt_at = None
+        await order.save(update_fields=["attempts", "next_attempt_at"])
+
+    @staticmethod
+    async def create_many(models: list[Optional[BaseOrderModel]]) -> list[Optional[Order]]:
         """
-        Attempts to place orders on the stock exchange that previously failed to be placed.
+        Stores a basket of validated orders with a single bulk insert.
+
+        The items of the basket are validated on their own by `decode_order_batch`, so that one invalid
+        item does not reject the whole basket; invalid items are passed as None and skipped. The valid
+        orders are inserted in one transaction and, like orders created one by one, are placed by the
+        dispatcher afterwards. They are never placed during the request, not even with the `inline`
+        placement mode.
 
-        This method retrieves all orders from the database where `order_placed_at` is null,
-        indicating they have not been placed at the stock exchange. It then attempts to
-        place each order using the `place_order` function. If an `OrderPlacementError` is
-        raised, it is caught and the order remains unplaced. Otherwise, the order's
-        `order_placed_at` field is updated to the current UTC time, and the order is saved.
+        Args:
+            models (list[Optional[BaseOrderModel]]): The validated orders, or None for invalid items.
 
-        This operation could be enhanced by utilizing a task queue with retry logic
-        to ensure reliability and scalability.
+        Returns:
+            list[Optional[Order]]: The created order for each item, or None if the item is invalid.
         """
-        orders = await Order.filter(order_placed_at__isnull=True).all()
+        orders = [None if model is None else Order(**model.model_dump(exclude_unset=True)) for model in models]
+        valid_orders = [order for order in orders if order is not None]
+        if valid_orders:
+            await _insert_orders(valid_orders)
+        return orders
+
+    @staticmethod
+    async def place_failed_orders(batch_size: int = None) -> int:
+        """
+        Claims one batch of due orders that have not been placed yet and attempts to place them.
+
+        The batch is claimed with `_claim_orders`, so several sweepers, e.g. the dispatchers and the
+        `failed_order_sweep` job, can run this method at the same time without placing the same order
+        twice or the orders of an instrument out of order. The claimed orders are then placed by
+        `placement_scheduler`: in parallel across `settings.PLACEMENT_SHARD_COUNT` shards, but one
+        after the other and oldest first within an instrument. Orders whose placement fails are
+        rescheduled with an exponential backoff and picked up again by a later call.
+        Orders routed to a venue whose circuit breaker is open are not claimed, so an outage of one
+        venue does not hold up the placements on the others. Nothing is claimed while every breaker is open.
+        Of the orders of a venue whose breaker is half-open, only as many as the breaker lets trial calls
+        through are claimed, so that the others do not go straight back to the backlog.
+
+        Args:
+            batch_size (int, optional): Maximum number of orders to claim. Defaults to `settings.DISPATCHER_BATCH_SIZE`.
+
+        Returns:
+            int: The number of orders that were claimed, whether their placement succeeded or not.
+        """
+        routes = _venue_routes()
+        closed = [route for adapter, route in routes if adapter.breaker.state == STATE_CLOSED]
+        half_open: dict[int, tuple[ExchangeAdapter, list[Q]]] = {}
+        for adapter, route in routes:
+            if adapter.breaker.state == STATE_HALF_OPEN:
+                half_open.setdefault(id(adapter), (adapter, []))[1].append(route)
+
+        orders = []
+        if closed:
+            orders = await OrderController._claim_orders(
+                batch_size or settings.DISPATCHER_BATCH_SIZE,
+                instruments=None if len(closed) == len(routes) else Q(*closed, join_type=Q.OR),
+            )
+        for adapter, trial_routes in half_open.values():
+            orders += await OrderController._claim_orders(
+                adapter.breaker.half_open_calls, instruments=Q(*trial_routes, join_type=Q.OR)
+            )
+        orders.sort(key=lambda order: order.created_at)
+        await placement_scheduler.run(orders)
+        return len(orders)
+
+    @staticmethod
+    async def _claim_orders(batch_size: int, instruments: Optional[Q] = None) -> list[Order]:
+        """
+        Claims a batch of unplaced orders that are due for a placement attempt.
+
+        The oldest due orders are selected with `SELECT ... FOR UPDATE`. Within the same transaction
+        their `next_attempt_at` is pushed forward by `settings.SWEEPER_CLAIM_TIMEOUT` and `attempts`
+        is incremented. The pushed `next_attempt_at` acts as a lease: no other sweeper picks the
+        orders up again unless this one dies before recording the outcome.
+
+        An order is not claimed while an older unplaced order of its instrument is not due, i.e. while
+        that order waits for its retry after a failed placement, is deferred behind one, or is being
+        placed under a lease. This keeps the orders of an instrument in order across sweeps: a new
+        order does not overtake an older one that is backing off. Orders given up for good, see
+        `_record_placement`, are neither claimed nor hold back the later orders of their instrument.
+
+        On Postgres the claims of all sweepers are serialized by a transaction level advisory lock,
+        which is held for the few milliseconds of the claim only. A sweeper therefore sees the leases
+        of the claims before it and never claims a later order of an instrument while another sweeper
+        is claiming an earlier one, which skipping the locked rows would do.
+
+        Args:
+            batch_size (int): Maximum number of orders to claim.
+            instruments (Optional[Q], optional): Only claim the orders of the instruments matching this filter.
+                Defaults to None.
+
+        Returns:
+            list[Order]: The claimed orders.
+        """
+        now = datetime.utcnow()
+        lease_until = now + timedelta(seconds=settings.SWEEPER_CLAIM_TIMEOUT)
+        async with in_transaction() as connection:
+            if Order._meta.db.capabilities.dialect == "postgres":
+                await connection.execute_query("SELECT pg_advisory_xact_lock($1)", [CLAIM_LOCK_KEY])
+            orders = (
+                await Order.filter(
+                    Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lte=now),
+                    *([instruments] if instruments is not None else []),
+                    order_placed_at__isnull=True,
+                    failed_at__isnull=True,
+                )
+                .annotate(waits=RawSQL(WAITING_PREDECESSOR_SQL.format(now=_timestamp_literal(now))))
+                .filter(waits=False)
+                .order_by("created_at")
+                .limit(batch_size)
+                .select_for_update()
+                .using_db(connection)
+            )
+            if not orders:
+                return []
+            await (
+                Order.filter(id__in=[order.id for order in orders])
+                .using_db(connection)
+                .update(attempts=F("attempts") + 1, next_attempt_at=lease_until)
+            )
         for order in orders:
-            await OrderController._place_order(order)
+            order.attempts += 1
+            order.next_attempt_at = lease_until
+        return orders
 
     @staticmethod
-    async def _place_order(order: Order) -> None:
+    async def _place_order(order: Order) -> bool:
         """
         Places an order on the stock exchange.
 
-        This method takes an `Order` instance and attempts to place it on the stock
-        exchange using the `place_order` function. If the placement is successful, the
-        order's `order_placed_at` field is updated to the current UTC time, and the
-        order is saved in the database.
+        This method takes an `Order` instance and attempts to place it on the venue that
+        `exchange_registry` routes its instrument to. By default that is the `place_order` function,
+        which runs in the exchange executor's thread pool so that it does not block the event loop.
+        The outcome is recorded with `_record_placement`.
 
         Args:
             order (Order): The order to be placed on the stock exchange.
+
+        Returns:
+            bool: `True` if the order was placed, `False` if it remains unplaced.
+        """
+        with phase("exchange"):
+            [error] = await OrderController._attempt_placement(_route(order), [order])
+        with phase("db_ack"):
+            return await OrderController._record_placement(order, error)
+
+    @staticmethod
+    async def _attempt_placement(adapter: ExchangeAdapter, orders: list[Order]) -> list[Optional[Exception]]:
+        """
+        Places orders on a venue, with a single batch call if the venue accepts batches.
+
+        The call goes through the circuit breaker of the venue. While the breaker is open, the
+        venue is not called at all and the orders go straight back to the retry backlog.
+        If the venue cannot be reached or rejects the call, the executor is saturated or the breaker is open, every
+        order of the call fails with that error.
+
+        Args:
+            adapter (ExchangeAdapter): The venue of the orders.
+            orders (list[Order]): The orders, a single one unless `adapter.max_batch_size` is greater than 1.
+
+        Returns:
+            list[Optional[Exception]]: For each order, None if it was placed or the error if not.
         """
         try:
-            place_order(order)
-        except OrderPlacementError:
-            return
-        order.order_placed_at = datetime.utcnow()
-        await order.save()
+            if adapter.max_batch_size == 1:
+                await adapter.breaker.call(adapter.place, orders[0])
+                return [None]
+            return await adapter.breaker.call(adapter.place_many, orders)
+        except (OrderPlacementError, ExchangeSaturatedError, CircuitOpenError) as exc:
+            return [exc] * len(orders)
+
+    @staticmethod
+    async def _defer_placement(order: Order, behind: Order) -> None:
+        """
+        Reschedules an order, without calling the exchange, to be retried together with an earlier failed order.
+
+        The order was not attempted, so its claim does not count towards `settings.SWEEPER_MAX_ATTEMPTS`.
+
+        Args:
+            order (Order): The order to defer.
+            behind (Order): The failed order of the same instrument that has to be placed first.
+        """
+        order.attempts = max(order.attempts - 1, 0)
+        order.last_error = f"Deferred behind order {behind.id}"
+        order.next_attempt_at = behind.next_attempt_at
+        await order.save(update_fields=["attempts", "last_error", "next_attempt_at"])
+
+    @staticmethod
+    async def _record_placement(order: Order, error: Optional[Exception]) -> bool:
+        """
+        Records the outcome of a placement attempt.
+
+        If the placement was successful, the order's `order_placed_at` field is updated to the
+        current UTC time and its cached response is invalidated. Only `order_placed_at` and
+        `updated_at` are written; with `settings.ORDER_ACK_COALESCING` the write goes through
+        `order_ack_writer`, which acknowledges the placements of concurrent calls with a single UPDATE.
+        On Postgres the update notifies the stream clients and the instrument stats of all workers
+        through the placement trigger; on other databases the placement event is published to this
+        process only.
+
+        If the placement failed, the executor was saturated or the breaker was open, the order stays
+        unplaced: the error is stored in `last_error` and `next_attempt_at` is set according to the
+        backoff for the number of attempts made so far. If the breaker was open, the venue was not
+        called: the attempt is not counted and the order is due again right away, to be claimed once
+        the breaker lets calls through again. An order the venue rejected, or that failed
+        `settings.SWEEPER_MAX_ATTEMPTS` times, is given up instead: `failed_at` is set, the order is
+        never retried, and an `order_failed` event is published the same way as placement events.
+
+        Args:
+            order (Order): The order whose placement was attempted.
+            error (Optional[Exception]): The error of the attempt, or None if the order was placed.
+
+        Returns:
+            bool: `True` if the order was placed, `False` if it remains unplaced.
+        """
+        if isinstance(error, CircuitOpenError):
+            order.attempts = max(order.attempts - 1, 0)
+            order.last_error = str(error)
+            order.next_attempt_at = None
+            await order.save(update_fields=["attempts", "last_error", "next_attempt_at"])
+            return False
+        if error is not None:
+            order.last_error = str(error) or error.__class__.__name__
+            if isinstance(error, OrderRejectedError) or order.attempts >= settings.SWEEPER_MAX_ATTEMPTS:
+                return await OrderController._record_failure(
+                    order, "rejected" if isinstance(error, OrderRejectedError) else "max_attempts"
+                )
+            order.next_attempt_at = datetime.utcnow() + timedelta(seconds=_retry_delay(order.attempts))
+            await order.save(update_fields=["last_error", "next_attempt_at"])
+            return False
+        if settings.ORDER_ACK_COALESCING:
+            await order_ack_writer.write(order)
+        else:
+            order.order_placed_at = datetime.utcnow()
+            await order.save(update_fields=["order_placed_at", "updated_at"])
+        order_response_cache.invalidate(order.id)
+        if Order._meta.db.capabilities.dialect != "postgres":
+            order_event_hub.publish(order_placed_event(order))
+        return True
+
+    @staticmethod
+    async def _record_failure(order: Order, reason: str) -> bool:
+        """
+        Gives an order up for good, after its last placement attempt failed with `order.last_error`.
+
+        Args:
+            order (Order): The order whose placement failed.
+            reason (str): Why the order is given up, `rejected` or `max_attempts`, for the metric.
+
+        Returns:
+            bool: Always `False`, the order remains unplaced.
+        """
+        logger.warning("Order %s is given up after %d attempts: %s", order.id, order.attempts, order.last_error)
+        order.failed_at = datetime.utcnow()
+        order.next_attempt_at = None
+        await order.save(update_fields=["last_error", "failed_at", "next_attempt_at", "updated_at"])
+        ORDER_PLACEMENTS_FAILED.labels(reason).inc()
+        order_response_cache.invalidate(order.id)
+        if Order._meta.db.capabilities.dialect != "postgres":
+            order_event_hub.publish(order_failed_event(order))
+        return False
+
+    @staticmethod
+    async def count_unplaced_orders() -> int:
+        """
+        Counts the orders that have not been placed on the stock exchange yet and are still to be.
+
+        Returns:
+            int: The number of orders whose `order_placed_at` and `failed_at` are null.
+        """
+        return (
+            await Order.filter(order_placed_at__isnull=True, failed_at__isnull=True)
+            .using_db(read_connection())
+            .count()
+        )
+
+    @staticmethod
+    async def get_finished_orders(order_ids: list[UUID]) -> list[Order]:
+        """
+        Retrieves the orders among `order_ids` that have already been placed or given up.
+
+        The primary is asked rather than the read replica, as this is used to catch up on placements
+        and failures that happened right before a client subscribed to their events.
+
+        Args:
+            order_ids (list[UUID]): The ids of the orders.
+
+        Returns:
+            list[Order]: The placed and the failed orders.
+        """
+        return await Order.filter(Q(order_placed_at__isnull=False) | Q(failed_at__isnull=False), id__in=order_ids)
 
     @staticmethod
     async def get_order_by_id(order_id: UUID) -> Order:
         """
         Retrieves an order by its unique identifier.
 
-        This asynchronous method queries the database for an order with the specified
+        This asynchronous method queries the read replica for an order with the specified
         `order_id`. If an order with the given ID exists, it returns the first match.
-        Otherwise, it returns None.
+        An order that was created moments ago may not have been replicated yet, so if the
+        replica does not know the order, the primary is asked as well. Otherwise, it returns None.
 
         Args:
             order_id (UUID): The unique identifier of the order to retrieve.
@@ -79,4 +772,123 @@ class OrderController:
         Returns:
             Order: The order instance with the specified ID, or None if no such order exists.
         """
-        return await Order.filter(id=order_id).first()
+        replica = read_connection()
+        order = await Order.filter(id=order_id).using_db(replica).first()
+        if order is None and replica is not None:
+            order = await Order.filter(id=order_id).first()
+        return order
+
+    @staticmethod
+    async def list_orders(query: OrderListQueryModel) -> tuple[list[dict], Optional[str]]:
+        """
+        Retrieves one page of orders matching the filters of `query`, oldest first.
+
+        Pages are read from the read replica and selected by keyset on `(created_at, id)` rather than
+        by offset, so every page costs the same index range scan no matter how deep into the result it is.
+
+        Args:
+            query (OrderListQueryModel): The filters, the cursor returned with the previous page and the page size.
+
+        Returns:
+            tuple[list[dict], Optional[str]]: The orders of the page and the cursor of the next page,
+                or None if this is the last page.
+
+        Raises:
+            ValueError: If the cursor is malformed.
+        """
+        rows = await OrderController._orders_after(query, query.cursor, query.limit + 1)
+        if len(rows) <= query.limit:
+            return [_serialize_row(row) for row in rows], None
+        rows = rows[: query.limit]
+        return [_serialize_row(row) for row in rows], encode_cursor(rows[-1])
+
+    @staticmethod
+    async def iter_orders(query: OrderListQueryModel, chunk_size: int) -> AsyncIterator[dict]:
+        """
+        Iterates over all orders matching the filters of `query`, oldest first, starting after its cursor.
+
+        The orders are loaded from the read replica in keyset pages of `chunk_size`, so memory use
+        stays flat no matter how many orders match. `query.limit` is ignored.
+
+        Args:
+            query (OrderListQueryModel): The filters and an optional cursor to start after.
+            chunk_size (int): The number of orders loaded per query.
+
+        Yields:
+            dict: The orders.
+
+        Raises:
+            ValueError: If the cursor is malformed.
+        """
+        cursor = query.cursor
+        while True:
+            rows = await OrderController._orders_after(query, cursor, chunk_size)
+            for row in rows:
+                yield _serialize_row(row)
+            if len(rows) < chunk_size:
+                return
+            cursor = encode_cursor(rows[-1])
+
+    @staticmethod
+    async def _orders_after(query: OrderListQueryModel, cursor: Optional[str], limit: int) -> list[dict]:
+        filters = {}
+        if query.instrument is not None:
+            filters["instrument"] = query.instrument
+        if query.side is not None:
+            filters["side"] = query.side
+        if query.created_from is not None:
+            filters["created_at__gte"] = query.created_from
+        if query.created_to is not None:
+            filters["created_at__lt"] = query.created_to
+        if query.placed is not None:
+            filters["order_placed_at__isnull"] = not query.placed
+
+        queryset = Order.filter(**filters)
+        if cursor:
+            created_at, order_id = decode_cursor(cursor)
+            queryset = queryset.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=order_id))
+        return (
+            await queryset.order_by("created_at", "id")
+            .limit(limit)
+            .using_db(read_connection())
+            .values(*ORDER_LIST_FIELDS)
+        )
+
+
+def _route(order: Order) -> ExchangeAdapter:
+    return exchange_registry.adapter_for(order.instrument)
+
+
+placement_scheduler = PlacementScheduler(
+    shard_count=settings.PLACEMENT_SHARD_COUNT,
+    route=_route,
+    attempt=OrderController._attempt_placement,
+    record=OrderController._record_placement,
+    defer=OrderController._defer_placement,
+)
+periodic_scheduler = PeriodicScheduler(connection=lambda: Order._meta.db)
+periodic_scheduler.register(
+    "failed_order_sweep",
+    OrderController.place_failed_orders,
+    interval=settings.FAILED_ORDER_SWEEP_INTERVAL,
+    jitter=settings.FAILED_ORDER_SWEEP_JITTER,
+)
+order_partition_maintainer = OrderPartitionMaintainer(
+    months_ahead=settings.ORDER_PARTITION_MONTHS_AHEAD,
+    retention_months=settings.ORDER_RETENTION_MONTHS,
+    archive_schema=settings.ORDER_ARCHIVE_SCHEMA,
+    archive_tablespace=settings.ORDER_ARCHIVE_TABLESPACE,
+    key_release_batch_size=settings.ORDER_ARCHIVE_KEY_RELEASE_BATCH_SIZE,
+)
+# The rebuild scans the order table, which every worker does on its own: the primary is only scanned rarely.
+INSTRUMENT_STATS_REBUILD_INTERVAL = (
+    settings.INSTRUMENT_STATS_REBUILD_INTERVAL
+    if settings.POSTGRES_READ_HOST
+    else settings.INSTRUMENT_STATS_PRIMARY_REBUILD_INTERVAL
+)
+periodic_scheduler.register(
+    "order_partition_maintenance",
+    lambda: order_partition_maintainer.run(Order._meta.db),
+    interval=settings.ORDER_PARTITION_MAINTENANCE_INTERVAL,
+    jitter=settings.ORDER_PARTITION_MAINTENANCE_INTERVAL / 10,
+)
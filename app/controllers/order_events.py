@@ -0,0 +1,347 @@
+import asyncio
+import logging
+from decimal import Decimal
+from typing import AsyncIterator, Callable, Iterable, Optional
+
+import asyncpg
+import orjson
+from tortoise.backends.base.client import BaseDBAsyncClient
+
+from app.metrics import ORDER_EVENTS_DROPPED_SUBSCRIBERS, ORDER_EVENTS_PUBLISHED, ORDER_STREAM_SUBSCRIBERS
+from app.models.order import Order
+
+logger = logging.getLogger(__name__)
+
+# Postgres channel the creation, placement and failure triggers notify, see the order events migrations.
+ORDER_EVENTS_CHANNEL = "order_events"
+EVENT_ORDERS_CREATED = "orders_created"
+EVENT_ORDER_PLACED = "order_placed"
+EVENT_ORDER_FAILED = "order_failed"
+
+
+def orders_created_events(orders: list[Order]) -> list[dict]:
+    """
+    Build the events of newly inserted orders, in the format of the notifications of the creation trigger.
+
+    There is one event per instrument and side, with the number, quantity and unplaced part of its
+    new orders, and the id of one of them in `first_id`: Postgres delivers identical notifications
+    of a transaction only once, so the id keeps the events of two inserts apart.
+
+    Args:
+        orders (list[Order]): The orders inserted by one statement.
+
+    Returns:
+        list[dict]: The events.
+    """
+    events: dict[tuple[str, str], dict] = {}
+    for order in orders:
+        event = events.get((order.instrument, order.side.value))
+        if event is None:
+            event = events[(order.instrument, order.side.value)] = {
+                "event": EVENT_ORDERS_CREATED,
+                "instrument": order.instrument,
+                "side": order.side.value,
+                "first_id": str(order.id),
+                "orders": 0,
+                "quantity": 0,
+                "unplaced_orders": 0,
+                "unplaced_quantity": 0,
+                "unplaced_limit_notional": Decimal(0),
+            }
+        event["orders"] += 1
+        event["quantity"] += order.quantity
+        if order.order_placed_at is None and order.failed_at is None:
+            event["unplaced_orders"] += 1
+            event["unplaced_quantity"] += order.quantity
+            if order.limit_price is not None:
+                event["unplaced_limit_notional"] += Decimal(order.limit_price) * order.quantity
+    for event in events.values():
+        event["unplaced_limit_notional"] = str(event["unplaced_limit_notional"])
+    return list(events.values())
+
+
+def order_placed_event(order: Order) -> dict:
+    """
+    Build the event of a placed order, in the format of the notifications of the placement trigger.
+
+    Args:
+        order (Order): The placed order.
+
+    Returns:
+        dict: The event.
+    """
+    return {
+        "event": EVENT_ORDER_PLACED,
+        "id": str(order.id),
+        "instrument": order.instrument,
+        "side": order.side.value,
+        "quantity": order.quantity,
+        "limit_price": None if order.limit_price is None else str(order.limit_price),
+        "order_placed_at": order.order_placed_at.isoformat(),
+    }
+
+
+def order_failed_event(order: Order) -> dict:
+    """
+    Build the event of an order given up for good, in the format of the notifications of the failure trigger.
+
+    Args:
+        order (Order): The failed order.
+
+    Returns:
+        dict: The event.
+    """
+    return {
+        "event": EVENT_ORDER_FAILED,
+        "id": str(order.id),
+        "instrument": order.instrument,
+        "side": order.side.value,
+        "quantity": order.quantity,
+        "limit_price": None if order.limit_price is None else str(order.limit_price),
+        "failed_at": order.failed_at.isoformat(),
+        "error": order.last_error,
+    }
+
+
+class Subscription:
+    """
+    The events of interest to one stream client, buffered in a bounded queue.
+
+    A subscription without order ids and instruments receives every event. A client that does not
+    keep up with its events is dropped rather than buffering without bound: its queue is closed
+    and the stream ends, so that the client reconnects.
+    """
+
+    def __init__(self, order_ids: frozenset[str], instruments: frozenset[str], max_queue: int) -> None:
+        self.order_ids = order_ids
+        self.instruments = instruments
+        self.dropped = False
+        self._queue: asyncio.Queue[Optional[dict]] = asyncio.Queue(maxsize=max_queue)
+
+    def put(self, event: dict) -> None:
+        if self.dropped:
+            return
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            ORDER_EVENTS_DROPPED_SUBSCRIBERS.inc()
+            self.close()
+
+    def close(self) -> None:
+        """End the stream of the subscriber once it consumed the events queued so far."""
+        if self.dropped:
+            return
+        self.dropped = True
+        if self._queue.full():
+            # Make room for the end of stream marker, the client misses events anyway.
+            self._queue.get_nowait()
+        self._queue.put_nowait(None)
+
+    async def get(self, timeout: float) -> Optional[dict]:
+        """
+        Wait for the next event.
+
+        Args:
+            timeout (float): Maximum number of seconds to wait.
+
+        Returns:
+            Optional[dict]: The event, or None if none arrived in time.
+
+        Raises:
+            EOFError: If the subscriber was dropped.
+        """
+        try:
+            event = self._queue.get_nowait()
+        except asyncio.QueueEmpty:
+            try:
+                event = await asyncio.wait_for(self._queue.get(), timeout=timeout)
+            except asyncio.TimeoutError:
+                return None
+        if event is None:
+            raise EOFError
+        return event
+
+
+class OrderEventHub:
+    """
+    Fans order events out to the subscribers of this process.
+
+    Events are published by the database: on Postgres the placement and failure triggers send a
+    `NOTIFY` on `ORDER_EVENTS_CHANNEL` whenever an order is placed or given up, by any process,
+    and every worker holds a single connection `LISTEN`ing to it. Subscribers are indexed by order
+    id and instrument, so an event only visits the subscribers it is of interest to. Callbacks,
+    e.g. the invalidation of cached responses, receive every event, including the `orders_created`
+    counts of the creation trigger, which are not streamed to subscribers.
+    """
+
+    def __init__(self, max_subscribers: int, max_queue: int, reconnect_delay: float) -> None:
+        self.max_subscribers = max_subscribers
+        self.max_queue = max_queue
+        self.reconnect_delay = reconnect_delay
+        self._by_order_id: dict[str, set[Subscription]] = {}
+        self._by_instrument: dict[str, set[Subscription]] = {}
+        self._unfiltered: set[Subscription] = set()
+        self._subscriptions: set[Subscription] = set()
+        self._callbacks: list[Callable[[dict], None]] = []
+        self._listener: Optional[asyncio.Task] = None
+        ORDER_STREAM_SUBSCRIBERS.set_function(lambda: len(self._subscriptions))
+
+    @property
+    def full(self) -> bool:
+        return len(self._subscriptions) >= self.max_subscribers
+
+    @property
+    def listening(self) -> bool:
+        return self._listener is not None and not self._listener.done()
+
+    def add_callback(self, callback: Callable[[dict], None]) -> None:
+        """Call `callback` with every event published."""
+        self._callbacks.append(callback)
+
+    def subscribe(self, order_ids: Iterable[str] = (), instruments: Iterable[str] = ()) -> Subscription:
+        """
+        Subscribe to the events of some orders and instruments, or to all events if none are given.
+
+        Args:
+            order_ids (Iterable[str], optional): The order ids of interest. Defaults to ().
+            instruments (Iterable[str], optional): The instruments of interest. Defaults to ().
+
+        Returns:
+            Subscription: The subscription, to be passed to `unsubscribe` once the client is gone.
+        """
+        subscription = Subscription(frozenset(order_ids), frozenset(instruments), self.max_queue)
+        self._subscriptions.add(subscription)
+        if not subscription.order_ids and not subscription.instruments:
+            self._unfiltered.add(subscription)
+        for order_id in subscription.order_ids:
+            self._by_order_id.setdefault(order_id, set()).add(subscription)
+        for instrument in subscription.instruments:
+            self._by_instrument.setdefault(instrument, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Stop delivering events to a subscription."""
+        self._subscriptions.discard(subscription)
+        self._unfiltered.discard(subscription)
+        for index, keys in (
+            (self._by_order_id, subscription.order_ids),
+            (self._by_instrument, subscription.instruments),
+        ):
+            for key in keys:
+                subscribers = index.get(key)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del index[key]
+
+    def publish(self, event: dict) -> None:
+        """
+        Deliver an event to the callbacks and the matching subscribers.
+
+        Args:
+            event (dict): The event, with at least the order `id` and `instrument` unless it is an `orders_created` event.
+        """
+        ORDER_EVENTS_PUBLISHED.inc()
+        for callback in self._callbacks:
+            try:
+                callback(event)
+            except Exception:
+                logger.exception("Order event callback failed")
+        if event["event"] == EVENT_ORDERS_CREATED:
+            return
+        subscribers = set(self._unfiltered)
+        subscribers.update(self._by_order_id.get(event["id"], ()))
+        subscribers.update(self._by_instrument.get(event["instrument"], ()))
+        for subscription in subscribers:
+            subscription.put(event)
+
+    def start(self, client: BaseDBAsyncClient) -> None:
+        """
+        Start listening to the notifications of the database, if it is Postgres.
+
+        Args:
+            client (BaseDBAsyncClient): The database of the order table.
+        """
+        if client.capabilities.dialect != "postgres" or self.listening:
+            return
+        self._listener = asyncio.create_task(self._listen(client), name="order-events-listener")
+
+    async def close(self) -> None:
+        """Stop listening and end the streams of all subscribers."""
+        listener, self._listener = self._listener, None
+        if listener is not None:
+            listener.cancel()
+            await asyncio.gather(listener, return_exceptions=True)
+        for subscription in list(self._subscriptions):
+            subscription.close()
+            self.unsubscribe(subscription)
+
+    def _on_notification(self, connection: asyncpg.Connection, pid: int, channel: str, payload: str) -> None:
+        try:
+            event = orjson.loads(payload)
+        except orjson.JSONDecodeError:
+            logger.warning("Ignored malformed order event %r", payload)
+            return
+        self.publish(event)
+
+    async def _listen(self, client: BaseDBAsyncClient) -> None:
+        while True:
+            try:
+                async with client.acquire_connection() as connection:
+                    lost = asyncio.Event()
+                    connection.add_termination_listener(lambda _: lost.set())
+                    await connection.add_listener(ORDER_EVENTS_CHANNEL, self._on_notification)
+                    try:
+                        await lost.wait()
+                    finally:
+                        if not connection.is_closed():
+                            await connection.remove_listener(ORDER_EVENTS_CHANNEL, self._on_notification)
+                logger.warning("Lost the order events connection, reconnecting")
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Failed to listen to order events, reconnecting")
+            # Events published while reconnecting are missed, clients fall back to polling the order.
+            await asyncio.sleep(self.reconnect_delay)
+
+
+async def sse_stream(
+    hub: OrderEventHub, subscription: Subscription, keepalive: float, max_age: Optional[float] = None
+) -> AsyncIterator[bytes]:
+    """
+    Render the events of a subscription as a server-sent events stream, until the client is gone.
+
+    A comment is sent every `keepalive` seconds without events, so that proxies keep the
+    connection open and a dead client is noticed. The stream ends after `max_age` seconds and
+    the client reconnects: the server waits for the open responses before it shuts down, so a
+    stream that never ends would keep a stopping worker alive, and its hub open, indefinitely.
+
+    Args:
+        hub (OrderEventHub): The hub the subscription belongs to.
+        subscription (Subscription): The subscription.
+        keepalive (float): Maximum number of seconds between two messages.
+        max_age (float, optional): Number of seconds after which the stream ends. Defaults to None, no limit.
+
+    Yields:
+        bytes: The next message.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = None if max_age is None else loop.time() + max_age
+    try:
+        yield b": connected\n\n"
+        while True:
+            timeout = keepalive if deadline is None else min(keepalive, deadline - loop.time())
+            if timeout <= 0:
+                return
+            try:
+                event = await subscription.get(timeout=timeout)
+            except EOFError:
+                return
+            if event is None:
+                if deadline is not None and loop.time() >= deadline:
+                    return
+                yield b": keep-alive\n\n"
+                continue
+            yield b"event: " + event["event"].encode() + b"\ndata: " + orjson.dumps(event) + b"\n\n"
+    finally:
+        hub.unsubscribe(subscription)
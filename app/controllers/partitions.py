@@ -0,0 +1,332 @@
+import logging
+import re
+from datetime import date, datetime, timezone
+from typing import Optional
+from uuid import UUID
+
+from tortoise.backends.base.client import BaseDBAsyncClient
+from tortoise.transactions import in_transaction
+
+from app.metrics import (
+    ORDER_PARTITION_ARCHIVE_BLOCKING_ORDERS,
+    ORDER_PARTITIONS_ARCHIVED,
+    ORDER_PARTITIONS_CREATED,
+)
+
+logger = logging.getLogger(__name__)
+
+ORDER_TABLE = "order"
+ORDER_IDEMPOTENCY_KEY_TABLE = "order_idempotency_key"
+DEFAULT_PARTITION = "order_default"
+# Monthly partitions of the order table are named after their month, e.g. `order_p2026_10`.
+PARTITION_PREFIX = "order_p"
+PARTITION_NAME_PATTERN = re.compile(rf"^{PARTITION_PREFIX}(\d{{4}})_(\d{{2}})$")
+
+IS_PARTITIONED_SQL = "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('public.\"order\"')"
+LIST_PARTITIONS_SQL = """
+    SELECT child.relname AS name
+    FROM pg_inherits
+    JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+    WHERE pg_inherits.inhparent = 'public."order"'::regclass
+"""
+# Archived partitions whose orders still hold idempotency keys, those of an interrupted release.
+LIST_ARCHIVED_PARTITIONS_SQL = f"""
+    SELECT archived.relname AS name
+    FROM pg_class archived
+    JOIN pg_namespace namespace ON namespace.oid = archived.relnamespace
+    WHERE namespace.nspname = $1 AND archived.relkind = 'r' AND archived.relname LIKE '{PARTITION_PREFIX}%'
+        AND obj_description(archived.oid, 'pg_class') IS DISTINCT FROM $2
+    ORDER BY archived.relname
+"""
+# Marks an archived partition once all the idempotency keys of its orders are released.
+KEYS_RELEASED_COMMENT = "idempotency keys released"
+# Archiving, and creating a partition whose orders are in the default partition, waits at most this long for the
+# locks on the order table, rather than queueing every order query behind it while a long query runs; it is
+# retried on the next maintenance run.
+ARCHIVE_LOCK_TIMEOUT = "5s"
+# Number of unplaced orders of a blocked partition named in the warning.
+BLOCKING_ORDERS_LOGGED = 10
+# Sorts before every order id, the start of the key release.
+NIL_UUID = UUID(int=0)
+
+
+def add_months(month: date, months: int) -> date:
+    """
+    Return the first day of the month `months` months after the month of `month`.
+
+    Args:
+        month (date): Any day of the month.
+        months (int): The number of months to add, may be negative.
+
+    Returns:
+        date: The first day of the resulting month.
+    """
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    """Return the name of the order partition holding the orders created in the month of `month`."""
+    return f"{PARTITION_PREFIX}{month.year:04d}_{month.month:02d}"
+
+
+def partition_month(name: str) -> Optional[date]:
+    """
+    Return the month of an order partition.
+
+    Args:
+        name (str): The partition name.
+
+    Returns:
+        Optional[date]: The first day of its month, or None if it is not a monthly partition, e.g. the default one.
+    """
+    match = PARTITION_NAME_PATTERN.match(name)
+    if match is None:
+        return None
+    return date(int(match.group(1)), int(match.group(2)), 1)
+
+
+def partitions_to_create(today: date, months_ahead: int) -> list[date]:
+    """
+    Return the months that need a partition: the current one and the next `months_ahead` ones.
+
+    Args:
+        today (date): The current day.
+        months_ahead (int): The number of months to create in advance.
+
+    Returns:
+        list[date]: The first day of every month, oldest first.
+    """
+    return [add_months(today, months) for months in range(months_ahead + 1)]
+
+
+def partitions_to_archive(partitions: list[str], today: date, retention_months: int) -> list[tuple[str, date]]:
+    """
+    Return the monthly partitions that ended more than `retention_months` months ago.
+
+    Args:
+        partitions (list[str]): The names of the attached partitions.
+        today (date): The current day.
+        retention_months (int): The number of full months kept in the order table.
+
+    Returns:
+        list[tuple[str, date]]: The name and month of every partition to archive, oldest first.
+    """
+    cutoff = add_months(today, -retention_months)
+    months = ((name, partition_month(name)) for name in partitions)
+    return sorted(((name, month) for name, month in months if month and month < cutoff), key=lambda item: item[1])
+
+
+def _month_start(month: date) -> str:
+    return datetime(month.year, month.month, 1, tzinfo=timezone.utc).isoformat()
+
+
+class OrderPartitionMaintainer:
+    """
+    Keeps the monthly partitions of the order table in shape.
+
+    The partitions of the current month and the next `months_ahead` months are created ahead of
+    time, so that new orders never end up in the default partition. Partitions that ended more
+    than `retention_months` months ago are archived once all their orders are placed: they are
+    detached from the order table and moved to the `archive_schema` schema, and optionally to
+    the `archive_tablespace` tablespace on cheaper storage. Archived orders are no longer served
+    by the API, so the indexes scanned by the retry sweep and the order reads only cover the
+    recent months and stay small enough to be cached, however long the service has been trading.
+    Their idempotency keys are released as well, and a release that was interrupted is resumed
+    by the next run. A partition kept from the archive by unplaced
+    orders is reported by the `quiktrade_order_partition_archive_blocking_orders` gauge.
+
+    The maintenance only runs on Postgres, once the order table was partitioned by its migration.
+    """
+
+    def __init__(
+        self,
+        months_ahead: int,
+        retention_months: int,
+        archive_schema: str,
+        archive_tablespace: str = "",
+        key_release_batch_size: int = 10000,
+    ) -> None:
+        self.months_ahead = months_ahead
+        self.retention_months = retention_months
+        self.archive_schema = archive_schema
+        self.archive_tablespace = archive_tablespace
+        self.key_release_batch_size = key_release_batch_size
+
+    async def run(self, client: BaseDBAsyncClient, today: Optional[date] = None) -> None:
+        """
+        Create the upcoming partitions, resume the interrupted key releases and archive the expired partitions.
+
+        Args:
+            client (BaseDBAsyncClient): The database of the order table.
+            today (date, optional): The current day. Defaults to today in UTC.
+        """
+        if client.capabilities.dialect != "postgres":
+            return
+        _, rows = await client.execute_query(IS_PARTITIONED_SQL)
+        if not rows:
+            return
+        today = today or datetime.now(timezone.utc).date()
+        for month in partitions_to_create(today, self.months_ahead):
+            await self.create_partition(client, month)
+        _, rows = await client.execute_query(
+            LIST_ARCHIVED_PARTITIONS_SQL, [self.archive_schema, KEYS_RELEASED_COMMENT]
+        )
+        for row in rows:
+            released = await self.release_idempotency_keys(client, row["name"])
+            logger.info("Released %d remaining idempotency keys of order partition %s", released, row["name"])
+        _, rows = await client.execute_query(LIST_PARTITIONS_SQL)
+        ORDER_PARTITION_ARCHIVE_BLOCKING_ORDERS.set(0)
+        for name, month in partitions_to_archive([row["name"] for row in rows], today, self.retention_months):
+            if not await self.archive_partition(client, name, month):
+                # Older partitions are archived first, a newer one waits until this one can go.
+                break
+
+    async def create_partition(self, client: BaseDBAsyncClient, month: date) -> None:
+        """
+        Create the partition of a month if it does not exist yet.
+
+        Postgres refuses to create a partition while the default partition holds rows of its range,
+        e.g. orders created while the maintenance was not running. Those orders are then moved into
+        the new partition: it is created as a plain table, filled with the orders deleted from the
+        default partition and attached, all in one transaction holding the order table and the
+        default partition locked. As a plain table it does not carry the triggers of the order table
+        yet, so the moved orders neither claim their idempotency keys again nor notify the workers.
+
+        Args:
+            client (BaseDBAsyncClient): The database of the order table.
+            month (date): The first day of the month.
+        """
+        name = partition_name(month)
+        _, rows = await client.execute_query("SELECT to_regclass($1) IS NOT NULL AS exists", [f'public."{name}"'])
+        if rows[0]["exists"]:
+            return
+        start, end = _month_start(month), _month_start(add_months(month, 1))
+        bounds = f"FOR VALUES FROM ('{start}') TO ('{end}')"
+        in_range = f"\"created_at\" >= '{start}' AND \"created_at\" < '{end}'"
+        _, rows = await client.execute_query(
+            f'SELECT EXISTS (SELECT 1 FROM "{DEFAULT_PARTITION}" WHERE {in_range}) AS "misplaced"'
+        )
+        if not rows[0]["misplaced"]:
+            await client.execute_script(f'CREATE TABLE "{name}" PARTITION OF "{ORDER_TABLE}" {bounds}')
+            ORDER_PARTITIONS_CREATED.inc()
+            logger.info("Created order partition %s", name)
+            return
+        async with in_transaction(client.connection_name) as connection:
+            await connection.execute_script(f"SET LOCAL lock_timeout = '{ARCHIVE_LOCK_TIMEOUT}'")
+            await connection.execute_script(
+                f'LOCK TABLE ONLY "{ORDER_TABLE}", "{DEFAULT_PARTITION}" IN ACCESS EXCLUSIVE MODE'
+            )
+            await connection.execute_script(
+                f'CREATE TABLE "{name}" (LIKE "{ORDER_TABLE}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'
+            )
+            _, rows = await connection.execute_query(
+                f"""
+                WITH "moved" AS (
+                    DELETE FROM "{DEFAULT_PARTITION}" WHERE {in_range} RETURNING *
+                ), "inserted" AS (
+                    INSERT INTO "{name}" SELECT * FROM "moved" RETURNING 1
+                )
+                SELECT COUNT(*) AS "moved" FROM "inserted"
+                """
+            )
+            await connection.execute_script(f'ALTER TABLE "{ORDER_TABLE}" ATTACH PARTITION "{name}" {bounds}')
+        ORDER_PARTITIONS_CREATED.inc()
+        logger.warning(
+            "Created order partition %s and moved %d of its orders out of %s",
+            name,
+            rows[0]["moved"],
+            DEFAULT_PARTITION,
+        )
+
+    async def archive_partition(self, client: BaseDBAsyncClient, name: str, month: date) -> bool:
+        """
+        Archive a partition, unless some of its orders have not been placed yet. Orders given up for good do not count.
+
+        The order table and the partition are locked before the unplaced orders are counted, in
+        the order `DETACH PARTITION` locks them, so no order of the partition can be claimed or
+        placed between the check and the detach. The detach and the move to the archive schema
+        are committed on their own; the move to the archive tablespace and the release of the
+        idempotency keys, in batches, come after.
+
+        Args:
+            client (BaseDBAsyncClient): The database of the order table.
+            name (str): The partition name.
+            month (date): The first day of its month.
+
+        Returns:
+            bool: True if the partition was archived.
+        """
+        async with in_transaction(client.connection_name) as connection:
+            await connection.execute_script(f"SET LOCAL lock_timeout = '{ARCHIVE_LOCK_TIMEOUT}'")
+            await connection.execute_script(f'LOCK TABLE ONLY "{ORDER_TABLE}", "{name}" IN ACCESS EXCLUSIVE MODE')
+            _, rows = await connection.execute_query(
+                f'SELECT "id", COUNT(*) OVER () AS "unplaced" FROM "{name}" '
+                f'WHERE "order_placed_at" IS NULL AND "failed_at" IS NULL ORDER BY "created_at" LIMIT {BLOCKING_ORDERS_LOGGED}'
+            )
+            if rows:
+                ORDER_PARTITION_ARCHIVE_BLOCKING_ORDERS.set(rows[0]["unplaced"])
+                logger.warning(
+                    "Order partition %s is not archived, %d of its orders are unplaced, e.g. %s",
+                    name,
+                    rows[0]["unplaced"],
+                    ", ".join(str(row["id"]) for row in rows),
+                )
+                return False
+            await connection.execute_script(f'ALTER TABLE "{ORDER_TABLE}" DETACH PARTITION "{name}"')
+            await connection.execute_script(f'ALTER TABLE "{name}" SET SCHEMA "{self.archive_schema}"')
+        if self.archive_tablespace:
+            # Copies the partition, so it runs once the order table is unlocked.
+            await client.execute_script(
+                f'ALTER TABLE "{self.archive_schema}"."{name}" SET TABLESPACE "{self.archive_tablespace}"'
+            )
+        ORDER_PARTITIONS_ARCHIVED.inc()
+        logger.info("Archived order partition %s to %s", name, self.archive_schema)
+        released = await self.release_idempotency_keys(client, name)
+        logger.info("Released %d idempotency keys of order partition %s", released, name)
+        return True
+
+    async def release_idempotency_keys(self, client: BaseDBAsyncClient, name: str) -> int:
+        """
+        Release the idempotency keys of the orders of an archived partition.
+
+        The keys are deleted `key_release_batch_size` orders at a time, in `id` order, each batch
+        in its own transaction, so the key table is never locked for long. Only the keys still
+        held by the archived orders are deleted. Once all are released, the partition is marked
+        with `KEYS_RELEASED_COMMENT`. If the release is interrupted, the remaining keys stay
+        reserved until the next `run` finds the partition unmarked and resumes the release.
+
+        Args:
+            client (BaseDBAsyncClient): The database of the order table.
+            name (str): The name of the archived partition.
+
+        Returns:
+            int: The number of released keys.
+        """
+        released, last_id = 0, NIL_UUID
+        while True:
+            _, rows = await client.execute_query(
+                f"""
+                WITH "batch" AS (
+                    SELECT "id", "idempotency_key" FROM "{self.archive_schema}"."{name}"
+                    WHERE "id" > $1
+                    ORDER BY "id"
+                    LIMIT {self.key_release_batch_size}
+                ), "released" AS (
+                    DELETE FROM "{ORDER_IDEMPOTENCY_KEY_TABLE}" AS "k" USING "batch"
+                    WHERE "k"."key" = "batch"."idempotency_key" AND "k"."order_id" = "batch"."id"
+                    RETURNING 1
+                )
+                SELECT
+                    (SELECT "id" FROM "batch" ORDER BY "id" DESC LIMIT 1) AS "last_id",
+                    (SELECT COUNT(*) FROM "released") AS "released"
+                """,
+                [last_id],
+            )
+            if rows[0]["last_id"] is None:
+                await client.execute_script(
+                    f'COMMENT ON TABLE "{self.archive_schema}"."{name}" IS \'{KEYS_RELEASED_COMMENT}\''
+                )
+                return released
+            released += rows[0]["released"]
+            last_id = rows[0]["last_id"]
@@ -0,0 +1,199 @@
+import asyncio
+import logging
+import random
+import zlib
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Optional
+
+from tortoise.backends.base.client import BaseDBAsyncClient
+
+from app.metrics import SCHEDULED_JOB_RUNS, SCHEDULED_JOB_SECONDS
+
+logger = logging.getLogger(__name__)
+
+JOB_OUTCOME_SUCCESS = "success"
+JOB_OUTCOME_ERROR = "error"
+JOB_OUTCOME_SKIPPED = "skipped"
+
+# Namespaces the advisory lock keys of the jobs, so they do not collide with other users of advisory locks.
+ADVISORY_LOCK_NAMESPACE = "quiktrade.job."
+
+
+def advisory_lock_key(name: str) -> int:
+    """
+    Return the Postgres advisory lock key of a job, which is the same in every process.
+
+    Args:
+        name (str): The job name.
+
+    Returns:
+        int: The lock key.
+    """
+    return zlib.crc32(f"{ADVISORY_LOCK_NAMESPACE}{name}".encode())
+
+
+@asynccontextmanager
+async def advisory_lock(name: str, client: BaseDBAsyncClient) -> AsyncIterator[bool]:
+    """
+    Try to take the cluster-wide lock of a job for the duration of the context.
+
+    The lock is a session level `pg_try_advisory_lock`, held by a connection checked out of the
+    pool for the whole context and released on exit. It is also released by Postgres if the
+    process dies, so a crashed leader never blocks the job. Other databases have no advisory
+    locks and only run a single instance, so the lock is always granted there.
+
+    Args:
+        name (str): The job name.
+        client (BaseDBAsyncClient): The database the lock is taken on.
+
+    Yields:
+        bool: True if the lock was taken, False if another instance holds it.
+    """
+    if client.capabilities.dialect != "postgres":
+        yield True
+        return
+
+    key = advisory_lock_key(name)
+    async with client.acquire_connection() as connection:
+        locked = await connection.fetchval("SELECT pg_try_advisory_lock($1)", key)
+        try:
+            yield locked
+        finally:
+            if locked:
+                await connection.execute("SELECT pg_advisory_unlock($1)", key)
+
+
+class PeriodicJob:
+    """A coroutine function run every `interval` seconds, delayed by a random jitter of up to `jitter` seconds."""
+
+    def __init__(
+        self, name: str, func: Callable[[], Awaitable], interval: float, jitter: float, exclusive: bool
+    ) -> None:
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.jitter = jitter
+        self.exclusive = exclusive
+
+    def next_delay(self) -> float:
+        """Return the number of seconds until the next run."""
+        return self.interval + random.uniform(0, self.jitter)
+
+
+class PeriodicScheduler:
+    """
+    Runs registered jobs periodically in the background of the process.
+
+    Every job runs in its own task, so a slow job does not delay the others, and a run is only
+    started once the previous run of the same job finished. Exclusive jobs are additionally run
+    under their advisory lock: every API worker and replica schedules them, but only the one
+    that takes the lock runs them and the others skip that run. The jitter spreads the attempts
+    of the instances, so that they do not all contend for the lock at the same moment.
+    """
+
+    def __init__(self, connection: Callable[[], BaseDBAsyncClient]) -> None:
+        """
+        Initialize a PeriodicScheduler instance.
+
+        Args:
+            connection (Callable[[], BaseDBAsyncClient]): Returns the database the advisory locks are taken on,
+                called on every run, as the connections only exist once Tortoise is initialised.
+        """
+        self._connection = connection
+        self._jobs: dict[str, PeriodicJob] = {}
+        self._tasks: list[asyncio.Task] = []
+        self._stop = asyncio.Event()
+
+    def register(
+        self,
+        name: str,
+        func: Callable[[], Awaitable],
+        interval: float,
+        jitter: float = 0.0,
+        exclusive: bool = True,
+    ) -> None:
+        """
+        Register a job, before the scheduler is started.
+
+        Args:
+            name (str): The unique job name, which also identifies its advisory lock.
+            func (Callable[[], Awaitable]): The coroutine function run by the job.
+            interval (float): The number of seconds between two runs.
+            jitter (float, optional): Maximum random delay added to the interval. Defaults to 0.
+            exclusive (bool, optional): Run only one instance of the job cluster-wide. Defaults to True.
+
+        Raises:
+            ValueError: If a job with the same name is already registered.
+        """
+        if name in self._jobs:
+            raise ValueError(f"Job `{name}` is already registered")
+        self._jobs[name] = PeriodicJob(name, func, interval, jitter, exclusive)
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def start(self) -> None:
+        """Start running the registered jobs, the first run of each one is after its first interval."""
+        if self._tasks:
+            return
+        self._stop = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._loop(job), name=f"job-{job.name}") for job in self._jobs.values()]
+
+    async def close(self, timeout: Optional[float] = None) -> None:
+        """
+        Stop the scheduler, letting the runs in progress finish.
+
+        Args:
+            timeout (float, optional): Seconds to wait for the runs in progress, after which they are
+                cancelled. Defaults to None, waiting until they finish.
+        """
+        tasks, self._tasks = self._tasks, []
+        if not tasks:
+            return
+        self._stop.set()
+        _, pending = await asyncio.wait(tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    async def run_job(self, name: str) -> str:
+        """
+        Run a registered job once, under its lock if it is exclusive.
+
+        Args:
+            name (str): The job name.
+
+        Returns:
+            str: The outcome of the run: "success", "error" or "skipped" if another instance held the lock.
+        """
+        job = self._jobs[name]
+        if not job.exclusive:
+            outcome = await self._execute(job)
+        else:
+            async with advisory_lock(job.name, self._connection()) as locked:
+                outcome = await self._execute(job) if locked else JOB_OUTCOME_SKIPPED
+        SCHEDULED_JOB_RUNS.labels(job.name, outcome).inc()
+        return outcome
+
+    async def _execute(self, job: PeriodicJob) -> str:
+        with SCHEDULED_JOB_SECONDS.labels(job.name).time():
+            try:
+                await job.func()
+            except Exception:
+                logger.exception("Scheduled job `%s` failed", job.name)
+                return JOB_OUTCOME_ERROR
+        return JOB_OUTCOME_SUCCESS
+
+    async def _loop(self, job: PeriodicJob) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=job.next_delay())
+                return
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await self.run_job(job.name)
+            except Exception:
+                # E.g. no connection could be checked out for the lock, the next run tries again.
+                logger.exception("Failed to schedule job `%s`", job.name)
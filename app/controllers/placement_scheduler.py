@@ -0,0 +1,118 @@
+import asyncio
+import zlib
+from collections import deque
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Optional
+
+from app.controllers.exchange_adapters import ExchangeAdapter
+from app.metrics import PLACEMENT_SHARD_LAG_SECONDS, PLACEMENT_SHARD_QUEUE_DEPTH
+from app.models.order import Order
+
+
+def _age(order: Order) -> float:
+    """Return the number of seconds since the order was created."""
+    now = datetime.now(timezone.utc) if order.created_at.tzinfo else datetime.utcnow()
+    return max((now - order.created_at).total_seconds(), 0.0)
+
+
+class PlacementScheduler:
+    """
+    Places orders in parallel across instruments but in order within an instrument.
+
+    The orders passed to `run` are split into `shard_count` shards by a hash of their instrument.
+    Each shard is worked off by its own worker, one exchange call after the other and in the order
+    the orders were given, so two orders of the same instrument never reach the exchange out of
+    order, while the shards run concurrently. Consecutive orders of a shard routed to a venue that
+    accepts batches are sent together, up to the venue's `max_batch_size`. A batch holds at most one
+    order per instrument, as the venue does not have to execute the orders of a batch in order.
+
+    Once an order fails, the later orders of its instrument in the same run are not sent but
+    deferred behind it, unless it was given up for good, e.g. rejected by the venue. The outcome of successful placements is recorded in the background, so
+    that the next exchange call of the shard does not wait for the database.
+
+    The collaborators are injected: `route` returns the venue of an order, `attempt` makes the
+    exchange call for a list of orders of one venue and returns the error of each (None if placed),
+    `record` stores the outcome of an order and `defer` reschedules an order behind another one.
+    """
+
+    def __init__(
+        self,
+        shard_count: int,
+        route: Callable[[Order], ExchangeAdapter],
+        attempt: Callable[[ExchangeAdapter, list[Order]], Awaitable[list[Optional[Exception]]]],
+        record: Callable[[Order, Optional[Exception]], Awaitable[bool]],
+        defer: Callable[[Order, Order], Awaitable[None]],
+    ) -> None:
+        self.shard_count = shard_count
+        self._route = route
+        self._attempt = attempt
+        self._record = record
+        self._defer = defer
+        for shard in range(shard_count):
+            PLACEMENT_SHARD_QUEUE_DEPTH.labels(shard).set(0)
+            PLACEMENT_SHARD_LAG_SECONDS.labels(shard).set(0)
+
+    def shard_of(self, instrument: str) -> int:
+        """
+        Return the shard of an instrument, which is the same in every process.
+
+        Args:
+            instrument (str): The instrument.
+
+        Returns:
+            int: The shard number, from 0 to `shard_count - 1`.
+        """
+        return zlib.crc32(instrument.encode()) % self.shard_count
+
+    async def run(self, orders: list[Order]) -> None:
+        """
+        Place orders, each shard on its own worker, and wait until all outcomes are recorded.
+
+        Args:
+            orders (list[Order]): The orders, oldest first.
+        """
+        shards: dict[int, deque[Order]] = {}
+        for order in orders:
+            shards.setdefault(self.shard_of(order.instrument), deque()).append(order)
+        await asyncio.gather(*(self._work(shard, queue) for shard, queue in shards.items()))
+
+    async def _work(self, shard: int, queue: deque[Order]) -> None:
+        depth = PLACEMENT_SHARD_QUEUE_DEPTH.labels(shard)
+        lag = PLACEMENT_SHARD_LAG_SECONDS.labels(shard)
+        failed: dict[str, Order] = {}
+        recording: list[asyncio.Task] = []
+        try:
+            while queue:
+                depth.set(len(queue))
+                lag.set(_age(queue[0]))
+                order = queue.popleft()
+                if order.instrument in failed:
+                    await self._defer(order, failed[order.instrument])
+                    continue
+
+                adapter = self._route(order)
+                batch = [order]
+                instruments = {order.instrument}
+                while (
+                    queue
+                    and len(batch) < adapter.max_batch_size
+                    and queue[0].instrument not in failed
+                    and queue[0].instrument not in instruments
+                    and self._route(queue[0]) is adapter
+                ):
+                    instruments.add(queue[0].instrument)
+                    batch.append(queue.popleft())
+
+                errors = await self._attempt(adapter, batch)
+                for placed_order, error in zip(batch, errors):
+                    if error is None:
+                        recording.append(asyncio.ensure_future(self._record(placed_order, None)))
+                    else:
+                        await self._record(placed_order, error)
+                        if placed_order.failed_at is None:
+                            failed.setdefault(placed_order.instrument, placed_order)
+        finally:
+            depth.set(0)
+            lag.set(0)
+            if recording:
+                await asyncio.gather(*recording)
@@ -0,0 +1,57 @@
+import time
+from typing import Any, Optional
+
+import asyncpg
+from tortoise import connections
+from tortoise.backends.asyncpg import AsyncpgDBClient
+from tortoise.backends.base.client import BaseDBAsyncClient
+from tortoise.exceptions import ConfigurationError
+
+from app.metrics import DB_POOL_ACQUIRE_SECONDS
+from app.settings import READ_CONNECTION
+
+
+def read_connection() -> Optional[BaseDBAsyncClient]:
+    """
+    Return the connection to the read replica.
+
+    Read-only queries that can tolerate replication lag pass it to `using_db`, all other
+    queries keep using the model's default connection to the primary.
+
+    Returns:
+        Optional[BaseDBAsyncClient]: The replica connection, or None if no replica is configured,
+            in which case `using_db` falls back to the default connection.
+    """
+    try:
+        return connections.get(READ_CONNECTION)
+    except ConfigurationError:
+        return None
+
+
+class TimedPool:
+    """Proxy of an asyncpg pool that records how long every connection checkout waits."""
+
+    def __init__(self, pool: asyncpg.Pool, connection_name: str) -> None:
+        self._pool = pool
+        self._acquire_seconds = DB_POOL_ACQUIRE_SECONDS.labels(connection_name)
+
+    async def acquire(self, *, timeout: Optional[float] = None) -> asyncpg.Connection:
+        started = time.perf_counter()
+        try:
+            return await self._pool.acquire(timeout=timeout)
+        finally:
+            self._acquire_seconds.observe(time.perf_counter() - started)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._pool, name)
+
+
+class InstrumentedAsyncpgDBClient(AsyncpgDBClient):
+    """Tortoise asyncpg client whose pool reports its checkout wait time."""
+
+    async def create_pool(self, **kwargs) -> TimedPool:
+        return TimedPool(await super().create_pool(**kwargs), self.connection_name)
+
+
+# Makes this module usable as Tortoise engine, see `DB_CONFIG`.
+client_class = InstrumentedAsyncpgDBClient
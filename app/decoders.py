@@ -0,0 +1,108 @@
+from typing import Annotated, Any, Optional
+
+import orjson
+from fastapi.exceptions import RequestValidationError
+from pydantic import Field, TypeAdapter, ValidationError
+
+from app.models.order import BaseOrderModel, CreateOrderModel, CreateOrderPayload
+from app.settings import settings
+
+
+def _batch_adapter(item_type: Any) -> TypeAdapter:
+    return TypeAdapter(Annotated[list[item_type], Field(min_length=1, max_length=settings.ORDER_BATCH_MAX_SIZE)])
+
+
+order_adapter = TypeAdapter(CreateOrderPayload)
+order_batch_adapter = _batch_adapter(CreateOrderPayload)
+_legacy_order_adapter = TypeAdapter(CreateOrderModel)
+_legacy_order_batch_adapter = _batch_adapter(CreateOrderModel)
+
+
+def _adapters() -> tuple[TypeAdapter, TypeAdapter]:
+    if settings.ORDER_FAST_DECODING:
+        return order_adapter, order_batch_adapter
+    return _legacy_order_adapter, _legacy_order_batch_adapter
+
+
+def decode_order(body: bytes) -> BaseOrderModel:
+    """
+    Decode and validate the raw body of a `POST /orders` request.
+
+    With `settings.ORDER_FAST_DECODING`, the JSON is parsed and validated against `CreateOrderPayload`
+    in a single pass by pydantic-core, without building an intermediate dict or running Python validators.
+
+    Args:
+        body (bytes): The raw request body.
+
+    Returns:
+        BaseOrderModel: The validated order.
+
+    Raises:
+        RequestValidationError: If the body is not valid JSON or not a valid order.
+    """
+    adapter, _ = _adapters()
+    try:
+        return adapter.validate_json(body)
+    except ValidationError as exc:
+        raise RequestValidationError(exc.errors())
+
+
+def decode_order_batch(body: bytes) -> list[Optional[BaseOrderModel]]:
+    """
+    Decode and validate the raw body of a `POST /orders/batch` request.
+
+    The whole basket is decoded in one pass. Only if some items are invalid, the body is parsed
+    again and the other items are validated one by one, so that they can still be created.
+
+    Args:
+        body (bytes): The raw request body.
+
+    Returns:
+        list[Optional[BaseOrderModel]]: The validated order for each item, or None if the item is invalid.
+
+    Raises:
+        RequestValidationError: If the body is not valid JSON, not a list, or has too few or too many items.
+    """
+    adapter, batch_adapter = _adapters()
+    try:
+        return batch_adapter.validate_json(body)
+    except ValidationError as exc:
+        errors = exc.errors()
+
+    invalid_items = set()
+    for error in errors:
+        if not error["loc"] or not isinstance(error["loc"][0], int):
+            raise RequestValidationError(errors)
+        invalid_items.add(error["loc"][0])
+    return [
+        None if index in invalid_items else adapter.validate_python(item)
+        for index, item in enumerate(orjson.loads(body))
+    ]
+
+
+def _inline_definitions(schema: Any, definitions: dict) -> Any:
+    if isinstance(schema, dict):
+        if "$ref" in schema:
+            return _inline_definitions(definitions[schema["$ref"].rsplit("/", 1)[-1]], definitions)
+        if "propertyName" in schema:
+            # A discriminator, its mapping would point to the definitions that are inlined.
+            return {"propertyName": schema["propertyName"]}
+        return {key: _inline_definitions(value, definitions) for key, value in schema.items()}
+    if isinstance(schema, list):
+        return [_inline_definitions(value, definitions) for value in schema]
+    return schema
+
+
+def request_body_schema(adapter: TypeAdapter) -> dict:
+    """
+    Build the OpenAPI `requestBody` of an endpoint that decodes its body with `adapter`.
+
+    Args:
+        adapter (TypeAdapter): The adapter validating the body.
+
+    Returns:
+        dict: The `requestBody` object, for the `openapi_extra` of the route.
+    """
+    schema = adapter.json_schema()
+    schema = _inline_definitions(schema, schema.pop("$defs", {}))
+    return {"requestBody": {"required": True, "content": {"application/json": {"schema": schema}}}}
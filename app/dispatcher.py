@@ -0,0 +1,75 @@
+"""
+Placement dispatcher.
+
+Drains the orders that have been stored but not placed on the stock exchange yet.
+It runs as its own process, separately from the API workers, so it can be scaled on its own:
+
+    python -m app.dispatcher
+"""
+
+import asyncio
+import logging
+import signal
+
+from prometheus_client import start_http_server
+from tortoise import Tortoise
+
+from app.controllers.exchange_executor import exchange_executor
+from app.controllers.order import OrderController, exchange_registry, order_ack_writer
+from app.settings import DB_CONFIG, settings
+
+logger = logging.getLogger(__name__)
+
+
+async def dispatch(stop: asyncio.Event) -> None:
+    """
+    Place pending orders batch by batch until `stop` is set.
+
+    A new batch is claimed as soon as the previous one was processed. If no order was due, the
+    dispatcher waits `settings.DISPATCHER_POLL_INTERVAL` seconds before polling again. Several
+    dispatchers can run side by side, as each of them only places the orders it claimed.
+
+    Args:
+        stop (asyncio.Event): Event that ends the loop once set.
+    """
+    while not stop.is_set():
+        try:
+            claimed = await OrderController.place_failed_orders()
+        except Exception:
+            logger.exception("Failed to dispatch pending orders")
+            claimed = 0
+        if claimed:
+            continue
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=settings.DISPATCHER_POLL_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def main() -> None:
+    """
+    Connect to the database and run the dispatcher until SIGINT or SIGTERM is received.
+
+    The metrics of the dispatcher, e.g. the lag of every placement shard, are served on
+    `settings.DISPATCHER_METRICS_PORT`.
+    """
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    if settings.DISPATCHER_METRICS_PORT:
+        start_http_server(settings.DISPATCHER_METRICS_PORT)
+    await Tortoise.init(config=DB_CONFIG)
+    try:
+        await dispatch(stop)
+    finally:
+        await order_ack_writer.close()
+        await exchange_registry.close()
+        exchange_executor.shutdown()
+        await Tortoise.close_connections()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
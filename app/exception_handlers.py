@@ -108,6 +108,7 @@ EXCEPTION_HANDLERS_DICT = {
     RequestValidationError: request_validation_exception_handler,
     403: generic_http_exception_handler,
     404: generic_http_exception_handler,
+    429: generic_http_exception_handler,
     500: generic_http_500_exception_handler,
     503: generic_http_exception_handler,
     550: generic_http_exception_handler,
@@ -0,0 +1,274 @@
+"""
+Bulk order import.
+
+Loads orders from an NDJSON file (one order per line, as posted to `POST /orders`) or a CSV file
+(with a `type,side,instrument,limit_price,quantity` header) straight into the order table, for
+backfills and replays that are too large to go through the API:
+
+    quicktrade-import orders.ndjson
+    python -m app.importer orders.csv --enqueue
+
+Imported orders are recorded as placed at the time of the import, unless `--enqueue` is given,
+in which case they are left pending and the dispatcher places them like any other order.
+"""
+
+import argparse
+import asyncio
+import csv
+import logging
+import time
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import Any, Callable, Iterator, Optional
+from uuid import uuid4
+
+from pydantic import TypeAdapter, ValidationError
+from tortoise import Tortoise
+from tortoise.backends.base.client import BaseDBAsyncClient
+
+from app.decoders import order_adapter
+from app.models.order import BaseOrderModel, CreateOrderPayload, Order
+from app.settings import DB_CONFIG, settings
+
+logger = logging.getLogger(__name__)
+
+FORMAT_NDJSON = "ndjson"
+FORMAT_CSV = "csv"
+
+# The columns written for every imported order, in the order of the copied records.
+IMPORT_COLUMNS = (
+    "id",
+    "type",
+    "side",
+    "instrument",
+    "limit_price",
+    "quantity",
+    "created_at",
+    "updated_at",
+    "order_placed_at",
+    "attempts",
+)
+
+_order_list_adapter = TypeAdapter(list[CreateOrderPayload])
+
+# The valid orders of a chunk, and the line number and error of each invalid one.
+Chunk = tuple[list[BaseOrderModel], list[tuple[int, str]]]
+
+
+def _error_message(exc: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(map(str, error['loc'])) or 'order'}: {error['msg']}" for error in exc.errors())
+
+
+def _validate_chunk(
+    items: list[tuple[int, Any]], validate_all: Callable[[list], list], validate_one: Callable[[Any], BaseOrderModel]
+) -> Chunk:
+    """
+    Validate the items of a chunk in one pass, or one by one if some of them are invalid.
+
+    Args:
+        items (list[tuple[int, Any]]): The line number and the raw order of every item.
+        validate_all (Callable[[list], list]): Validates the raw orders of all items at once.
+        validate_one (Callable[[Any], BaseOrderModel]): Validates a single raw order.
+
+    Returns:
+        Chunk: The valid orders and the invalid items.
+    """
+    try:
+        return validate_all([item for _, item in items]), []
+    except ValidationError:
+        pass
+    orders, errors = [], []
+    for line, item in items:
+        try:
+            orders.append(validate_one(item))
+        except ValidationError as exc:
+            errors.append((line, _error_message(exc)))
+    return orders, errors
+
+
+def read_chunks(path: str, file_format: str, chunk_size: int) -> Iterator[Chunk]:
+    """
+    Read and validate an order file chunk by chunk, so that memory use does not grow with the file size.
+
+    Orders are validated against `CreateOrderPayload`, the rules of `POST /orders`. NDJSON chunks are
+    decoded by pydantic-core in a single pass; empty CSV fields, e.g. the `limit_price` of a market
+    order, are treated as missing.
+
+    Args:
+        path (str): The file.
+        file_format (str): `ndjson` or `csv`.
+        chunk_size (int): The number of orders per chunk.
+
+    Yields:
+        Chunk: The valid orders and the invalid lines of each chunk.
+    """
+    if file_format == FORMAT_NDJSON:
+        with open(path, "rb") as f:
+            items = ((line, raw) for line, raw in enumerate(f, start=1) if raw.strip())
+            while chunk := list(islice(items, chunk_size)):
+                yield _validate_chunk(
+                    chunk,
+                    lambda raws: _order_list_adapter.validate_json(b"[" + b",".join(raws) + b"]"),
+                    order_adapter.validate_json,
+                )
+        return
+    with open(path, newline="") as f:
+        reader = csv.DictReader(f)
+        items = (
+            (reader.line_num, {key: value for key, value in row.items() if key is not None and value != ""})
+            for row in reader
+        )
+        while chunk := list(islice(items, chunk_size)):
+            yield _validate_chunk(chunk, _order_list_adapter.validate_python, order_adapter.validate_python)
+
+
+async def copy_orders(
+    client: BaseDBAsyncClient, orders: list[BaseOrderModel], enqueue: bool, created_at: datetime
+) -> int:
+    """
+    Insert validated orders with the Postgres COPY protocol.
+
+    The orders get strictly increasing creation times, `created_at` plus their index in
+    microseconds, so that they keep the order of the file like orders posted one by one: the
+    dispatcher places an instrument's orders by `created_at`, and the order list pages by it.
+    On other databases, e.g. SQLite in the tests, they are inserted with a single bulk insert instead.
+
+    Args:
+        client (BaseDBAsyncClient): The database to import into.
+        orders (list[BaseOrderModel]): The orders.
+        enqueue (bool): Leave the orders pending for placement rather than recording them as placed.
+        created_at (datetime): The creation time of the first order.
+
+    Returns:
+        int: The number of inserted orders.
+    """
+    created = [created_at + timedelta(microseconds=index) for index in range(len(orders))]
+    if client.capabilities.dialect != "postgres":
+        await Order.bulk_create(
+            [
+                Order(**order.model_dump(), created_at=at, order_placed_at=None if enqueue else at)
+                for order, at in zip(orders, created)
+            ],
+            using_db=client,
+        )
+        return len(orders)
+    to_db_value = Order._meta.fields_map["created_at"].to_db_value
+    records = []
+    for order, at in zip(orders, created):
+        db_at = to_db_value(at, Order)
+        records.append(
+            (
+                uuid4(),
+                order.type,
+                order.side,
+                order.instrument,
+                order.limit_price,
+                order.quantity,
+                db_at,
+                db_at,
+                None if enqueue else db_at,
+                0,
+            )
+        )
+    async with client.acquire_connection() as connection:
+        await connection.copy_records_to_table(Order._meta.db_table, records=records, columns=IMPORT_COLUMNS)
+    return len(records)
+
+
+async def import_orders(
+    client: BaseDBAsyncClient, path: str, file_format: str, enqueue: bool, chunk_size: int
+) -> tuple[int, int]:
+    """
+    Import an order file, chunk by chunk.
+
+    A chunk is read and validated in a worker thread while the previous one is copied, so at most
+    two chunks are held in memory. Every chunk is committed on its own: if the import fails, the
+    chunks copied so far stay imported. Invalid lines are logged and skipped.
+
+    Args:
+        client (BaseDBAsyncClient): The database to import into.
+        path (str): The file.
+        file_format (str): `ndjson` or `csv`.
+        enqueue (bool): Leave the orders pending for placement rather than recording them as placed.
+        chunk_size (int): The number of orders per chunk.
+
+    Returns:
+        tuple[int, int]: The number of imported orders and the number of invalid lines.
+    """
+    chunks = read_chunks(path, file_format, chunk_size)
+    copying: Optional[asyncio.Task] = None
+    imported = rejected = 0
+    # The creation time of the next order, kept ahead of the orders already copied.
+    created_at = datetime.min
+    try:
+        while True:
+            chunk = await asyncio.to_thread(next, chunks, None)
+            if copying is not None:
+                imported += await copying
+                copying = None
+            if chunk is None:
+                return imported, rejected
+            orders, errors = chunk
+            for line, error in errors:
+                logger.warning("Skipped invalid order on line %d: %s", line, error)
+            rejected += len(errors)
+            if orders:
+                created_at = max(datetime.utcnow(), created_at)
+                copying = asyncio.create_task(copy_orders(client, orders, enqueue, created_at))
+                created_at += timedelta(microseconds=len(orders))
+    finally:
+        if copying is not None:
+            copying.cancel()
+        chunks.close()
+
+
+async def run(path: str, file_format: str, enqueue: bool, chunk_size: int) -> int:
+    """
+    Connect to the database and import an order file.
+
+    Returns:
+        int: The exit status, 1 if some lines were invalid.
+    """
+    await Tortoise.init(config=DB_CONFIG)
+    started = time.perf_counter()
+    try:
+        imported, rejected = await import_orders(Order._meta.db, path, file_format, enqueue, chunk_size)
+    finally:
+        await Tortoise.close_connections()
+    elapsed = time.perf_counter() - started
+    logger.info(
+        "Imported %d orders in %.1f s (%.0f orders/s), skipped %d invalid lines",
+        imported,
+        elapsed,
+        imported / elapsed if elapsed else 0,
+        rejected,
+    )
+    return 1 if rejected else 0
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """Entry point of the `quicktrade-import` command."""
+    parser = argparse.ArgumentParser(prog="quicktrade-import", description="Bulk import orders from a file.")
+    parser.add_argument("path", help="NDJSON or CSV file of orders.")
+    parser.add_argument(
+        "--format",
+        choices=(FORMAT_NDJSON, FORMAT_CSV),
+        help="Format of the file. Defaults to csv for .csv files and to ndjson otherwise.",
+    )
+    parser.add_argument(
+        "--enqueue",
+        action="store_true",
+        help="Leave the orders pending, so that the dispatcher places them. By default they are recorded as placed.",
+    )
+    parser.add_argument(
+        "--chunk-size", type=int, default=settings.IMPORT_CHUNK_SIZE, help="Number of orders copied at a time."
+    )
+    args = parser.parse_args(argv)
+    file_format = args.format or (FORMAT_CSV if args.path.lower().endswith(".csv") else FORMAT_NDJSON)
+
+    logging.basicConfig(level=logging.INFO)
+    return asyncio.run(run(args.path, file_format, args.enqueue, args.chunk_size))
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
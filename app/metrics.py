@@ -0,0 +1,156 @@
+from typing import Iterator
+
+from prometheus_client import REGISTRY, Counter, Gauge, Histogram
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.registry import Collector
+from tortoise import connections
+from tortoise.exceptions import ConfigurationError
+
+ADMISSION_IN_FLIGHT = Gauge(
+    "quiktrade_admission_in_flight_requests",
+    "Number of requests admitted and being handled.",
+)
+ADMISSION_QUEUED = Gauge(
+    "quiktrade_admission_queued_requests",
+    "Number of requests waiting to be admitted.",
+)
+ADMISSION_REJECTED = Counter(
+    "quiktrade_admission_rejected_requests_total",
+    "Number of requests rejected by the admission control, by reason.",
+    ["reason"],
+)
+ADMISSION_WAIT_SECONDS = Histogram(
+    "quiktrade_admission_wait_seconds",
+    "Time a request waited in the admission queue, whether it was admitted or not.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+BATCH_WRITER_BATCH_SIZE = Histogram(
+    "quiktrade_batch_writer_batch_size",
+    "Number of items written together by a batch writer.",
+    ["writer"],
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024),
+)
+BATCH_WRITER_WAIT_SECONDS = Histogram(
+    "quiktrade_batch_writer_wait_seconds",
+    "Time an item waited in a batch writer before its batch was flushed.",
+    ["writer"],
+    buckets=(0.0005, 0.001, 0.002, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25),
+)
+CIRCUIT_BREAKER_STATE = Gauge(
+    "quiktrade_circuit_breaker_state",
+    "State of a circuit breaker: 0 closed, 1 half-open, 2 open.",
+    ["breaker"],
+)
+CIRCUIT_BREAKER_TRANSITIONS = Counter(
+    "quiktrade_circuit_breaker_transitions_total",
+    "Number of times a circuit breaker entered a state.",
+    ["breaker", "state"],
+)
+CIRCUIT_BREAKER_REJECTED_CALLS = Counter(
+    "quiktrade_circuit_breaker_rejected_calls_total",
+    "Number of calls rejected by an open circuit breaker.",
+    ["breaker"],
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "quiktrade_http_request_duration_seconds",
+    "Time spent handling an HTTP request, by route template.",
+    ["method", "route", "status"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+EXCHANGE_CALL_SECONDS = Histogram(
+    "quiktrade_exchange_place_order_duration_seconds",
+    "Time spent in the stock exchange `place_order` call, by outcome.",
+    ["outcome"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 0.75, 1, 2.5, 5),
+)
+DB_POOL_ACQUIRE_SECONDS = Histogram(
+    "quiktrade_db_pool_acquire_duration_seconds",
+    "Time spent waiting to check a connection out of the pool.",
+    ["connection"],
+    buckets=(0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1),
+)
+ORDER_EVENTS_PUBLISHED = Counter(
+    "quiktrade_order_events_published_total",
+    "Number of order events received by this process and fanned out to its stream subscribers.",
+)
+ORDER_EVENTS_DROPPED_SUBSCRIBERS = Counter(
+    "quiktrade_order_events_dropped_subscribers_total",
+    "Number of stream subscribers disconnected for not keeping up with their events.",
+)
+ORDER_STREAM_SUBSCRIBERS = Gauge(
+    "quiktrade_order_stream_subscribers",
+    "Number of clients subscribed to the order event stream.",
+)
+ORDER_PARTITIONS_CREATED = Counter(
+    "quiktrade_order_partitions_created_total",
+    "Number of monthly order partitions created ahead of time.",
+)
+ORDER_PARTITIONS_ARCHIVED = Counter(
+    "quiktrade_order_partitions_archived_total",
+    "Number of monthly order partitions moved to the archive.",
+)
+ORDER_PARTITION_ARCHIVE_BLOCKING_ORDERS = Gauge(
+    "quiktrade_order_partition_archive_blocking_orders",
+    "Number of unplaced orders keeping the oldest expired order partition from being archived.",
+)
+ORDER_PLACEMENTS_FAILED = Counter(
+    "quiktrade_order_placements_failed_total",
+    "Number of orders given up for good, by reason: `rejected` by the venue or out of `max_attempts`.",
+    ["reason"],
+)
+PLACEMENT_SHARD_QUEUE_DEPTH = Gauge(
+    "quiktrade_placement_shard_queue_depth",
+    "Number of claimed orders waiting in a placement shard.",
+    ["shard"],
+)
+PLACEMENT_SHARD_LAG_SECONDS = Gauge(
+    "quiktrade_placement_shard_lag_seconds",
+    "Age of the oldest order waiting in a placement shard.",
+    ["shard"],
+)
+SCHEDULED_JOB_RUNS = Counter(
+    "quiktrade_scheduled_job_runs_total",
+    "Number of scheduled job runs, by outcome; `skipped` runs were left to the instance holding the lock.",
+    ["job", "outcome"],
+)
+SCHEDULED_JOB_SECONDS = Histogram(
+    "quiktrade_scheduled_job_duration_seconds",
+    "Time spent running a scheduled job.",
+    ["job"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+UNPLACED_ORDERS = Gauge(
+    "quiktrade_unplaced_orders",
+    "Number of orders not placed on the stock exchange yet, refreshed periodically.",
+)
+
+
+class DBPoolCollector(Collector):
+    """Reports the size and utilisation of the asyncpg pool of every open Tortoise connection."""
+
+    def collect(self) -> Iterator[GaugeMetricFamily]:
+        size = GaugeMetricFamily("quiktrade_db_pool_size", "Open connections in the pool.", labels=["connection"])
+        idle = GaugeMetricFamily("quiktrade_db_pool_idle", "Idle connections in the pool.", labels=["connection"])
+        in_use = GaugeMetricFamily(
+            "quiktrade_db_pool_in_use", "Connections checked out of the pool.", labels=["connection"]
+        )
+        max_size = GaugeMetricFamily(
+            "quiktrade_db_pool_max_size", "Maximum number of connections in the pool.", labels=["connection"]
+        )
+        try:
+            clients = connections.all()
+        except ConfigurationError:
+            # Tortoise has not been initialised yet.
+            clients = []
+        for client in clients:
+            pool = getattr(client, "_pool", None)
+            if pool is None:
+                continue
+            size.add_metric([client.connection_name], pool.get_size())
+            idle.add_metric([client.connection_name], pool.get_idle_size())
+            in_use.add_metric([client.connection_name], pool.get_size() - pool.get_idle_size())
+            max_size.add_metric([client.connection_name], pool.get_max_size())
+        yield from (size, idle, in_use, max_size)
+
+
+REGISTRY.register(DBPoolCollector())
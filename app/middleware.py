@@ -0,0 +1,184 @@
+import asyncio
+import os
+import random
+import threading
+import time
+from typing import Optional
+
+from starlette.datastructures import MutableHeaders
+from starlette.exceptions import HTTPException
+from starlette.requests import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.controllers.admission import AdmissionController, client_identity
+from app.exception_handlers import EXCEPTION_HANDLERS_DICT
+from app.metrics import HTTP_REQUEST_SECONDS
+from app.profiler import StackSampler, profile_file_name
+from app.timing import server_timing_header, start_request_timing, stop_request_timing
+
+UNMATCHED_ROUTE = "unmatched"
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording the latency of every HTTP request.
+
+    Requests are labelled with the route template (e.g. `/orders/{order_id}`) instead of the
+    concrete path, so the number of time series stays bounded. It is a plain ASGI middleware
+    rather than a `BaseHTTPMiddleware`, to keep the per-request overhead to a timer and one
+    histogram observation.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            HTTP_REQUEST_SECONDS.labels(
+                scope["method"], getattr(route, "path", UNMATCHED_ROUTE), str(status_code)
+            ).observe(time.perf_counter() - started)
+
+
+class AdmissionControlMiddleware:
+    """
+    ASGI middleware admitting requests through an `AdmissionController` before they are routed.
+
+    A rejected request is answered right away by the handler registered for its status code in
+    `EXCEPTION_HANDLERS_DICT`, in the same envelope as the errors raised by the endpoints. An
+    admitted request keeps its slot until its response, including a streamed body, is sent.
+    Requests to `exempt_paths` are never limited.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        controller: AdmissionController,
+        exempt_paths: set[str],
+        client_header: str = "",
+    ) -> None:
+        """
+        Initialize an AdmissionControlMiddleware instance.
+
+        Args:
+            app (ASGIApp): The wrapped application.
+            controller (AdmissionController): Decides which requests are admitted.
+            exempt_paths (set[str]): Paths that are never limited.
+            client_header (str, optional): Header identifying the client for the rate limit, the client
+                address is used if it is empty or missing. Defaults to "".
+        """
+        self.app = app
+        self.controller = controller
+        self.exempt_paths = exempt_paths
+        self.client_header = client_header.lower().encode()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.exempt_paths:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await self.controller.acquire(client_identity(scope, self.client_header))
+        except HTTPException as exc:
+            response = EXCEPTION_HANDLERS_DICT[exc.status_code](Request(scope), exc)
+            await response(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release()
+
+
+class ServerTimingMiddleware:
+    """
+    ASGI middleware reporting where the time of a request went, and optionally profiling it.
+
+    With `enabled`, the phases recorded with `app.timing.phase` while the request is handled,
+    e.g. `decode`, `db_insert`, `exchange`, `db_ack` and `serialize`, are returned in a
+    `Server-Timing` header, which browsers' developer tools and most HTTP clients display.
+
+    A request is profiled with a `StackSampler` if it has the `X-Profile: true` header and
+    `profile_header_enabled` is set, or at random with a probability of `profile_sample_rate`.
+    The samples are written to `profile_dir` in the folded stack format, and the file name is
+    returned as the `profile` metric of the `Server-Timing` header. At most
+    `max_concurrent_profiles` requests are profiled at a time.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        enabled: bool,
+        profile_sample_rate: float = 0.0,
+        profile_header_enabled: bool = False,
+        profile_dir: str = "",
+        profile_interval: float = 0.001,
+        max_concurrent_profiles: int = 1,
+    ) -> None:
+        self.app = app
+        self.enabled = enabled
+        self.profile_sample_rate = profile_sample_rate
+        self.profile_header_enabled = profile_header_enabled
+        self.profile_dir = profile_dir
+        self.profile_interval = profile_interval
+        self.max_concurrent_profiles = max_concurrent_profiles
+        self._profiling = 0
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        sampler = self._sampler(scope)
+        if not self.enabled and sampler is None:
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        phases, token = start_request_timing()
+        description = {}
+        if sampler is not None:
+            description["profile"] = profile_file_name(scope["method"], scope["path"])
+            self._profiling += 1
+            sampler.start()
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                header = server_timing_header(phases, time.perf_counter() - started, description)
+                MutableHeaders(scope=message).append("Server-Timing", header)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            stop_request_timing(token)
+            if sampler is not None:
+                self._profiling -= 1
+                await asyncio.to_thread(self._write_profile, sampler, description["profile"])
+
+    def _sampler(self, scope: Scope) -> Optional[StackSampler]:
+        if self._profiling >= self.max_concurrent_profiles:
+            return None
+        requested = self.profile_header_enabled and any(
+            name == b"x-profile" and value.lower() in (b"1", b"true") for name, value in scope["headers"]
+        )
+        if not requested and not (self.profile_sample_rate and random.random() < self.profile_sample_rate):
+            return None
+        return StackSampler(threading.get_ident(), self.profile_interval)
+
+    def _write_profile(self, sampler: StackSampler, file_name: str) -> None:
+        sampler.stop()
+        sampler.write(os.path.join(self.profile_dir, file_name))
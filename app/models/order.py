@@ -1,7 +1,7 @@
 from datetime import datetime
 from decimal import Decimal
 from enum import Enum
-from typing import Optional
+from typing import Annotated, Literal, Optional, Union
 from uuid import UUID, uuid4
 
 from pydantic import (
@@ -38,18 +38,38 @@ class Order(Model):
     created_at: datetime = fields.DatetimeField(auto_now_add=True)
     updated_at: datetime = fields.DatetimeField(auto_now=True)
     order_placed_at: Optional[datetime] = fields.DatetimeField(null=True)
-
-
-class CreateOrderModel(BaseModel):
+    attempts: int = fields.IntField(default=0)
+    next_attempt_at: Optional[datetime] = fields.DatetimeField(null=True)
+    last_error: Optional[str] = fields.TextField(null=True)
+    # Set once the order will never be placed: the venue rejected it or it ran out of attempts.
+    failed_at: Optional[datetime] = fields.DatetimeField(null=True)
+    # The order table is partitioned by month on Postgres, where the uniqueness of the key is enforced
+    # by the `order_idempotency_key` table instead, see the partitioning migration.
+    idempotency_key: Optional[str] = fields.CharField(max_length=255, null=True, unique=True)
+
+
+class OrderListQueryModel(BaseModel):
+    instrument: Optional[constr(min_length=12, max_length=12)] = None
+    side: Optional[OrderSide] = None
+    created_from: Optional[datetime] = None
+    created_to: Optional[datetime] = None
+    placed: Optional[bool] = None
+    cursor: Optional[str] = None
+    limit: conint(gt=0, le=1000) = 100
+
+
+class BaseOrderModel(BaseModel):
     type: OrderType = Field(alias="type")
     side: OrderSide
     instrument: constr(min_length=12, max_length=12)
-    limit_price: Optional[condecimal(decimal_places=2)] = None
+    limit_price: Optional[condecimal(decimal_places=2, gt=0)] = None
     quantity: conint(gt=0)
 
     class Config:
         use_enum_values = True
 
+
+class CreateOrderModel(BaseOrderModel):
     @model_validator(mode="before")
     @classmethod
     def validator(cls, values: dict) -> None:
@@ -57,7 +77,7 @@ class CreateOrderModel(BaseModel):
         Validates the input values for creating an order.
 
         This function checks the values dictionary for consistency based on the order type.
-        For 'market' type orders, it ensures that a `limit_price` is not provided.
+        For 'market' type orders, it ensures that a `limit_price` is not provided, not even 0.
         For 'limit' type orders, it ensures that a `limit_price` is provided.
 
         Args:
@@ -71,17 +91,48 @@ class CreateOrderModel(BaseModel):
             ValueError: If a `limit_price` is provided for a 'market' type order,
                         or if a `limit_price` is missing for a 'limit' type order.
         """
-        if values.get("type") == "market" and values.get("limit_price"):
+        if values.get("type") == "market" and values.get("limit_price") is not None:
             raise ValueError("Providing a `limit_price` is prohibited for type `market`")
 
-        if values.get("type") == "limit" and not values.get("limit_price"):
+        if values.get("type") == "limit" and values.get("limit_price") is None:
             raise ValueError("Attribute `limit_price` is required for type `limit`")
 
         return values
 
 
+class MarketOrderModel(BaseOrderModel):
+    type: Literal["market"]
+    limit_price: None = None
+
+
+class LimitOrderModel(BaseOrderModel):
+    type: Literal["limit"]
+    limit_price: condecimal(decimal_places=2, gt=0)
+
+
+# The rules of `CreateOrderModel.validator` expressed as a tagged union, so that they are enforced
+# by pydantic-core while decoding instead of by Python code on an intermediate dict.
+CreateOrderPayload = Annotated[Union[MarketOrderModel, LimitOrderModel], Field(discriminator="type")]
+
+
 CreateOrderResponseModel = pydantic_model_creator(
     Order,
-    exclude=("order_placed_at", "created_at", "updated_at"),
+    exclude=(
+        "order_placed_at",
+        "created_at",
+        "updated_at",
+        "attempts",
+        "next_attempt_at",
+        "last_error",
+        "idempotency_key",
+        "failed_at",
+    ),
+    model_config=ConfigDict(use_enum_values=True),
+)
+
+OrderResponseModel = pydantic_model_creator(
+    Order,
+    name="OrderResponse",
+    exclude=("updated_at", "attempts", "next_attempt_at", "last_error", "idempotency_key"),
     model_config=ConfigDict(use_enum_values=True),
 )
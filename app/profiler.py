@@ -0,0 +1,89 @@
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from types import FrameType
+from typing import Optional
+
+# Characters kept in the file names of the profiles, everything else in the request path is replaced.
+_UNSAFE_FILE_NAME_CHARACTERS = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+def _folded_stack(frame: Optional[FrameType]) -> str:
+    """Return a stack, outermost frame first, as `function (file:line);...` in the folded stack format."""
+    frames = []
+    while frame is not None:
+        code = frame.f_code
+        frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+        frame = frame.f_back
+    return ";".join(reversed(frames))
+
+
+class StackSampler:
+    """
+    Sampling profiler of one thread, e.g. the thread running the event loop.
+
+    While running, a background thread takes the stack of the profiled thread every `interval`
+    seconds. The profiled code is not instrumented, so it runs at full speed apart from the GIL
+    the sampler takes for each sample. The samples are written in the folded stack format, one
+    `frame;frame;frame count` line per distinct stack, which flamegraph.pl, speedscope and most
+    other flame graph tools read.
+
+    The event loop runs the coroutines of all requests in turns, so the samples of a request cover
+    everything the loop did meanwhile, not only the work for this request.
+    """
+
+    def __init__(self, thread_id: int, interval: float) -> None:
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._sample, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def write(self, path: str) -> None:
+        """
+        Write the samples in the folded stack format.
+
+        Args:
+            path (str): The file to write, its directory is created if needed.
+        """
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+    def _sample(self) -> None:
+        while True:
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.samples[_folded_stack(frame)] += 1
+            del frame
+            if self._stop.wait(self.interval):
+                return
+
+
+def profile_file_name(method: str, path: str) -> str:
+    """
+    Return a unique, file system safe name for the profile of a request.
+
+    Args:
+        method (str): The HTTP method.
+        path (str): The request path.
+
+    Returns:
+        str: The file name, e.g. `20261018T120000.123456-POST-orders.folded`.
+    """
+    started = time.strftime("%Y%m%dT%H%M%S", time.gmtime()) + f".{time.time_ns() // 1000 % 1_000_000:06d}"
+    route = _UNSAFE_FILE_NAME_CHARACTERS.sub("_", path.strip("/")) or "root"
+    return f"{started}-{method}-{route}.folded"
@@ -4,6 +4,7 @@ from fastapi.responses import ORJSONResponse
 from starlette.background import BackgroundTask
 
 from app.settings import settings
+from app.timing import phase
 
 
 class APIResponse(ORJSONResponse):
@@ -28,13 +29,14 @@ class APIResponse(ORJSONResponse):
             background (BackgroundTask, optional): Background tasks to run after the response is sent. Defaults to None.
         """
         success = self._is_success(success, status_code)
-        super().__init__(
-            content=self._pre_render(content, success),
-            status_code=status_code,
-            headers=headers,
-            media_type=media_type,
-            background=background,
-        )
+        with phase("serialize"):
+            super().__init__(
+                content=self._pre_render(content, success),
+                status_code=status_code,
+                headers=headers,
+                media_type=media_type,
+                background=background,
+            )
 
     @staticmethod
     def _is_success(success, status_code) -> bool:
@@ -3,6 +3,12 @@ import os
 ENV_LOCAL = "local"
 ENV_PROD = "production"
 
+PLACEMENT_MODE_OUTBOX = "outbox"
+PLACEMENT_MODE_INLINE = "inline"
+
+SATURATION_POLICY_REJECT = "reject"
+SATURATION_POLICY_PARK = "park"
+
 
 class Settings:
     PROJECT_NAME: str = "QuikTrade"
@@ -12,27 +18,172 @@ class Settings:
     PORT: str = os.getenv("PORT", "8000")
     VERSION: str = os.getenv("VERSION", "0.0")
     POSTGRES_PORT: str = os.getenv("DB_PORT", "5432")
-    POSTGRES_HOST: str = os.getenv("DB_PASSWORD", "localhost")
+    POSTGRES_HOST: str = os.getenv("DB_HOST", "localhost")
     POSTGRES_USER: str = os.getenv("DB_USER", "postgres")
     POSTGRES_PASSWORD: str = os.getenv("DB_PASSWORD", "postgres")
     POSTGRES_DB: str = os.getenv("DB_NAME", "tradedb")
+    # Read replica used by read-only queries, the primary serves all queries if no host is set.
+    POSTGRES_READ_HOST: str = os.getenv("DB_READ_HOST")
+    POSTGRES_READ_PORT: str = os.getenv("DB_READ_PORT", POSTGRES_PORT)
+    # Connection pool limits of the primary and the replica connection, the defaults are Tortoise's own.
+    DB_POOL_MIN_SIZE: int = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+    DB_POOL_MAX_SIZE: int = int(os.getenv("DB_POOL_MAX_SIZE", "5"))
+    DB_READ_POOL_MIN_SIZE: int = int(os.getenv("DB_READ_POOL_MIN_SIZE", "1"))
+    DB_READ_POOL_MAX_SIZE: int = int(os.getenv("DB_READ_POOL_MAX_SIZE", "5"))
+    # "outbox" leaves the placement to the dispatcher, "inline" also places the order during the request.
+    PLACEMENT_MODE: str = os.getenv("PLACEMENT_MODE", PLACEMENT_MODE_OUTBOX)
+    # Coalesce the inserts of concurrent `POST /orders` into one bulk insert, flushed after
+    # ORDER_WRITE_MAX_DELAY seconds or once ORDER_WRITE_MAX_BATCH_SIZE orders are waiting.
+    ORDER_WRITE_COALESCING: bool = os.getenv("ORDER_WRITE_COALESCING", "false").lower() == "true"
+    ORDER_WRITE_MAX_BATCH_SIZE: int = int(os.getenv("ORDER_WRITE_MAX_BATCH_SIZE", "256"))
+    ORDER_WRITE_MAX_DELAY: float = float(os.getenv("ORDER_WRITE_MAX_DELAY", "0.002"))
+    # Acknowledge successful placements with one UPDATE per batch, flushed after ORDER_ACK_MAX_DELAY
+    # seconds or once ORDER_ACK_MAX_BATCH_SIZE orders are waiting. With `false`, every placement is
+    # written on its own.
+    ORDER_ACK_COALESCING: bool = os.getenv("ORDER_ACK_COALESCING", "true").lower() == "true"
+    ORDER_ACK_MAX_BATCH_SIZE: int = int(os.getenv("ORDER_ACK_MAX_BATCH_SIZE", "500"))
+    ORDER_ACK_MAX_DELAY: float = float(os.getenv("ORDER_ACK_MAX_DELAY", "0.005"))
+    # Admission control of the API: at most ADMISSION_MAX_CONCURRENCY requests are handled at a time per worker,
+    # up to ADMISSION_MAX_QUEUE more wait for at most ADMISSION_QUEUE_TIMEOUT seconds, all others get a 503.
+    # 0 disables the limit.
+    ADMISSION_MAX_CONCURRENCY: int = int(os.getenv("ADMISSION_MAX_CONCURRENCY", "64"))
+    ADMISSION_MAX_QUEUE: int = int(os.getenv("ADMISSION_MAX_QUEUE", "128"))
+    ADMISSION_QUEUE_TIMEOUT: float = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "1"))
+    # Paths that are never limited, so that probes and scrapes still get through an overload. The order stream
+    # is limited by ORDER_STREAM_MAX_SUBSCRIBERS instead, as its connections stay open.
+    ADMISSION_EXEMPT_PATHS: set[str] = set(
+        path for path in os.getenv("ADMISSION_EXEMPT_PATHS", "/healthcheck,/metrics,/orders/stream").split(",") if path
+    )
+    # Token bucket rate limit per client and worker, a request over the limit gets a 429. 0 disables the limit.
+    # Clients are identified by RATE_LIMIT_CLIENT_HEADER, e.g. `X-Api-Key`, or by their address if it is not set.
+    # Idempotency keys are scoped to the clients identified the same way.
+    RATE_LIMIT_PER_SECOND: float = float(os.getenv("RATE_LIMIT_PER_SECOND", "0"))
+    RATE_LIMIT_BURST: int = int(os.getenv("RATE_LIMIT_BURST", "50"))
+    RATE_LIMIT_CLIENT_HEADER: str = os.getenv("RATE_LIMIT_CLIENT_HEADER", "")
+    RATE_LIMIT_MAX_CLIENTS: int = int(os.getenv("RATE_LIMIT_MAX_CLIENTS", "100000"))
+    # Return the time spent in every phase of a request (decoding, inserts, exchange calls, ...) as a
+    # `Server-Timing` header.
+    SERVER_TIMING_ENABLED: bool = os.getenv("SERVER_TIMING_ENABLED", "false").lower() == "true"
+    # Sampling profiler: requests with an `X-Profile: true` header (if PROFILER_HEADER_ENABLED) and a random
+    # PROFILER_SAMPLE_RATE share of all requests are profiled, one stack sample every PROFILER_INTERVAL seconds.
+    # Their stacks are written to PROFILER_DIR in the folded format of flame graph tools.
+    PROFILER_HEADER_ENABLED: bool = os.getenv("PROFILER_HEADER_ENABLED", "false").lower() == "true"
+    PROFILER_SAMPLE_RATE: float = float(os.getenv("PROFILER_SAMPLE_RATE", "0"))
+    PROFILER_INTERVAL: float = float(os.getenv("PROFILER_INTERVAL", "0.001"))
+    PROFILER_DIR: str = os.getenv("PROFILER_DIR", "/tmp/quiktrade-profiles")
+    PROFILER_MAX_CONCURRENT: int = int(os.getenv("PROFILER_MAX_CONCURRENT", "1"))
+    # Seconds between two refreshes of the unplaced orders metric.
+    UNPLACED_ORDERS_REFRESH_INTERVAL: float = float(os.getenv("UNPLACED_ORDERS_REFRESH_INTERVAL", "15"))
+    # Cache of `GET /orders/{id}` responses. Pending orders may be placed by another process at any time,
+    # so they are only cached for ORDER_CACHE_PENDING_TTL seconds.
+    ORDER_CACHE_SIZE: int = int(os.getenv("ORDER_CACHE_SIZE", "10000"))
+    ORDER_CACHE_TTL: float = float(os.getenv("ORDER_CACHE_TTL", "60"))
+    ORDER_CACHE_PENDING_TTL: float = float(os.getenv("ORDER_CACHE_PENDING_TTL", "1"))
+    # `GET /orders/stream`: at most ORDER_STREAM_MAX_SUBSCRIBERS clients per worker, each with up to
+    # ORDER_STREAM_MAX_QUEUE undelivered events before it is disconnected, and a keep-alive every
+    # ORDER_STREAM_KEEPALIVE seconds without events. Streams end after ORDER_STREAM_MAX_AGE seconds, minus a random
+    # jitter of up to a tenth of it, so that a stopping worker does not wait for its streams forever.
+    ORDER_STREAM_MAX_SUBSCRIBERS: int = int(os.getenv("ORDER_STREAM_MAX_SUBSCRIBERS", "10000"))
+    ORDER_STREAM_MAX_QUEUE: int = int(os.getenv("ORDER_STREAM_MAX_QUEUE", "1000"))
+    ORDER_STREAM_KEEPALIVE: float = float(os.getenv("ORDER_STREAM_KEEPALIVE", "15"))
+    ORDER_STREAM_MAX_AGE: float = float(os.getenv("ORDER_STREAM_MAX_AGE", "300"))
+    # Seconds before the listener of the order events reconnects after losing its connection.
+    ORDER_EVENTS_RECONNECT_DELAY: float = float(os.getenv("ORDER_EVENTS_RECONNECT_DELAY", "1"))
+    # Number of orders loaded per query when streaming `GET /orders` as NDJSON.
+    ORDER_EXPORT_CHUNK_SIZE: int = int(os.getenv("ORDER_EXPORT_CHUNK_SIZE", "1000"))
+    # Decode `POST /orders` bodies straight from bytes into the `CreateOrderPayload` union in one pass.
+    # With `false`, bodies are validated by `CreateOrderModel` and its Python validator instead.
+    ORDER_FAST_DECODING: bool = os.getenv("ORDER_FAST_DECODING", "true").lower() == "true"
+    # Maximum number of orders accepted by `POST /orders/batch`.
+    ORDER_BATCH_MAX_SIZE: int = int(os.getenv("ORDER_BATCH_MAX_SIZE", "1000"))
+    # Number of orders validated and copied at a time by `quicktrade-import`; bounds its memory use.
+    IMPORT_CHUNK_SIZE: int = int(os.getenv("IMPORT_CHUNK_SIZE", "10000"))
+    # Responses of `POST /orders` with an `Idempotency-Key` header are kept this long for replays.
+    # Keys evicted from the cache are still deduplicated by the unique column, at the cost of a query.
+    IDEMPOTENCY_CACHE_SIZE: int = int(os.getenv("IDEMPOTENCY_CACHE_SIZE", "10000"))
+    IDEMPOTENCY_CACHE_TTL: float = float(os.getenv("IDEMPOTENCY_CACHE_TTL", "86400"))
+    DISPATCHER_BATCH_SIZE: int = int(os.getenv("DISPATCHER_BATCH_SIZE", "500"))
+    # Number of placement shards. Orders are assigned to a shard by instrument and every shard places
+    # its orders one at a time, so this is also the number of concurrent exchange calls of a dispatcher.
+    PLACEMENT_SHARD_COUNT: int = int(os.getenv("PLACEMENT_SHARD_COUNT", "64"))
+    DISPATCHER_POLL_INTERVAL: float = float(os.getenv("DISPATCHER_POLL_INTERVAL", "1.0"))
+    # Port of the Prometheus metrics of the dispatcher process, 0 to disable them.
+    DISPATCHER_METRICS_PORT: int = int(os.getenv("DISPATCHER_METRICS_PORT", "9100"))
+    # Run the periodic jobs, e.g. the failed order sweep, in the API workers. Exclusive jobs take a Postgres
+    # advisory lock, so only one worker of all replicas runs each of them at a time.
+    SCHEDULER_ENABLED: bool = os.getenv("SCHEDULER_ENABLED", "true").lower() == "true"
+    # Seconds the runs in progress may take to finish on shutdown before they are cancelled.
+    SCHEDULER_SHUTDOWN_TIMEOUT: float = float(os.getenv("SCHEDULER_SHUTDOWN_TIMEOUT", "10"))
+    # Seconds between two failed order sweeps, plus a random jitter of up to FAILED_ORDER_SWEEP_JITTER seconds.
+    FAILED_ORDER_SWEEP_INTERVAL: float = float(os.getenv("FAILED_ORDER_SWEEP_INTERVAL", "30"))
+    FAILED_ORDER_SWEEP_JITTER: float = float(os.getenv("FAILED_ORDER_SWEEP_JITTER", "5"))
+    # Monthly partitions of the order table: the partitions of the next ORDER_PARTITION_MONTHS_AHEAD months are
+    # created in advance, partitions older than ORDER_RETENTION_MONTHS full months are moved to
+    # ORDER_ARCHIVE_SCHEMA (and ORDER_ARCHIVE_TABLESPACE, if set) once all their orders are placed.
+    ORDER_PARTITION_MAINTENANCE_INTERVAL: float = float(os.getenv("ORDER_PARTITION_MAINTENANCE_INTERVAL", "3600"))
+    ORDER_PARTITION_MONTHS_AHEAD: int = int(os.getenv("ORDER_PARTITION_MONTHS_AHEAD", "2"))
+    ORDER_RETENTION_MONTHS: int = int(os.getenv("ORDER_RETENTION_MONTHS", "3"))
+    ORDER_ARCHIVE_SCHEMA: str = os.getenv("ORDER_ARCHIVE_SCHEMA", "order_archive")
+    ORDER_ARCHIVE_TABLESPACE: str = os.getenv("ORDER_ARCHIVE_TABLESPACE", "")
+    # Number of archived orders whose idempotency keys are released per transaction.
+    ORDER_ARCHIVE_KEY_RELEASE_BATCH_SIZE: int = int(os.getenv("ORDER_ARCHIVE_KEY_RELEASE_BATCH_SIZE", "10000"))
+    # Seconds between two rebuilds of the per-instrument order counters from the read replica, or from the primary
+    # if there is no replica.
+    INSTRUMENT_STATS_REBUILD_INTERVAL: float = float(os.getenv("INSTRUMENT_STATS_REBUILD_INTERVAL", "60"))
+    INSTRUMENT_STATS_PRIMARY_REBUILD_INTERVAL: float = float(
+        os.getenv("INSTRUMENT_STATS_PRIMARY_REBUILD_INTERVAL", "3600")
+    )
+    # Seconds a claimed order stays reserved for the sweeper that claimed it.
+    SWEEPER_CLAIM_TIMEOUT: float = float(os.getenv("SWEEPER_CLAIM_TIMEOUT", "60"))
+    # Exponential backoff between placement attempts, in seconds.
+    SWEEPER_BACKOFF_BASE: float = float(os.getenv("SWEEPER_BACKOFF_BASE", "1"))
+    SWEEPER_BACKOFF_MAX: float = float(os.getenv("SWEEPER_BACKOFF_MAX", "300"))
+    # Placement attempts after which an order that keeps failing is given up and marked as failed.
+    SWEEPER_MAX_ATTEMPTS: int = int(os.getenv("SWEEPER_MAX_ATTEMPTS", "20"))
+    # Bounded thread pool running the blocking stock exchange calls.
+    EXCHANGE_MAX_WORKERS: int = int(os.getenv("EXCHANGE_MAX_WORKERS", "64"))
+    EXCHANGE_QUEUE_SIZE: int = int(os.getenv("EXCHANGE_QUEUE_SIZE", "256"))
+    # Circuit breaker around the stock exchange: it opens once CIRCUIT_BREAKER_FAILURE_RATE of the last
+    # CIRCUIT_BREAKER_WINDOW_SIZE calls failed, and lets trial calls through after CIRCUIT_BREAKER_OPEN_SECONDS.
+    CIRCUIT_BREAKER_FAILURE_RATE: float = float(os.getenv("CIRCUIT_BREAKER_FAILURE_RATE", "0.5"))
+    CIRCUIT_BREAKER_WINDOW_SIZE: int = int(os.getenv("CIRCUIT_BREAKER_WINDOW_SIZE", "50"))
+    CIRCUIT_BREAKER_MINIMUM_CALLS: int = int(os.getenv("CIRCUIT_BREAKER_MINIMUM_CALLS", "20"))
+    CIRCUIT_BREAKER_OPEN_SECONDS: float = float(os.getenv("CIRCUIT_BREAKER_OPEN_SECONDS", "30"))
+    CIRCUIT_BREAKER_HALF_OPEN_CALLS: int = int(os.getenv("CIRCUIT_BREAKER_HALF_OPEN_CALLS", "1"))
+    # What to do with a new order when the pool is full:
+    # "reject" answers 503 without storing it, "park" stores it unplaced for the retry job.
+    EXCHANGE_SATURATION_POLICY: str = os.getenv("EXCHANGE_SATURATION_POLICY", SATURATION_POLICY_REJECT)
+    # Venues with an HTTP API, as comma separated `PREFIX=URL` pairs, e.g. `BTC=http://venue-a:8080`.
+    # Orders whose instrument starts with PREFIX are placed there, all others with `place_order`.
+    EXCHANGE_VENUES: dict[str, str] = dict(
+        venue.split("=", 1) for venue in os.getenv("EXCHANGE_VENUES", "").split(",") if venue
+    )
+    EXCHANGE_HTTP_MAX_CONNECTIONS: int = int(os.getenv("EXCHANGE_HTTP_MAX_CONNECTIONS", "100"))
+    EXCHANGE_HTTP_TIMEOUT: float = float(os.getenv("EXCHANGE_HTTP_TIMEOUT", "5"))
+    EXCHANGE_HTTP_BATCH_SIZE: int = int(os.getenv("EXCHANGE_HTTP_BATCH_SIZE", "100"))
 
 
 settings = Settings()
 
+READ_CONNECTION = "read"
+
 
 DB_CONFIG: dict = {
-    # We can have multiple connections and specify them for read or write.
-    # Tortoise uses connection pool by default but we can update it if needed.
+    # Writes go to the `default` connection. Read-only queries that can tolerate replication lag
+    # use the `read` connection (see `app.db.read_connection`), which only exists if a replica is configured.
+    # Pool limits of both connections are taken from the settings.
+    # The `app.db` engine is Tortoise's asyncpg backend, instrumented with pool metrics.
     "connections": {
         "default": {
-            "engine": "tortoise.backends.asyncpg",
+            "engine": "app.db",
             "credentials": {
                 "host": settings.POSTGRES_HOST,
                 "port": settings.POSTGRES_PORT,
                 "user": settings.POSTGRES_USER,
                 "password": settings.POSTGRES_PASSWORD,
                 "database": settings.POSTGRES_DB,
+                "minsize": settings.DB_POOL_MIN_SIZE,
+                "maxsize": settings.DB_POOL_MAX_SIZE,
                 "max_inactive_connection_lifetime": 120,
             },
         },
@@ -47,3 +198,18 @@ DB_CONFIG: dict = {
         }
     },
 }
+
+if settings.POSTGRES_READ_HOST:
+    DB_CONFIG["connections"][READ_CONNECTION] = {
+        "engine": "app.db",
+        "credentials": {
+            "host": settings.POSTGRES_READ_HOST,
+            "port": settings.POSTGRES_READ_PORT,
+            "user": settings.POSTGRES_USER,
+            "password": settings.POSTGRES_PASSWORD,
+            "database": settings.POSTGRES_DB,
+            "minsize": settings.DB_READ_POOL_MIN_SIZE,
+            "maxsize": settings.DB_READ_POOL_MAX_SIZE,
+            "max_inactive_connection_lifetime": 120,
+        },
+    }
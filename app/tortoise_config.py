@@ -1,11 +1,28 @@
 # Reference: https://tortoise.github.io/examples/fastapi.html#main-py
+import asyncio
+import logging
 from collections.abc import AsyncGenerator
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from tortoise.contrib.fastapi import RegisterTortoise
 
-from app.settings import DB_CONFIG
+from app.controllers.exchange_executor import exchange_executor
+from app.controllers.order import (
+    INSTRUMENT_STATS_REBUILD_INTERVAL,
+    exchange_registry,
+    order_ack_writer,
+    order_event_hub,
+    order_writer,
+    periodic_scheduler,
+    rebuild_instrument_stats,
+    rebuild_instrument_stats_periodically,
+    refresh_unplaced_orders_metric,
+)
+from app.models.order import Order
+from app.settings import DB_CONFIG, settings
+
+logger = logging.getLogger(__name__)
 
 
 @asynccontextmanager
@@ -17,6 +34,12 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     FastAPI app and waits for the database to be fully connected before
     yielding control.
 
+    The periodic jobs, e.g. the failed order sweep, run while the app is up if
+    `settings.SCHEDULER_ENABLED` is set, and are stopped before the connections are closed.
+    So is the listener of the order events, which streams the placements to the clients.
+    The per-instrument order counters are built before the first request is served, and rebuilt
+    periodically by every worker, whether or not it runs the periodic jobs.
+
     If `app.state.testing` is set to `True`, the test database setup
     (`lifespan_test`) is used instead.
 
@@ -25,6 +48,25 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     """
     async with RegisterTortoise(app=app, config=DB_CONFIG, generate_schemas=False, add_exception_handlers=True):
         # db connected
+        try:
+            await rebuild_instrument_stats()
+        except Exception:
+            # The counters start from zero and are rebuilt by the periodic rebuild.
+            logger.exception("Failed to build the instrument stats")
+        metric_refresh = asyncio.create_task(refresh_unplaced_orders_metric(settings.UNPLACED_ORDERS_REFRESH_INTERVAL))
+        stats_rebuild = asyncio.create_task(rebuild_instrument_stats_periodically(INSTRUMENT_STATS_REBUILD_INTERVAL))
+        if settings.SCHEDULER_ENABLED:
+            periodic_scheduler.start()
+        order_event_hub.start(Order._meta.db)
         yield
         # app teardown
+        await order_event_hub.close()
+        await periodic_scheduler.close(settings.SCHEDULER_SHUTDOWN_TIMEOUT)
+        metric_refresh.cancel()
+        stats_rebuild.cancel()
+        await asyncio.gather(metric_refresh, stats_rebuild, return_exceptions=True)
+        await order_writer.close()
+        await order_ack_writer.close()
+        await exchange_registry.close()
+        exchange_executor.shutdown(wait=False)
     # db connections closed
@@ -0,0 +1,102 @@
+import random
+import threading
+import time
+
+from app.controllers.stock_exchange import OrderPlacementError
+from app.models.order import Order
+
+LATENCY_FIXED = "fixed"
+LATENCY_UNIFORM = "uniform"
+LATENCY_LOGNORMAL = "lognormal"
+
+
+class ExchangeSimulator:
+    """
+    Deterministic stand-in for the stock exchange `place_order` function.
+
+    Every call sleeps for a latency drawn from the configured distribution and fails with
+    `OrderPlacementError` at random with probability `failure_rate`. With probability
+    `burst_probability` a call starts a failure burst instead, and that call plus the next
+    `burst_length - 1` calls all fail, as a real exchange outage would.
+
+    All randomness comes from one RNG seeded with `seed`, so a run with the same seed and the
+    same call order sees the same latencies and failures.
+    """
+
+    def __init__(
+        self,
+        seed: int = 0,
+        latency: str = LATENCY_LOGNORMAL,
+        latency_ms: float = 50.0,
+        latency_spread: float = 0.5,
+        failure_rate: float = 0.1,
+        burst_probability: float = 0.0,
+        burst_length: int = 0,
+    ) -> None:
+        """
+        Initialize an ExchangeSimulator instance.
+
+        Args:
+            seed (int, optional): The RNG seed. Defaults to 0.
+            latency (str, optional): The latency distribution: `fixed`, `uniform` or `lognormal`. Defaults to `lognormal`.
+            latency_ms (float, optional): The median latency in milliseconds. Defaults to 50.
+            latency_spread (float, optional): For `uniform`, the relative half width of the interval around
+                `latency_ms`; for `lognormal`, the sigma of the underlying normal distribution. Defaults to 0.5.
+            failure_rate (float, optional): The probability of an isolated failure. Defaults to 0.1.
+            burst_probability (float, optional): The probability that a call starts a failure burst. Defaults to 0.
+            burst_length (int, optional): The number of consecutive calls failing in a burst. Defaults to 0.
+        """
+        if latency not in (LATENCY_FIXED, LATENCY_UNIFORM, LATENCY_LOGNORMAL):
+            raise ValueError(f"Unknown latency distribution `{latency}`")
+        self.latency = latency
+        self.latency_ms = latency_ms
+        self.latency_spread = latency_spread
+        self.failure_rate = failure_rate
+        self.burst_probability = burst_probability
+        self.burst_length = burst_length
+        self.calls = 0
+        self.failures = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._burst_remaining = 0
+
+    def __call__(self, order: Order) -> None:
+        """
+        Simulate placing an order.
+
+        Args:
+            order (Order): The order to be placed.
+
+        Raises:
+            OrderPlacementError: If the simulated placement fails.
+        """
+        if not order:
+            raise ValueError("Required order parameter not provided")
+
+        with self._lock:
+            self.calls += 1
+            delay = self._draw_latency() / 1000
+            failed = self._draw_failure()
+            if failed:
+                self.failures += 1
+
+        time.sleep(delay)
+        if failed:
+            raise OrderPlacementError("Simulated stock exchange failure")
+
+    def _draw_latency(self) -> float:
+        if self.latency == LATENCY_FIXED:
+            return self.latency_ms
+        if self.latency == LATENCY_UNIFORM:
+            spread = self.latency_ms * self.latency_spread
+            return self._rng.uniform(self.latency_ms - spread, self.latency_ms + spread)
+        return self.latency_ms * self._rng.lognormvariate(0, self.latency_spread)
+
+    def _draw_failure(self) -> bool:
+        if self._burst_remaining:
+            self._burst_remaining -= 1
+            return True
+        if self.burst_length and self._rng.random() < self.burst_probability:
+            self._burst_remaining = self.burst_length - 1
+            return True
+        return self._rng.random() < self.failure_rate
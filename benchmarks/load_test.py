@@ -0,0 +1,206 @@
+"""
+Load test of `POST /orders` against the ASGI app with a simulated stock exchange.
+
+Drives the real app in process through `httpx.ASGITransport`, once per concurrency level,
+with `place_order` replaced by a seeded `ExchangeSimulator`. The database defaults to an
+in-memory SQLite stand-in; pass `--db-url` to run against a local Postgres instead.
+Prints the throughput and latency percentiles of every level as JSON:
+
+    python -m benchmarks.load_test --concurrency 1,8,32 --requests 2000 --placement-mode inline
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import Optional
+from unittest import mock
+
+import httpx
+from tortoise import Tortoise, generate_config
+
+from app.api import app
+from app.controllers.circuit_breaker import exchange_breaker
+from app.controllers.exchange_executor import exchange_executor
+from app.controllers.order import OrderController, order_ack_writer, order_writer
+from app.settings import DB_CONFIG, PLACEMENT_MODE_INLINE, PLACEMENT_MODE_OUTBOX, settings
+from benchmarks.exchange_simulator import LATENCY_FIXED, LATENCY_LOGNORMAL, LATENCY_UNIFORM, ExchangeSimulator
+from benchmarks.stats import summarize
+
+INSTRUMENTS = [f"BTCUSDT{i:05d}" for i in range(50)]
+
+
+def build_payloads(count: int, seed: int) -> list[dict]:
+    """
+    Build `count` valid order payloads, the same ones for the same seed.
+
+    Args:
+        count (int): The number of payloads.
+        seed (int): The RNG seed.
+
+    Returns:
+        list[dict]: The request bodies for `POST /orders`.
+    """
+    rng = random.Random(seed)
+    payloads = []
+    for _ in range(count):
+        payload = {
+            "type": rng.choice(["market", "limit"]),
+            "side": rng.choice(["buy", "sell"]),
+            "instrument": rng.choice(INSTRUMENTS),
+            "quantity": rng.randint(1, 1000),
+        }
+        if payload["type"] == "limit":
+            payload["limit_price"] = f"{rng.uniform(1, 1000):.2f}"
+        payloads.append(payload)
+    return payloads
+
+
+async def run_level(client: httpx.AsyncClient, payloads: list[dict], concurrency: int) -> dict:
+    """
+    Send every payload with `concurrency` requests in flight at all times.
+
+    Args:
+        client (httpx.AsyncClient): The client bound to the app.
+        payloads (list[dict]): The request bodies.
+        concurrency (int): The number of concurrent workers.
+
+    Returns:
+        dict: The throughput, latency percentiles and status code counts of the level.
+    """
+    pending = iter(payloads)
+    latencies = []
+    statuses: dict[int, int] = {}
+
+    async def worker() -> None:
+        for payload in pending:
+            started = time.perf_counter()
+            response = await client.post("/orders", json=payload)
+            latencies.append((time.perf_counter() - started) * 1000)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        "concurrency": concurrency,
+        "requests": len(payloads),
+        "seconds": round(elapsed, 3),
+        "rps": round(len(payloads) / elapsed, 1),
+        "latency": summarize(latencies),
+        "status_codes": {str(code): count for code, count in sorted(statuses.items())},
+    }
+
+
+async def drain() -> dict:
+    """
+    Place the orders left unplaced by the requests the way the dispatcher does, until none is due.
+
+    Returns:
+        dict: The number of orders claimed, the time it took and the number still unplaced.
+    """
+    claimed = 0
+    started = time.perf_counter()
+    while count := await OrderController.place_failed_orders():
+        claimed += count
+    elapsed = time.perf_counter() - started
+    return {
+        "claimed": claimed,
+        "seconds": round(elapsed, 3),
+        "unplaced": await OrderController.count_unplaced_orders(),
+    }
+
+
+async def run(
+    concurrency_levels: list[int],
+    requests: int,
+    placement_mode: str,
+    db_url: str,
+    simulator: ExchangeSimulator,
+    seed: int,
+    drain_outbox: bool,
+) -> dict:
+    config = generate_config(db_url, app_modules={"models": DB_CONFIG["apps"]["models"]["models"]})
+    await Tortoise.init(config=config)
+    await Tortoise.generate_schemas(safe=True)
+    try:
+        with (
+            mock.patch.object(settings, "PLACEMENT_MODE", placement_mode),
+            mock.patch("app.controllers.order.place_order", simulator),
+        ):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+                levels = []
+                for concurrency in concurrency_levels:
+                    level = await run_level(client, build_payloads(requests, seed), concurrency)
+                    if drain_outbox and placement_mode == PLACEMENT_MODE_OUTBOX:
+                        level["drain"] = await drain()
+                    level["circuit_breaker"] = exchange_breaker.stats()
+                    levels.append(level)
+            await order_writer.close()
+            await order_ack_writer.close()
+    finally:
+        await Tortoise.close_connections()
+        exchange_executor.shutdown(wait=False)
+
+    return {
+        "placement_mode": placement_mode,
+        "db_url": db_url.split("@")[-1],
+        "seed": seed,
+        "exchange": {"calls": simulator.calls, "failures": simulator.failures},
+        "levels": levels,
+    }
+
+
+def main(argv: Optional[list[str]] = None) -> dict:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", default="1,8,32", help="Comma separated concurrency levels.")
+    parser.add_argument("--requests", type=int, default=1000, help="Number of requests per concurrency level.")
+    parser.add_argument(
+        "--placement-mode", choices=[PLACEMENT_MODE_OUTBOX, PLACEMENT_MODE_INLINE], default=settings.PLACEMENT_MODE
+    )
+    parser.add_argument("--drain", action="store_true", help="Place the outbox after every level and time it.")
+    parser.add_argument("--db-url", default="sqlite://:memory:", help="Tortoise database URL.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the payloads and the exchange simulator.")
+    parser.add_argument(
+        "--latency", choices=[LATENCY_FIXED, LATENCY_UNIFORM, LATENCY_LOGNORMAL], default=LATENCY_LOGNORMAL
+    )
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Median exchange latency.")
+    parser.add_argument("--latency-spread", type=float, default=0.5, help="Spread of the exchange latency.")
+    parser.add_argument("--failure-rate", type=float, default=0.1, help="Probability of an isolated failure.")
+    parser.add_argument("--burst-probability", type=float, default=0.0, help="Probability of a failure burst.")
+    parser.add_argument("--burst-length", type=int, default=0, help="Number of calls failing in a burst.")
+    parser.add_argument("--output", help="Also write the JSON report to this file.")
+    args = parser.parse_args(argv)
+
+    simulator = ExchangeSimulator(
+        seed=args.seed,
+        latency=args.latency,
+        latency_ms=args.latency_ms,
+        latency_spread=args.latency_spread,
+        failure_rate=args.failure_rate,
+        burst_probability=args.burst_probability,
+        burst_length=args.burst_length,
+    )
+    result = asyncio.run(
+        run(
+            [int(level) for level in args.concurrency.split(",")],
+            args.requests,
+            args.placement_mode,
+            args.db_url,
+            simulator,
+            args.seed,
+            args.drain,
+        )
+    )
+    report = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report)
+    print(report)
+    return result
+
+
+if __name__ == "__main__":
+    main()
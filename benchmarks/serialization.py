@@ -0,0 +1,74 @@
+"""
+Micro-benchmark of the `POST /orders` response serialization.
+
+Compares the CPU time per response of the generic path, which validates the order into
+`CreateOrderResponseModel`, dumps it in JSON mode and renders it with `APIResponse`, with the
+precompiled `created_order_body`. Needs no database and prints the result as JSON:
+
+    python -m benchmarks.serialization --iterations 100000
+"""
+
+import argparse
+import json
+import statistics
+import time
+from typing import Callable
+
+from app.models.order import CreateOrderResponseModel, Order
+from app.response_types import APIResponse
+from app.serializers import created_order_body
+
+ORDERS = [
+    Order(type="market", side="sell", instrument="XRPUSDT00006", quantity=500),
+    Order(type="limit", side="buy", instrument="ETHUSDT00004", quantity=2, limit_price="1800.25"),
+]
+
+
+def model_body(order: Order) -> bytes:
+    """Serialize an order the way the response model and `APIResponse` do."""
+    return APIResponse(CreateOrderResponseModel.model_validate(order).model_dump(mode="json")).body
+
+
+def time_serializer(serialize: Callable[[Order], bytes], iterations: int, rounds: int) -> dict:
+    """
+    Time `rounds` rounds of `iterations` serializations each, using the process CPU time.
+
+    Args:
+        serialize (Callable[[Order], bytes]): The serializer.
+        iterations (int): The number of serializations per round.
+        rounds (int): The number of rounds.
+
+    Returns:
+        dict: The best and the median round, as CPU time per response in microseconds.
+    """
+    per_response = []
+    for _ in range(rounds):
+        started = time.process_time()
+        for i in range(iterations):
+            serialize(ORDERS[i % len(ORDERS)])
+        per_response.append((time.process_time() - started) * 1_000_000 / iterations)
+    return {"min_us": round(min(per_response), 3), "median_us": round(statistics.median(per_response), 3)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=100_000, help="Number of responses per round.")
+    parser.add_argument("--rounds", type=int, default=5, help="Number of timed rounds per serializer.")
+    args = parser.parse_args()
+
+    for order in ORDERS:
+        assert created_order_body(order) == model_body(order)
+    model = time_serializer(model_body, args.iterations, args.rounds)
+    precompiled = time_serializer(created_order_body, args.iterations, args.rounds)
+    result = {
+        "iterations": args.iterations,
+        "rounds": args.rounds,
+        "response_model": model,
+        "precompiled": precompiled,
+        "saved_us_per_response": round(model["median_us"] - precompiled["median_us"], 3),
+    }
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+import statistics
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    """
+    Return the value at `fraction` of an ascending list, using the nearest rank.
+
+    Args:
+        sorted_values (list[float]): The values, sorted ascending.
+        fraction (float): The percentile as a fraction, e.g. 0.99.
+
+    Returns:
+        float: The percentile value.
+    """
+    return sorted_values[round(fraction * (len(sorted_values) - 1))]
+
+
+def summarize(latencies_ms: list[float]) -> dict:
+    """
+    Summarise latencies in milliseconds.
+
+    Args:
+        latencies_ms (list[float]): The latencies.
+
+    Returns:
+        dict: The median, 95th and 99th percentile and the maximum, rounded to microseconds.
+    """
+    values = sorted(latencies_ms)
+    if not values:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None, "max_ms": None}
+    return {
+        "p50_ms": round(statistics.median(values), 3),
+        "p95_ms": round(percentile(values, 0.95), 3),
+        "p99_ms": round(percentile(values, 0.99), 3),
+        "max_ms": round(values[-1], 3),
+    }
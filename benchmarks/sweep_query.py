@@ -0,0 +1,131 @@
+"""
+Benchmark of the retry sweep query with and without the backlog indexes.
+
+Seeds a scratch copy of the `order` table, times the claim query used by
+`OrderController._claim_orders` before and after creating the indexes of migration
+`3_..._order_indexes`, prints the result as JSON and drops the scratch table again:
+
+    python -m benchmarks.sweep_query --rows 3000000 --unplaced-ratio 0.001
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+import asyncpg
+
+from app.settings import settings
+from benchmarks.stats import summarize
+
+TABLE = "order_sweep_benchmark"
+
+CREATE_TABLE = f"""
+    CREATE TABLE "{TABLE}" (LIKE "order" INCLUDING DEFAULTS);
+"""
+
+# Orders are spread over `$1` rows, one second apart, and one in `$2` of them is left unplaced.
+SEED = f"""
+    INSERT INTO "{TABLE}" (
+        "id", "created_at", "updated_at", "type", "side", "instrument", "quantity", "order_placed_at", "attempts"
+    )
+    SELECT
+        md5(i::text)::uuid,
+        now() - (($1 - i) * interval '1 second'),
+        now(),
+        'market',
+        CASE WHEN i % 2 = 0 THEN 'buy' ELSE 'sell' END,
+        'INST' || lpad((i % 5000)::text, 8, '0'),
+        1 + i % 100,
+        CASE WHEN i % $2 = 0 THEN NULL ELSE now() END,
+        0
+    FROM generate_series(1, $1) AS i;
+"""
+
+CREATE_INDEXES = f"""
+    CREATE INDEX "{TABLE}_unplaced_created_at" ON "{TABLE}" ("created_at") WHERE "order_placed_at" IS NULL;
+    CREATE INDEX "{TABLE}_instrument_created_at" ON "{TABLE}" ("instrument", "created_at");
+"""
+
+SWEEP_QUERY = f"""
+    SELECT * FROM "{TABLE}"
+    WHERE "order_placed_at" IS NULL AND ("next_attempt_at" IS NULL OR "next_attempt_at" <= now())
+    ORDER BY "created_at"
+    LIMIT $1
+    FOR UPDATE SKIP LOCKED;
+"""
+
+BACKLOG_COUNT_QUERY = f"""
+    SELECT count(*) FROM "{TABLE}" WHERE "order_placed_at" IS NULL;
+"""
+
+
+async def time_query(connection: asyncpg.Connection, query: str, *args, runs: int) -> dict:
+    """
+    Run a query `runs` times, each inside a rolled back transaction, and summarise the latencies.
+
+    Args:
+        connection (asyncpg.Connection): The connection to run the query on.
+        query (str): The SQL query.
+        *args: The query parameters.
+        runs (int): The number of runs.
+
+    Returns:
+        dict: The latency percentiles in milliseconds.
+    """
+    latencies = []
+    for _ in range(runs):
+        transaction = connection.transaction()
+        await transaction.start()
+        started = time.perf_counter()
+        await connection.fetch(query, *args)
+        latencies.append((time.perf_counter() - started) * 1000)
+        await transaction.rollback()
+    return summarize(latencies)
+
+
+async def run(rows: int, unplaced_ratio: float, batch_size: int, runs: int) -> dict:
+    connection = await asyncpg.connect(
+        host=settings.POSTGRES_HOST,
+        port=settings.POSTGRES_PORT,
+        user=settings.POSTGRES_USER,
+        password=settings.POSTGRES_PASSWORD,
+        database=settings.POSTGRES_DB,
+    )
+    try:
+        await connection.execute(f'DROP TABLE IF EXISTS "{TABLE}"')
+        await connection.execute(CREATE_TABLE)
+        await connection.execute(SEED, rows, max(1, round(1 / unplaced_ratio)))
+        await connection.execute(f'ANALYZE "{TABLE}"')
+
+        result = {"rows": rows, "unplaced": await connection.fetchval(BACKLOG_COUNT_QUERY), "batch_size": batch_size}
+        result["before"] = {
+            "sweep": await time_query(connection, SWEEP_QUERY, batch_size, runs=runs),
+            "backlog_count": await time_query(connection, BACKLOG_COUNT_QUERY, runs=runs),
+        }
+
+        await connection.execute(CREATE_INDEXES)
+        await connection.execute(f'ANALYZE "{TABLE}"')
+        result["after"] = {
+            "sweep": await time_query(connection, SWEEP_QUERY, batch_size, runs=runs),
+            "backlog_count": await time_query(connection, BACKLOG_COUNT_QUERY, runs=runs),
+        }
+        return result
+    finally:
+        await connection.execute(f'DROP TABLE IF EXISTS "{TABLE}"')
+        await connection.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=3_000_000, help="Number of orders to seed.")
+    parser.add_argument("--unplaced-ratio", type=float, default=0.001, help="Share of the orders left unplaced.")
+    parser.add_argument("--batch-size", type=int, default=settings.DISPATCHER_BATCH_SIZE, help="Sweep batch size.")
+    parser.add_argument("--runs", type=int, default=20, help="Number of timed runs per query.")
+    args = parser.parse_args()
+    result = asyncio.run(run(args.rows, args.unplaced_ratio, args.batch_size, args.runs))
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    # Notifies the API workers listening on "order_events" of the orders inserted by any process, so that
+    # every worker counts every order in its per-instrument counters. The trigger runs once per statement
+    # and sends one notification per instrument and side, so a bulk insert or an import stays cheap.
+    # "first_id" keeps two identical counts of one transaction apart, Postgres would deliver them once.
+    return """
+        CREATE FUNCTION "order_notify_created"() RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_notify('order_events', json_build_object(
+        'event', 'orders_created',
+        'instrument', "instrument",
+        'side', "side",
+        'first_id', (array_agg("id"))[1],
+        'orders', COUNT(*),
+        'quantity', SUM("quantity"),
+        'unplaced_orders', COUNT(*) FILTER (WHERE "order_placed_at" IS NULL AND "failed_at" IS NULL),
+        'unplaced_quantity',
+            COALESCE(SUM("quantity") FILTER (WHERE "order_placed_at" IS NULL AND "failed_at" IS NULL), 0),
+        'unplaced_limit_notional', COALESCE(
+            SUM("quantity" * "limit_price") FILTER (WHERE "order_placed_at" IS NULL AND "failed_at" IS NULL), 0
+        )::TEXT
+    )::TEXT)
+    FROM "created_orders"
+    GROUP BY "instrument", "side";
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+        CREATE TRIGGER "order_notify_created" AFTER INSERT ON "order"
+            REFERENCING NEW TABLE AS "created_orders"
+            FOR EACH STATEMENT EXECUTE FUNCTION "order_notify_created"();"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP TRIGGER IF EXISTS "order_notify_created" ON "order";
+        DROP FUNCTION IF EXISTS "order_notify_created"();"""
@@ -0,0 +1,15 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    # Pending orders that were attempted before, i.e. leased, backing off or deferred, by instrument. A claim
+    # checks that no such order is older than the orders it takes, see "_claim_orders". The index replaces the
+    # aggregate over all pending orders that the claim ran before.
+    return """
+        CREATE INDEX "idx_order_waiting_instrument_created_at" ON "order" ("instrument", "created_at")
+            WHERE "order_placed_at" IS NULL AND "failed_at" IS NULL AND "next_attempt_at" IS NOT NULL;"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP INDEX IF EXISTS "idx_order_waiting_instrument_created_at";"""
@@ -0,0 +1,15 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE "order" ADD "attempts" INT NOT NULL DEFAULT 0;
+        ALTER TABLE "order" ADD "next_attempt_at" TIMESTAMPTZ;
+        ALTER TABLE "order" ADD "last_error" TEXT;"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE "order" DROP COLUMN "attempts";
+        ALTER TABLE "order" DROP COLUMN "next_attempt_at";
+        ALTER TABLE "order" DROP COLUMN "last_error";"""
@@ -0,0 +1,14 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        CREATE INDEX IF NOT EXISTS "idx_order_unplaced_created_at" ON "order" ("created_at")
+            WHERE "order_placed_at" IS NULL;
+        CREATE INDEX IF NOT EXISTS "idx_order_instrument_created_at" ON "order" ("instrument", "created_at");"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP INDEX IF EXISTS "idx_order_unplaced_created_at";
+        DROP INDEX IF EXISTS "idx_order_instrument_created_at";"""
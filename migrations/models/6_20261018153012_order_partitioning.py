@@ -0,0 +1,123 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    # Turns "order" into a table partitioned by month of "created_at". The existing rows are copied
+    # into monthly partitions, so on a large table this runs in a maintenance window.
+    # The primary key of a partitioned table has to contain the partition key, so uniqueness of
+    # "idempotency_key" is enforced through "order_idempotency_key", filled by a trigger.
+    # Rows outside the existing partitions end up in "order_default"; the partition maintenance job
+    # creates the partitions of the coming months ahead of time.
+    return """
+        ALTER TABLE "order" RENAME TO "order_legacy";
+        ALTER INDEX "order_pkey" RENAME TO "order_legacy_pkey";
+        ALTER INDEX "idx_order_unplaced_created_at" RENAME TO "idx_order_legacy_unplaced_created_at";
+        ALTER INDEX "idx_order_instrument_created_at" RENAME TO "idx_order_legacy_instrument_created_at";
+        ALTER INDEX "idx_order_created_at_id" RENAME TO "idx_order_legacy_created_at_id";
+        ALTER TABLE "order_legacy" DROP CONSTRAINT "order_idempotency_key_key";
+
+        CREATE TABLE "order" (
+    "id" UUID NOT NULL,
+    "created_at" TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "updated_at" TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "type" VARCHAR(6) NOT NULL,
+    "side" VARCHAR(4) NOT NULL,
+    "instrument" VARCHAR(12) NOT NULL,
+    "limit_price" DECIMAL(10,2),
+    "quantity" INT NOT NULL,
+    "order_placed_at" TIMESTAMPTZ,
+    "attempts" INT NOT NULL DEFAULT 0,
+    "next_attempt_at" TIMESTAMPTZ,
+    "last_error" TEXT,
+    "idempotency_key" VARCHAR(255),
+    PRIMARY KEY ("id", "created_at")
+) PARTITION BY RANGE ("created_at");
+COMMENT ON COLUMN "order"."type" IS 'MARKET: market\nLIMIT: limit';
+COMMENT ON COLUMN "order"."side" IS 'BUY: buy\nSELL: sell';
+        CREATE TABLE "order_default" PARTITION OF "order" DEFAULT;
+        CREATE INDEX "idx_order_unplaced_created_at" ON "order" ("created_at") WHERE "order_placed_at" IS NULL;
+        CREATE INDEX "idx_order_instrument_created_at" ON "order" ("instrument", "created_at");
+        CREATE INDEX "idx_order_created_at_id" ON "order" ("created_at", "id");
+        CREATE INDEX "idx_order_idempotency_key" ON "order" ("idempotency_key") WHERE "idempotency_key" IS NOT NULL;
+
+        CREATE TABLE "order_idempotency_key" (
+    "key" VARCHAR(255) NOT NULL PRIMARY KEY,
+    "order_id" UUID NOT NULL,
+    "created_at" TIMESTAMPTZ NOT NULL
+);
+        CREATE INDEX "idx_order_idempotency_key_created_at" ON "order_idempotency_key" ("created_at");
+        CREATE FUNCTION "order_claim_idempotency_key"() RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW."idempotency_key" IS NOT NULL THEN
+        INSERT INTO "order_idempotency_key" ("key", "order_id", "created_at")
+            VALUES (NEW."idempotency_key", NEW."id", NEW."created_at");
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+        CREATE TRIGGER "order_claim_idempotency_key" AFTER INSERT ON "order"
+            FOR EACH ROW EXECUTE FUNCTION "order_claim_idempotency_key"();
+
+        DO $$
+DECLARE
+    month DATE;
+BEGIN
+    FOR month IN
+        SELECT generate_series(
+            date_trunc('month', (SELECT COALESCE(min("created_at"), now()) FROM "order_legacy") AT TIME ZONE 'UTC'),
+            date_trunc('month', now() AT TIME ZONE 'UTC') + INTERVAL '1 month',
+            INTERVAL '1 month'
+        )::DATE
+    LOOP
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF "order" FOR VALUES FROM (%L) TO (%L)',
+            'order_p' || to_char(month, 'YYYY_MM'),
+            month::TIMESTAMP AT TIME ZONE 'UTC',
+            (month + INTERVAL '1 month')::TIMESTAMP AT TIME ZONE 'UTC'
+        );
+    END LOOP;
+END;
+$$;
+        INSERT INTO "order" SELECT
+            "id", "created_at", "updated_at", "type", "side", "instrument", "limit_price", "quantity",
+            "order_placed_at", "attempts", "next_attempt_at", "last_error", "idempotency_key"
+        FROM "order_legacy";
+        DROP TABLE "order_legacy";
+        CREATE SCHEMA IF NOT EXISTS "order_archive";"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    # Archived partitions are not restored, they stay in the "order_archive" schema.
+    return """
+        ALTER TABLE "order" RENAME TO "order_partitioned";
+        ALTER INDEX "order_pkey" RENAME TO "order_partitioned_pkey";
+        ALTER INDEX "idx_order_unplaced_created_at" RENAME TO "idx_order_partitioned_unplaced_created_at";
+        ALTER INDEX "idx_order_instrument_created_at" RENAME TO "idx_order_partitioned_instrument_created_at";
+        ALTER INDEX "idx_order_created_at_id" RENAME TO "idx_order_partitioned_created_at_id";
+        CREATE TABLE "order" (
+    "id" UUID NOT NULL PRIMARY KEY,
+    "created_at" TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "updated_at" TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "type" VARCHAR(6) NOT NULL,
+    "side" VARCHAR(4) NOT NULL,
+    "instrument" VARCHAR(12) NOT NULL,
+    "limit_price" DECIMAL(10,2),
+    "quantity" INT NOT NULL,
+    "order_placed_at" TIMESTAMPTZ,
+    "attempts" INT NOT NULL DEFAULT 0,
+    "next_attempt_at" TIMESTAMPTZ,
+    "last_error" TEXT,
+    "idempotency_key" VARCHAR(255) UNIQUE
+);
+COMMENT ON COLUMN "order"."type" IS 'MARKET: market\nLIMIT: limit';
+COMMENT ON COLUMN "order"."side" IS 'BUY: buy\nSELL: sell';
+        INSERT INTO "order" SELECT
+            "id", "created_at", "updated_at", "type", "side", "instrument", "limit_price", "quantity",
+            "order_placed_at", "attempts", "next_attempt_at", "last_error", "idempotency_key"
+        FROM "order_partitioned";
+        DROP TABLE "order_partitioned";
+        DROP TABLE "order_idempotency_key";
+        DROP FUNCTION "order_claim_idempotency_key"();
+        CREATE INDEX "idx_order_unplaced_created_at" ON "order" ("created_at") WHERE "order_placed_at" IS NULL;
+        CREATE INDEX "idx_order_instrument_created_at" ON "order" ("instrument", "created_at");
+        CREATE INDEX "idx_order_created_at_id" ON "order" ("created_at", "id");"""
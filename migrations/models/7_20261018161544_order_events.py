@@ -0,0 +1,27 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    # Notifies the API workers listening on "order_events" whenever an order is placed, by any process.
+    # Notifications are only delivered once the transaction commits.
+    return """
+        CREATE FUNCTION "order_notify_placed"() RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_notify('order_events', json_build_object(
+        'event', 'order_placed',
+        'id', NEW."id",
+        'instrument', NEW."instrument",
+        'order_placed_at', NEW."order_placed_at"
+    )::TEXT);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+        CREATE TRIGGER "order_notify_placed" AFTER UPDATE OF "order_placed_at" ON "order"
+            FOR EACH ROW WHEN (OLD."order_placed_at" IS NULL AND NEW."order_placed_at" IS NOT NULL)
+            EXECUTE FUNCTION "order_notify_placed"();"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP TRIGGER IF EXISTS "order_notify_placed" ON "order";
+        DROP FUNCTION IF EXISTS "order_notify_placed"();"""
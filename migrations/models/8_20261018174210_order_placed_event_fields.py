@@ -0,0 +1,36 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    # Adds the side, quantity and limit price of the order to the "order_placed" notification, so that
+    # the API workers can update their per-instrument counters without querying the order.
+    return """
+        CREATE OR REPLACE FUNCTION "order_notify_placed"() RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_notify('order_events', json_build_object(
+        'event', 'order_placed',
+        'id', NEW."id",
+        'instrument', NEW."instrument",
+        'side', NEW."side",
+        'quantity', NEW."quantity",
+        'limit_price', NEW."limit_price"::TEXT,
+        'order_placed_at', NEW."order_placed_at"
+    )::TEXT);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        CREATE OR REPLACE FUNCTION "order_notify_placed"() RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_notify('order_events', json_build_object(
+        'event', 'order_placed',
+        'id', NEW."id",
+        'instrument', NEW."instrument",
+        'order_placed_at', NEW."order_placed_at"
+    )::TEXT);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;"""
@@ -0,0 +1,39 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    # Orders rejected by their venue or out of placement attempts are given up and marked with "failed_at".
+    # They are no longer pending, so the index of the pending orders leaves them out, and the API workers
+    # are notified on "order_events" like for placements.
+    return """
+        ALTER TABLE "order" ADD "failed_at" TIMESTAMPTZ;
+        DROP INDEX IF EXISTS "idx_order_unplaced_created_at";
+        CREATE INDEX "idx_order_unplaced_created_at" ON "order" ("created_at")
+            WHERE "order_placed_at" IS NULL AND "failed_at" IS NULL;
+        CREATE FUNCTION "order_notify_failed"() RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_notify('order_events', json_build_object(
+        'event', 'order_failed',
+        'id', NEW."id",
+        'instrument', NEW."instrument",
+        'side', NEW."side",
+        'quantity', NEW."quantity",
+        'limit_price', NEW."limit_price"::TEXT,
+        'failed_at', NEW."failed_at",
+        'error', NEW."last_error"
+    )::TEXT);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+        CREATE TRIGGER "order_notify_failed" AFTER UPDATE OF "failed_at" ON "order"
+            FOR EACH ROW WHEN (OLD."failed_at" IS NULL AND NEW."failed_at" IS NOT NULL)
+            EXECUTE FUNCTION "order_notify_failed"();"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP TRIGGER IF EXISTS "order_notify_failed" ON "order";
+        DROP FUNCTION IF EXISTS "order_notify_failed"();
+        DROP INDEX IF EXISTS "idx_order_unplaced_created_at";
+        CREATE INDEX "idx_order_unplaced_created_at" ON "order" ("created_at") WHERE "order_placed_at" IS NULL;
+        ALTER TABLE "order" DROP COLUMN "failed_at";"""
@@ -5,8 +5,7 @@ https://packaging.python.org/en/latest/distributing.html
 https://github.com/pypa/sampleproject
 """
 
-from glob import glob
-from os.path import abspath, basename, dirname, join, splitext
+from os.path import abspath, dirname, join
 
 import setuptools
 
@@ -19,10 +18,9 @@ setuptools.setup(
     name="app",
     version="0.0.1",
     install_requires=requirements,
-    packages=setuptools.find_packages("app"),
-    package_dir={"": "app"},
-    py_modules=[splitext(basename(path))[0] for path in glob("app/*.py")],
+    packages=setuptools.find_packages(include=["app", "app.*"]),
     include_package_data=True,
+    entry_points={"console_scripts": ["quicktrade-import = app.importer:main"]},
     classifiers=[
         "Programming Language :: Python :: 3",
         "Operating System :: OS Independent",
@@ -3,12 +3,12 @@ from typing import Iterator
 
 import pytest as pytest
 import pytest_asyncio
-from settings import DB_CONFIG
 from starlette.testclient import TestClient
 from tortoise import Tortoise, generate_config
 from tortoise.contrib.fastapi import RegisterTortoise
 
 from app.api import app
+from app.settings import DB_CONFIG
 
 
 @pytest.fixture(scope="session")
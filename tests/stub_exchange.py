@@ -0,0 +1,34 @@
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+
+class StubExchange:
+    """
+    In-process stand-in for a venue with an HTTP API.
+
+    Accepts every order, except those of an instrument in `rejected_instruments`, and records the
+    ids of the placed orders and the size of every batch call.
+    """
+
+    def __init__(self, rejected_instruments: tuple[str, ...] = ()) -> None:
+        self.rejected_instruments = rejected_instruments
+        self.placed: list[str] = []
+        self.batch_sizes: list[int] = []
+        self.app = FastAPI()
+        self.app.post("/orders")(self.place)
+        self.app.post("/orders/batch")(self.place_batch)
+
+    def _place(self, order: dict) -> dict:
+        if order["instrument"] in self.rejected_instruments:
+            return {"status": "rejected", "error": f"Instrument {order['instrument']} is halted"}
+        self.placed.append(order["id"])
+        return {"status": "placed"}
+
+    async def place(self, request: Request) -> JSONResponse:
+        result = self._place(await request.json())
+        return JSONResponse(result, status_code=200 if result["status"] == "placed" else 422)
+
+    async def place_batch(self, request: Request) -> JSONResponse:
+        orders = (await request.json())["orders"]
+        self.batch_sizes.append(len(orders))
+        return JSONResponse({"results": [self._place(order) for order in orders]})
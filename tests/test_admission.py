@@ -0,0 +1,109 @@
+import asyncio
+import uuid
+from unittest import mock
+
+import pytest
+from starlette.exceptions import HTTPException
+
+from app.cache import LRUCache
+from app.controllers.admission import RATE_LIMITED_MESSAGE, AdmissionController, admission_controller
+
+
+def make_controller(**limits) -> AdmissionController:
+    return AdmissionController(
+        **{
+            "max_concurrency": 2,
+            "max_queue": 2,
+            "queue_timeout": 1,
+            "rate": 0,
+            "burst": 1,
+            "max_clients": 100,
+            **limits,
+        }
+    )
+
+
+@pytest.mark.asyncio
+async def test_requests_over_the_limit_wait_in_order_and_are_shed_once_the_queue_is_full():
+    # Arrange
+    controller = make_controller()
+    await controller.acquire("a")
+    await controller.acquire("a")
+    admitted = []
+
+    async def request(name: str) -> None:
+        await controller.acquire("a")
+        admitted.append(name)
+
+    first = asyncio.create_task(request("first"))
+    second = asyncio.create_task(request("second"))
+    await asyncio.sleep(0)
+
+    # Act
+    with pytest.raises(HTTPException) as rejected:
+        await controller.acquire("a")
+    controller.release()
+    controller.release()
+    await asyncio.gather(first, second)
+
+    # Assert
+    assert rejected.value.status_code == 503
+    assert admitted == ["first", "second"]
+    assert controller.stats() == {"in_flight": 2, "queued": 0, "max_concurrency": 2}
+
+
+@pytest.mark.asyncio
+async def test_a_request_not_admitted_in_time_is_rejected_and_leaves_the_queue():
+    # Arrange
+    controller = make_controller(max_concurrency=1, queue_timeout=0.01)
+    await controller.acquire("a")
+
+    # Act
+    with pytest.raises(HTTPException) as rejected:
+        await controller.acquire("a")
+    controller.release()
+
+    # Assert
+    assert rejected.value.status_code == 503
+    assert controller.stats() == {"in_flight": 0, "queued": 0, "max_concurrency": 1}
+
+
+@pytest.mark.asyncio
+async def test_every_client_is_rate_limited_by_its_own_token_bucket():
+    # Arrange
+    controller = make_controller(max_concurrency=0, rate=1, burst=2)
+
+    # Act
+    await controller.acquire("a")
+    await controller.acquire("a")
+    with pytest.raises(HTTPException) as rejected:
+        await controller.acquire("a")
+    await controller.acquire("b")
+
+    # Assert
+    assert rejected.value.status_code == 429
+    assert rejected.value.headers == {"Retry-After": "1"}
+
+
+def test_rejected_requests_are_answered_in_the_error_envelope(client):
+    # Arrange
+    path = f"/orders/{uuid.uuid4()}"
+
+    # Act
+    with (
+        mock.patch.object(admission_controller, "rate", 1),
+        mock.patch.object(admission_controller, "burst", 1),
+        mock.patch.object(admission_controller, "_buckets", LRUCache(10)),
+    ):
+        admitted = client.get(path)
+        limited = client.get(path)
+        exempt = client.get("/healthcheck")
+
+    # Assert
+    assert admitted.status_code == 404
+    assert limited.status_code == 429
+    assert limited.headers["Retry-After"] == "1"
+    assert limited.json()["success"] is False
+    assert limited.json()["error"] == {"msg": RATE_LIMITED_MESSAGE}
+    assert exempt.status_code == 200
+    assert exempt.json()["data"]["admission"]["in_flight"] == 0
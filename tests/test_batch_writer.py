@@ -0,0 +1,61 @@
+import asyncio
+from unittest import mock
+
+import pytest
+
+from app.controllers.batch_writer import BatchWriter
+from app.controllers.order import OrderController
+from app.models.order import CreateOrderModel, Order
+from app.settings import settings
+
+
+@pytest.mark.asyncio
+async def test_concurrent_writes_are_flushed_together():
+    # Arrange
+    flush = mock.AsyncMock()
+    writer = BatchWriter(name="test", flush=flush, max_batch_size=10, max_delay=0.01)
+
+    # Act
+    await asyncio.gather(*(writer.write(item) for item in range(3)))
+
+    # Assert
+    flush.assert_awaited_once_with([0, 1, 2])
+
+
+@pytest.mark.asyncio
+async def test_full_batch_is_flushed_without_waiting():
+    # Arrange
+    flush = mock.AsyncMock()
+    writer = BatchWriter(name="test", flush=flush, max_batch_size=2, max_delay=60)
+
+    # Act
+    await asyncio.wait_for(asyncio.gather(*(writer.write(item) for item in range(4))), timeout=1)
+
+    # Assert
+    assert flush.await_args_list == [mock.call([0, 1]), mock.call([2, 3])]
+
+
+@pytest.mark.asyncio
+async def test_flush_error_is_raised_to_every_writer():
+    # Arrange
+    flush = mock.AsyncMock(side_effect=RuntimeError("database unavailable"))
+    writer = BatchWriter(name="test", flush=flush, max_batch_size=10, max_delay=0.001)
+
+    # Act
+    results = await asyncio.gather(writer.write(1), writer.write(2), return_exceptions=True)
+
+    # Assert
+    assert [str(result) for result in results] == ["database unavailable"] * 2
+
+
+@pytest.mark.asyncio
+@mock.patch.object(settings, "ORDER_WRITE_COALESCING", True)
+async def test_create_order_with_write_coalescing():
+    # Arrange
+    model = CreateOrderModel(type="market", side="buy", instrument="SOLUSDT00003", quantity=3)
+
+    # Act
+    orders = await asyncio.gather(*(OrderController.create(model) for _ in range(5)))
+
+    # Assert
+    assert await Order.filter(id__in=[order.id for order in orders]).count() == 5
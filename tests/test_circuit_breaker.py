@@ -0,0 +1,171 @@
+from unittest import mock
+
+import pytest
+from tortoise.expressions import Q
+
+from app.controllers.circuit_breaker import (
+    STATE_CLOSED,
+    STATE_HALF_OPEN,
+    STATE_OPEN,
+    CircuitBreaker,
+    CircuitOpenError,
+)
+from app.controllers.order import OrderController, exchange_registry
+from app.controllers.stock_exchange import OrderPlacementError
+from app.models.order import CreateOrderModel
+
+
+def make_breaker(open_seconds: float = 60) -> CircuitBreaker:
+    return CircuitBreaker(
+        name="test",
+        failure_exceptions=(OrderPlacementError,),
+        failure_rate_threshold=0.5,
+        window_size=4,
+        minimum_calls=4,
+        open_seconds=open_seconds,
+        half_open_calls=1,
+    )
+
+
+async def succeed() -> str:
+    return "placed"
+
+
+async def fail() -> None:
+    raise OrderPlacementError("Connection not available")
+
+
+@pytest.mark.asyncio
+async def test_breaker_opens_once_failure_rate_is_reached():
+    # Arrange
+    breaker = make_breaker()
+
+    # Act
+    for func in (succeed, fail, succeed, fail):
+        try:
+            await breaker.call(func)
+        except OrderPlacementError:
+            pass
+
+    # Assert
+    assert breaker.state == STATE_OPEN
+    with pytest.raises(CircuitOpenError):
+        await breaker.call(succeed)
+
+
+@pytest.mark.asyncio
+async def test_breaker_ignores_unlisted_exceptions():
+    # Arrange
+    breaker = make_breaker()
+
+    async def saturated() -> None:
+        raise RuntimeError("saturated")
+
+    # Act
+    for _ in range(4):
+        with pytest.raises(RuntimeError):
+            await breaker.call(saturated)
+
+    # Assert
+    assert breaker.state == STATE_CLOSED
+
+
+@pytest.mark.parametrize("trial, expected_state", [(succeed, STATE_CLOSED), (fail, STATE_OPEN)])
+@pytest.mark.asyncio
+async def test_half_open_breaker_is_decided_by_trial_call(trial, expected_state):
+    # Arrange
+    breaker = make_breaker(open_seconds=0)
+    for _ in range(4):
+        with pytest.raises(OrderPlacementError):
+            await breaker.call(fail)
+    breaker.open_seconds = 60
+    breaker._opened_at -= 60
+    assert breaker.state == STATE_HALF_OPEN
+
+    # Act
+    try:
+        await breaker.call(trial)
+    except OrderPlacementError:
+        pass
+
+    # Assert
+    assert breaker._state == expected_state
+
+
+@pytest.mark.asyncio
+@mock.patch("app.controllers.order.place_order")
+async def test_open_breaker_skips_exchange(mock_place_order):
+    # Arrange
+    breaker = make_breaker()
+    breaker._transition(STATE_OPEN)
+    order = await OrderController.create(
+        CreateOrderModel(type="market", side="sell", instrument="BNBUSDT00002", quantity=1)
+    )
+
+    # Act
+    with mock.patch.object(exchange_registry.default, "breaker", breaker):
+        placed = await OrderController._place_order(order)
+        claimed = await OrderController.place_failed_orders()
+
+    # Assert
+    assert placed is False
+    assert claimed == 0
+    mock_place_order.assert_not_called()
+    await order.refresh_from_db()
+    assert order.order_placed_at is None
+    assert order.last_error == "Circuit breaker `test` is open"
+
+
+@pytest.mark.asyncio
+@mock.patch("app.controllers.order.place_order")
+async def test_open_breaker_does_not_count_an_attempt(mock_place_order):
+    # Arrange
+    breaker = make_breaker()
+    breaker._transition(STATE_OPEN)
+    order = await OrderController.create(
+        CreateOrderModel(type="market", side="buy", instrument="BNBUSDT00003", quantity=1)
+    )
+    [claimed] = await OrderController._claim_orders(1, instruments=Q(id=order.id))
+
+    # Act
+    with mock.patch.object(exchange_registry.default, "breaker", breaker):
+        placed = await OrderController._place_order(claimed)
+
+    # Assert
+    assert placed is False
+    mock_place_order.assert_not_called()
+    await order.refresh_from_db()
+    assert order.attempts == 0
+    assert order.next_attempt_at is None
+    assert order.failed_at is None
+
+
+@pytest.mark.asyncio
+async def test_half_open_breaker_claims_its_trial_calls_only():
+    # Arrange
+    breaker = make_breaker(open_seconds=0)
+    breaker._transition(STATE_OPEN)
+    for number in range(3):
+        await OrderController.create(
+            CreateOrderModel(type="market", side="buy", instrument=f"ETHUSDT0000{number}", quantity=1)
+        )
+
+    # Act
+    with (
+        mock.patch.object(exchange_registry.default, "breaker", breaker),
+        mock.patch("app.controllers.order.placement_scheduler.run") as mock_run,
+    ):
+        claimed = await OrderController.place_failed_orders()
+
+    # Assert
+    assert breaker.state == STATE_HALF_OPEN
+    assert claimed == breaker.half_open_calls == 1
+    assert len(mock_run.call_args.args[0]) == 1
+
+
+def test_health_reports_circuit_breaker(client):
+    # Act
+    response = client.get("/healthcheck")
+
+    # Assert
+    assert response.json()["data"]["exchange"]["circuit_breaker"]["state"] == STATE_CLOSED
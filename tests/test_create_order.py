@@ -2,12 +2,15 @@ from unittest import mock
 from uuid import UUID
 
 import pytest
-from controllers.stock_exchange import OrderPlacementError
-from exception_handlers import DEFAULT_PROD_CLIENT_ERROR_MESSAGE
+
+from app.controllers.stock_exchange import OrderPlacementError
+from app.exception_handlers import DEFAULT_PROD_CLIENT_ERROR_MESSAGE
+from app.models.order import Order
+from app.settings import PLACEMENT_MODE_INLINE, settings
 
 
 @pytest.mark.asyncio
-@mock.patch("controllers.order.place_order")
+@mock.patch("app.controllers.order.place_order")
 async def test_create_order(mock_place_order, client):
     # Arrange
     mock_place_order.return_value = None
@@ -72,14 +75,16 @@ async def test_create_order_limit_price_error(mock_place_order, client, data_in)
 
 
 @pytest.mark.asyncio
-@mock.patch("controllers.order.place_order")
+@mock.patch("app.controllers.order.place_order")
+@mock.patch.object(settings, "PLACEMENT_MODE", PLACEMENT_MODE_INLINE)
 async def test_create_order_place_order_error(mock_place_order, client):
     # Arrange
     mock_place_order.side_effect = OrderPlacementError("Invalid order placement")
+    # An instrument of its own, so that no pending order of another test holds back the inline placement.
     data = {
         "type": "market",
         "side": "sell",
-        "instrument": "XRPUSDT00006",
+        "instrument": "XRPUSDT00007",
         "quantity": 500,
     }
 
@@ -93,8 +98,9 @@ async def test_create_order_place_order_error(mock_place_order, client):
     order_id = response_data["data"].pop("id", None)
     assert UUID(order_id)
     assert response_data["data"] == {**data, "limit_price": None}
-
-    # todo: fix test database
-    # order = await OrderController.get_order_by_id(order_id)
-    # assert order
-    # assert order.order_placed_at is None
+    mock_place_order.assert_called_once()
+    order = await Order.get(id=order_id)
+    assert order.order_placed_at is None
+    assert order.failed_at is None
+    assert order.last_error == "Invalid order placement"
+    assert order.next_attempt_at is not None
@@ -0,0 +1,44 @@
+from decimal import Decimal
+from unittest import mock
+from uuid import UUID
+
+import pytest
+
+from app.controllers.order import OrderController
+from app.exception_handlers import DEFAULT_PROD_CLIENT_ERROR_MESSAGE
+
+
+@pytest.mark.asyncio
+@mock.patch("app.controllers.order.place_order")
+async def test_create_orders_batch(mock_place_order, client):
+    # Arrange
+    data = [
+        {"type": "market", "side": "buy", "instrument": "XRPUSDT00006", "quantity": 5},
+        {"type": "limit", "side": "sell", "instrument": "INSTRUMENT"},
+        {"type": "limit", "side": "sell", "instrument": "DOTUSDT00008", "quantity": 7, "limit_price": "12.50"},
+    ]
+
+    # Act
+    response = client.post("/orders/batch", json=data)
+
+    # Assert
+    assert response.status_code == 201
+    results = response.json()["data"]["orders"]
+    assert [result["status"] for result in results] == ["created", "invalid", "created"]
+    assert results[1]["error"] == {"message": DEFAULT_PROD_CLIENT_ERROR_MESSAGE}
+    assert Decimal(results[2]["order"]["limit_price"]) == Decimal("12.50")
+    mock_place_order.assert_not_called()
+    for result in (results[0], results[2]):
+        order = await OrderController.get_order_by_id(UUID(result["order"]["id"]))
+        assert order.instrument == result["order"]["instrument"]
+        assert order.order_placed_at is None
+
+
+@pytest.mark.parametrize("data", [[], {"type": "market"}, [{}] * 1001])
+def test_create_orders_batch_invalid_body(client, data):
+    # Act
+    response = client.post("/orders/batch", json=data)
+
+    # Assert
+    assert response.status_code == 400
+    assert response.json()["error"] == {"message": DEFAULT_PROD_CLIENT_ERROR_MESSAGE}
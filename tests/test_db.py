@@ -0,0 +1,34 @@
+from unittest import mock
+
+from app.db import read_connection
+from app.metrics import DBPoolCollector
+
+
+def test_read_connection_falls_back_to_default_without_replica():
+    # Act
+    connection = read_connection()
+
+    # Assert
+    assert connection is None
+
+
+def test_db_pool_collector_reports_pool_utilisation():
+    # Arrange
+    pool = mock.Mock(
+        get_size=mock.Mock(return_value=8),
+        get_idle_size=mock.Mock(return_value=3),
+        get_max_size=mock.Mock(return_value=10),
+    )
+    client = mock.Mock(connection_name="read", _pool=pool)
+
+    # Act
+    with mock.patch("app.metrics.connections.all", return_value=[client]):
+        metrics = {metric.name: metric.samples[0].value for metric in DBPoolCollector().collect()}
+
+    # Assert
+    assert metrics == {
+        "quiktrade_db_pool_size": 8,
+        "quiktrade_db_pool_idle": 3,
+        "quiktrade_db_pool_in_use": 5,
+        "quiktrade_db_pool_max_size": 10,
+    }
@@ -0,0 +1,72 @@
+from decimal import Decimal
+from unittest import mock
+
+import orjson
+import pytest
+from fastapi.exceptions import RequestValidationError
+
+from app.decoders import decode_order, decode_order_batch
+from app.exception_handlers import DEFAULT_PROD_CLIENT_ERROR_MESSAGE
+from app.settings import settings
+
+MARKET_ORDER = {"type": "market", "side": "buy", "instrument": "XRPUSDT00006", "quantity": 5}
+LIMIT_ORDER = {"type": "limit", "side": "sell", "instrument": "DOTUSDT00008", "quantity": 7, "limit_price": "12.50"}
+
+
+@pytest.fixture(params=[True, False], ids=["fast", "legacy"], autouse=True)
+def fast_decoding(request):
+    with mock.patch.object(settings, "ORDER_FAST_DECODING", request.param):
+        yield request.param
+
+
+@pytest.mark.parametrize("data", [MARKET_ORDER, LIMIT_ORDER])
+def test_decode_order(data):
+    # Act
+    model = decode_order(orjson.dumps(data))
+
+    # Assert
+    assert model.model_dump(exclude_unset=True) == {
+        **data,
+        **({"limit_price": Decimal(data["limit_price"])} if "limit_price" in data else {}),
+    }
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        orjson.dumps({**MARKET_ORDER, "limit_price": "10.00"}),
+        orjson.dumps({**MARKET_ORDER, "limit_price": 0}),
+        orjson.dumps({**LIMIT_ORDER, "limit_price": None}),
+        orjson.dumps({**LIMIT_ORDER, "limit_price": 0}),
+        orjson.dumps({**LIMIT_ORDER, "limit_price": "-1.00"}),
+        orjson.dumps({**MARKET_ORDER, "instrument": "XRPUSDT"}),
+        orjson.dumps({**MARKET_ORDER, "type": "stop"}),
+        orjson.dumps({**LIMIT_ORDER, "limit_price": "12.505"}),
+        b'{"type": "market"',
+    ],
+)
+def test_decode_order_invalid(body):
+    # Act / Assert
+    with pytest.raises(RequestValidationError):
+        decode_order(body)
+
+
+def test_decode_order_batch_keeps_valid_items():
+    # Arrange
+    body = orjson.dumps([MARKET_ORDER, {**LIMIT_ORDER, "limit_price": None}, LIMIT_ORDER])
+
+    # Act
+    models = decode_order_batch(body)
+
+    # Assert
+    assert [model is None for model in models] == [False, True, False]
+    assert models[2].limit_price == Decimal("12.50")
+
+
+def test_create_order_rejects_a_market_order_with_limit_price(client):
+    # Act
+    response = client.post("/orders", json={**MARKET_ORDER, "limit_price": "10.00"})
+
+    # Assert
+    assert response.status_code == 400
+    assert response.json()["error"] == {"message": DEFAULT_PROD_CLIENT_ERROR_MESSAGE}
@@ -0,0 +1,256 @@
+import asyncio
+from unittest import mock
+
+import pytest
+
+from app.controllers.exchange_adapters import OrderRejectedError
+from app.controllers.order import OrderController, order_ack_writer
+from app.controllers.stock_exchange import OrderPlacementError
+from app.dispatcher import dispatch
+from app.models.order import CreateOrderModel, Order
+from app.settings import PLACEMENT_MODE_INLINE, settings
+
+ORDER_DATA = {
+    "type": "market",
+    "side": "buy",
+    "instrument": "ADAUSDT00001",
+    "quantity": 10,
+}
+
+
+@pytest.mark.asyncio
+@mock.patch("app.controllers.order.place_order")
+async def test_create_order_leaves_placement_to_dispatcher(mock_place_order, client):
+    # Act
+    response = client.post("/orders", json=ORDER_DATA)
+
+    # Assert
+    assert response.status_code == 201
+    mock_place_order.assert_not_called()
+    order = await OrderController.get_order_by_id(response.json()["data"]["id"])
+    assert order.order_placed_at is None
+
+
+@pytest.mark.asyncio
+@mock.patch("app.controllers.order.place_order")
+async def test_place_failed_orders_places_pending_orders(mock_place_order):
+    # Arrange
+    await Order.filter(order_placed_at__isnull=True).delete()
+    orders = [await OrderController.create(CreateOrderModel(**ORDER_DATA)) for _ in range(3)]
+
+    # Act
+    claimed = await OrderController.place_failed_orders(batch_size=2)
+
+    # Assert
+    assert claimed == 2
+    assert mock_place_order.call_count == 2
+    assert await Order.filter(id__in=[order.id for order in orders], order_placed_at__isnull=True).count() == 1
+
+
+@pytest.mark.asyncio
+@mock.patch("app.controllers.order.place_order")
+async def test_dispatch_drains_backlog_until_stopped(mock_place_order):
+    # Arrange
+    await Order.filter(order_placed_at__isnull=True).delete()
+    for _ in range(3):
+        await OrderController.create(CreateOrderModel(**ORDER_DATA))
+    stop = asyncio.Event()
+
+    # Act
+    task = asyncio.ensure_future(dispatch(stop))
+    while await Order.filter(order_placed_at__isnull=True).exists():
+        await asyncio.sleep(0.01)
+    stop.set()
+    await asyncio.wait_for(task, timeout=5)
+
+    # Assert
+    assert mock_place_order.call_count == 3
+
+
+@pytest.mark.asyncio
+@mock.patch("app.controllers.order.place_order")
+async def test_failed_placement_is_rescheduled_with_backoff(mock_place_order):
+    # Arrange
+    await Order.filter(order_placed_at__isnull=True).delete()
+    mock_place_order.side_effect = OrderPlacementError("Connection not available")
+    order = await OrderController.create(CreateOrderModel(**ORDER_DATA))
+
+    # Act
+    first = await OrderController.place_failed_orders()
+    second = await OrderController.place_failed_orders()
+
+    # Assert
+    assert first == 1
+    assert second == 0
+    await order.refresh_from_db()
+    assert order.order_placed_at is None
+    assert order.attempts == 1
+    assert order.last_error == "Connection not available"
+    assert order.next_attempt_at > order.created_at
+
+
+@pytest.mark.asyncio
+@mock.patch("app.controllers.order.place_order")
+async def test_new_orders_do_not_overtake_an_older_order_backing_off(mock_place_order):
+    # Arrange
+    await Order.filter(order_placed_at__isnull=True).delete()
+    mock_place_order.side_effect = OrderPlacementError("Connection not available")
+    failed = await OrderController.create(CreateOrderModel(**ORDER_DATA))
+    await OrderController.place_failed_orders()
+    mock_place_order.side_effect = None
+    later = await OrderController.create(CreateOrderModel(**ORDER_DATA))
+    other = await OrderController.create(CreateOrderModel(**{**ORDER_DATA, "instrument": "DOTUSDT00001"}))
+
+    # Act
+    while_backing_off = await OrderController.place_failed_orders()
+    await Order.filter(id=failed.id).update(next_attempt_at=None)
+    once_due = await OrderController.place_failed_orders()
+
+    # Assert
+    assert while_backing_off == 1
+    assert once_due == 2
+    placed = [call.args[0].id for call in mock_place_order.call_args_list]
+    assert placed == [failed.id, other.id, failed.id, later.id]
+
+
+@pytest.mark.asyncio
+@mock.patch("app.controllers.order.place_order")
+async def test_rejected_order_does_not_hold_back_the_next_order_of_its_instrument(mock_place_order):
+    # Arrange
+    await Order.filter(order_placed_at__isnull=True).delete()
+    rejected = await OrderController.create(CreateOrderModel(**ORDER_DATA))
+    later = await OrderController.create(CreateOrderModel(**ORDER_DATA))
+    mock_place_order.side_effect = [OrderRejectedError("Rejected by venue"), None]
+
+    # Act
+    claimed = await OrderController.place_failed_orders()
+    claimed_again = await OrderController.place_failed_orders()
+
+    # Assert
+    assert claimed == 2
+    assert claimed_again == 0
+    assert [call.args[0].id for call in mock_place_order.call_args_list] == [rejected.id, later.id]
+    await rejected.refresh_from_db()
+    await later.refresh_from_db()
+    assert rejected.failed_at is not None
+    assert rejected.next_attempt_at is None
+    assert rejected.last_error == "Rejected by venue"
+    assert later.order_placed_at is not None
+
+
+@pytest.mark.asyncio
+@mock.patch.object(settings, "SWEEPER_MAX_ATTEMPTS", 2)
+@mock.patch("app.controllers.order.place_order")
+async def test_order_is_given_up_after_max_attempts(mock_place_order):
+    # Arrange
+    await Order.filter(order_placed_at__isnull=True).delete()
+    mock_place_order.side_effect = OrderPlacementError("Connection not available")
+    order = await OrderController.create(CreateOrderModel(**ORDER_DATA))
+
+    # Act
+    await OrderController.place_failed_orders()
+    await Order.filter(id=order.id).update(next_attempt_at=None)
+    await OrderController.place_failed_orders()
+    claimed_after_giving_up = await OrderController.place_failed_orders()
+
+    # Assert
+    assert claimed_after_giving_up == 0
+    assert mock_place_order.call_count == 2
+    await order.refresh_from_db()
+    assert order.attempts == 2
+    assert order.failed_at is not None
+    assert await OrderController.count_unplaced_orders() == 0
+
+
+@pytest.mark.asyncio
+@mock.patch("app.controllers.order.place_order")
+async def test_leased_order_holds_back_the_later_orders_of_its_instrument(mock_place_order):
+    # Arrange
+    await Order.filter(order_placed_at__isnull=True).delete()
+    leased = await OrderController.create(CreateOrderModel(**ORDER_DATA))
+    await OrderController.create(CreateOrderModel(**ORDER_DATA))
+    other = await OrderController.create(CreateOrderModel(**{**ORDER_DATA, "instrument": "DOTUSDT00001"}))
+
+    # Act
+    first = await OrderController._claim_orders(batch_size=1)
+    second = await OrderController._claim_orders(batch_size=10)
+
+    # Assert
+    assert [order.id for order in first] == [leased.id]
+    assert [order.id for order in second] == [other.id]
+
+
+@pytest.mark.asyncio
+@mock.patch.object(settings, "PLACEMENT_MODE", PLACEMENT_MODE_INLINE)
+@mock.patch("app.controllers.order.place_order")
+async def test_inline_placement_does_not_overtake_a_pending_order_of_the_instrument(mock_place_order):
+    # Arrange
+    await Order.filter(order_placed_at__isnull=True).delete()
+    mock_place_order.side_effect = OrderPlacementError("Connection not available")
+    pending = await OrderController.create(CreateOrderModel(**ORDER_DATA))
+    mock_place_order.side_effect = None
+
+    # Act
+    later = await OrderController.create(CreateOrderModel(**ORDER_DATA))
+
+    # Assert
+    assert [call.args[0].id for call in mock_place_order.call_args_list] == [pending.id]
+    await later.refresh_from_db()
+    assert later.order_placed_at is None
+    assert (later.attempts, later.next_attempt_at) == (0, None)
+
+
+@pytest.mark.asyncio
+@mock.patch("app.controllers.order.place_order")
+async def test_claimed_orders_are_leased(mock_place_order):
+    # Arrange
+    await Order.filter(order_placed_at__isnull=True).delete()
+    order = await OrderController.create(CreateOrderModel(**ORDER_DATA))
+
+    # Act
+    claimed = await OrderController._claim_orders(batch_size=10)
+    claimed_again = await OrderController._claim_orders(batch_size=10)
+
+    # Assert
+    assert [claimed_order.id for claimed_order in claimed] == [order.id]
+    assert claimed_again == []
+    await order.refresh_from_db()
+    assert order.attempts == 1
+
+
+@pytest.mark.asyncio
+@mock.patch("app.controllers.order.place_order")
+async def test_placements_are_acknowledged_in_one_batch(mock_place_order):
+    # Arrange
+    await Order.filter(order_placed_at__isnull=True).delete()
+    orders = [await OrderController.create(CreateOrderModel(**ORDER_DATA)) for _ in range(5)]
+
+    # Act
+    with mock.patch.object(order_ack_writer, "_flush", wraps=order_ack_writer._flush) as flush:
+        claimed = await OrderController.place_failed_orders()
+
+    # Assert
+    assert claimed == 5
+    flush.assert_awaited_once()
+    placed = await Order.filter(id__in=[order.id for order in orders]).values_list("order_placed_at", flat=True)
+    assert len(set(placed)) == 1 and None not in placed
+
+
+@pytest.mark.asyncio
+@mock.patch.object(settings, "ORDER_ACK_COALESCING", False)
+@mock.patch("app.controllers.order.place_order")
+async def test_placement_without_ack_coalescing_writes_placement_columns_only(mock_place_order):
+    # Arrange
+    await Order.filter(order_placed_at__isnull=True).delete()
+    order = await OrderController.create(CreateOrderModel(**ORDER_DATA))
+    await Order.filter(id=order.id).update(quantity=99)
+
+    # Act
+    placed = await OrderController._place_order(order)
+
+    # Assert
+    assert placed is True
+    await order.refresh_from_db()
+    assert order.order_placed_at is not None
+    assert order.updated_at >= order.order_placed_at
+    assert order.quantity == 99
@@ -0,0 +1,157 @@
+from unittest import mock
+
+import httpx
+import pytest
+
+from app.controllers.circuit_breaker import STATE_CLOSED, STATE_OPEN, venue_breaker
+from app.controllers.exchange_adapters import ExchangeRegistry, HttpExchangeAdapter, OrderRejectedError
+from app.controllers.order import OrderController, exchange_registry, placement_scheduler
+from app.controllers.stock_exchange import OrderPlacementError
+from app.models.order import CreateOrderModel, Order
+from tests.stub_exchange import StubExchange
+
+
+def make_adapter(exchange: StubExchange, transport: httpx.AsyncBaseTransport = None) -> HttpExchangeAdapter:
+    return HttpExchangeAdapter(
+        name="stub",
+        base_url="http://stub-exchange",
+        max_connections=10,
+        timeout=1,
+        max_batch_size=2,
+        breaker=venue_breaker("stub", ignored_exceptions=(OrderRejectedError,)),
+        transport=transport or httpx.ASGITransport(app=exchange.app),
+    )
+
+
+def test_registry_routes_by_longest_prefix():
+    # Arrange
+    default, btc, btc_usdt = mock.Mock(), mock.Mock(), mock.Mock()
+    registry = ExchangeRegistry(default=default)
+    registry.register("BTC", btc)
+    registry.register("BTCUSDT", btc_usdt)
+
+    # Act / Assert
+    assert registry.adapter_for("BTCUSDT00001") is btc_usdt
+    assert registry.adapter_for("BTCEUR000001") is btc
+    assert registry.adapter_for("ETHUSDT00001") is default
+
+
+@pytest.mark.asyncio
+async def test_http_adapter_places_and_rejects_orders():
+    # Arrange
+    exchange = StubExchange(rejected_instruments=("LUNAUSDT0001",))
+    adapter = make_adapter(exchange)
+    placed = Order(type="market", side="buy", instrument="BTCUSDT00001", quantity=1)
+    rejected = Order(type="market", side="buy", instrument="LUNAUSDT0001", quantity=1)
+
+    # Act
+    await adapter.place(placed)
+    with pytest.raises(OrderRejectedError):
+        await adapter.place(rejected)
+    errors = await adapter.place_many([placed, rejected])
+    await adapter.close()
+
+    # Assert
+    assert exchange.placed == [str(placed.id)] * 2
+    assert errors[0] is None
+    assert isinstance(errors[1], OrderRejectedError)
+    assert str(errors[1]) == "Instrument LUNAUSDT0001 is halted"
+
+
+@pytest.mark.asyncio
+async def test_rejected_orders_do_not_open_the_venue_breaker():
+    # Arrange
+    adapter = make_adapter(StubExchange(rejected_instruments=("LUNAUSDT0001",)))
+    rejected = Order(type="market", side="buy", instrument="LUNAUSDT0001", quantity=1)
+
+    # Act
+    for _ in range(25):
+        with pytest.raises(OrderRejectedError):
+            await adapter.breaker.call(adapter.place, rejected)
+    await adapter.close()
+
+    # Assert
+    assert adapter.breaker.state == STATE_CLOSED
+
+
+@pytest.mark.asyncio
+async def test_http_adapter_raises_placement_error_when_venue_is_unreachable():
+    # Arrange
+    def unreachable(request: httpx.Request) -> httpx.Response:
+        raise httpx.ConnectError("Connection refused", request=request)
+
+    adapter = make_adapter(StubExchange(), transport=httpx.MockTransport(unreachable))
+    order = Order(type="market", side="buy", instrument="BTCUSDT00001", quantity=1)
+
+    # Act / Assert
+    with pytest.raises(OrderPlacementError):
+        await adapter.place_many([order])
+    await adapter.close()
+
+
+@pytest.mark.asyncio
+@mock.patch("app.controllers.order.place_order")
+async def test_dispatcher_sends_venue_orders_in_batches(mock_place_order):
+    # Arrange
+    await Order.filter(order_placed_at__isnull=True).delete()
+    exchange = StubExchange()
+    adapter = make_adapter(exchange)
+    registry = ExchangeRegistry(default=exchange_registry.default)
+    registry.register("BTC", adapter)
+    neighbour = next(
+        instrument
+        for instrument in (f"BTCUSDT{i:05d}" for i in range(2, 1000))
+        if placement_scheduler.shard_of(instrument) == placement_scheduler.shard_of("BTCUSDT00001")
+    )
+    # A batch holds one order per instrument: the second BTCUSDT00001 order goes with the neighbour.
+    venue_orders = [
+        await OrderController.create(CreateOrderModel(type="market", side="buy", instrument=instrument, quantity=1))
+        for instrument in ("BTCUSDT00001", "BTCUSDT00001", neighbour)
+    ]
+    other = await OrderController.create(
+        CreateOrderModel(type="market", side="buy", instrument="ETHUSDT00001", quantity=1)
+    )
+
+    # Act
+    with mock.patch("app.controllers.order.exchange_registry", registry):
+        claimed = await OrderController.place_failed_orders()
+    await adapter.close()
+
+    # Assert
+    assert claimed == 4
+    assert sorted(exchange.batch_sizes) == [1, 2]
+    assert sorted(exchange.placed) == sorted(str(order.id) for order in venue_orders)
+    mock_place_order.assert_called_once()
+    assert mock_place_order.call_args.args[0].id == other.id
+    assert not await Order.filter(order_placed_at__isnull=True).exists()
+
+
+@pytest.mark.asyncio
+@mock.patch("app.controllers.order.place_order")
+async def test_an_open_venue_breaker_does_not_stop_the_other_venues(mock_place_order):
+    # Arrange
+    await Order.filter(order_placed_at__isnull=True).delete()
+    exchange = StubExchange()
+    adapter = make_adapter(exchange)
+    adapter.breaker._transition(STATE_OPEN)
+    registry = ExchangeRegistry(default=exchange_registry.default)
+    registry.register("BTC", adapter)
+    venue_order = await OrderController.create(
+        CreateOrderModel(type="market", side="buy", instrument="BTCUSDT00001", quantity=1)
+    )
+    other = await OrderController.create(
+        CreateOrderModel(type="market", side="buy", instrument="ETHUSDT00001", quantity=1)
+    )
+
+    # Act
+    with mock.patch("app.controllers.order.exchange_registry", registry):
+        claimed = await OrderController.place_failed_orders()
+    await adapter.close()
+
+    # Assert
+    assert claimed == 1
+    assert exchange.placed == []
+    assert mock_place_order.call_args.args[0].id == other.id
+    await venue_order.refresh_from_db()
+    assert venue_order.attempts == 0
+    assert venue_order.order_placed_at is None
@@ -0,0 +1,70 @@
+import asyncio
+import threading
+from unittest import mock
+
+import pytest
+
+from app.controllers.exchange_executor import ExchangeExecutor, ExchangeSaturatedError
+from app.settings import PLACEMENT_MODE_INLINE, settings
+
+
+@pytest.mark.asyncio
+async def test_run_returns_result_off_the_event_loop():
+    # Arrange
+    executor = ExchangeExecutor(max_workers=2, queue_size=2)
+    loop_thread = threading.get_ident()
+
+    # Act
+    thread_id = await executor.run(threading.get_ident)
+
+    # Assert
+    assert thread_id != loop_thread
+    assert executor.stats() == {"in_flight": 0, "queue_depth": 0, "max_workers": 2, "queue_size": 2}
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_run_rejects_when_saturated():
+    # Arrange
+    executor = ExchangeExecutor(max_workers=1, queue_size=1)
+    release = threading.Event()
+    started = threading.Event()
+
+    def blocking_call():
+        started.set()
+        release.wait(timeout=5)
+
+    # Act
+    tasks = [asyncio.ensure_future(executor.run(blocking_call)) for _ in range(2)]
+    await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+
+    # Assert
+    assert executor.is_saturated
+    assert executor.in_flight == 1
+    assert executor.queue_depth == 1
+    with pytest.raises(ExchangeSaturatedError):
+        await executor.run(blocking_call)
+
+    release.set()
+    await asyncio.gather(*tasks)
+    assert not executor.is_saturated
+    executor.shutdown()
+
+
+@mock.patch.object(settings, "PLACEMENT_MODE", PLACEMENT_MODE_INLINE)
+@mock.patch("app.controllers.order.exchange_executor", ExchangeExecutor(max_workers=0, queue_size=0))
+def test_create_order_rejected_when_exchange_saturated(client):
+    # Arrange
+    data = {
+        "type": "market",
+        "side": "sell",
+        "instrument": "XRPUSDT00006",
+        "quantity": 500,
+    }
+
+    # Act
+    response = client.post("/orders", json=data)
+
+    # Assert
+    assert response.status_code == 503
+    assert response.json()["success"] is False
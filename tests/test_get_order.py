@@ -0,0 +1,85 @@
+from unittest import mock
+from uuid import uuid4
+
+import pytest
+
+from app.cache import LRUCache
+from app.controllers.order import OrderController, order_response_cache
+
+ORDER_DATA = {
+    "type": "limit",
+    "side": "buy",
+    "instrument": "ETHUSDT00004",
+    "quantity": 2,
+    "limit_price": 1800.25,
+}
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    order_response_cache.clear()
+
+
+@pytest.mark.asyncio
+@mock.patch("app.controllers.order.place_order")
+async def test_get_order(mock_place_order, client):
+    # Arrange
+    order_id = client.post("/orders", json=ORDER_DATA).json()["data"]["id"]
+
+    # Act
+    response = client.get(f"/orders/{order_id}")
+
+    # Assert
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert data["id"] == order_id
+    assert data["instrument"] == ORDER_DATA["instrument"]
+    assert data["created_at"]
+    assert data["order_placed_at"] is None
+
+
+def test_get_order_not_found(client):
+    # Act
+    response = client.get(f"/orders/{uuid4()}")
+
+    # Assert
+    assert response.status_code == 404
+    assert response.json()["success"] is False
+
+
+@pytest.mark.asyncio
+@mock.patch("app.controllers.order.place_order")
+async def test_get_order_is_cached_until_placed(mock_place_order, client):
+    # Arrange
+    order_id = client.post("/orders", json=ORDER_DATA).json()["data"]["id"]
+    first = client.get(f"/orders/{order_id}")
+
+    # Act
+    with mock.patch.object(OrderController, "get_order_by_id") as mock_get_order_by_id:
+        cached = client.get(f"/orders/{order_id}")
+    order = await OrderController.get_order_by_id(order_id)
+    await OrderController._place_order(order)
+    refreshed = client.get(f"/orders/{order_id}")
+
+    # Assert
+    mock_get_order_by_id.assert_not_called()
+    assert cached.content == first.content
+    assert refreshed.json()["data"]["order_placed_at"] is not None
+
+
+def test_lru_cache_evicts_least_recently_used_and_expired_entries():
+    # Arrange
+    cache = LRUCache(max_size=2)
+    cache.set("a", 1, ttl=60)
+    cache.set("b", 2, ttl=60)
+    cache.set("expired", 3, ttl=-1)
+
+    # Act
+    cache.get("b")
+    cache.set("c", 4, ttl=60)
+
+    # Assert
+    assert cache.get("a") is None
+    assert cache.get("expired") is None
+    assert cache.get("b") == 2
+    assert cache.get("c") == 4
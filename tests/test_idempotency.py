@@ -0,0 +1,115 @@
+from unittest import mock
+from uuid import uuid4
+
+import pytest
+
+from app.controllers.order import idempotency_cache, scoped_idempotency_key
+from app.models.order import Order
+from app.settings import PLACEMENT_MODE_INLINE, settings
+
+ORDER_DATA = {
+    "type": "limit",
+    "side": "sell",
+    "instrument": "SOLUSDT00011",
+    "quantity": 3,
+    "limit_price": "140.50",
+}
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    idempotency_cache.clear()
+
+
+def stored_key(key: str) -> str:
+    # The test client connects from the address `testclient`.
+    return scoped_idempotency_key("testclient", key)
+
+
+@pytest.mark.asyncio
+@mock.patch.object(settings, "PLACEMENT_MODE", PLACEMENT_MODE_INLINE)
+@mock.patch("app.controllers.order.place_order")
+async def test_create_order_replays_a_retried_request(mock_place_order, client):
+    # Arrange
+    headers = {"Idempotency-Key": str(uuid4())}
+
+    # Act
+    first = client.post("/orders", json=ORDER_DATA, headers=headers)
+    second = client.post("/orders", json={**ORDER_DATA, "limit_price": "140.5"}, headers=headers)
+
+    # Assert
+    assert first.status_code == second.status_code == 201
+    assert first.content == second.content
+    assert mock_place_order.call_count == 1
+    assert await Order.filter(idempotency_key=stored_key(headers["Idempotency-Key"])).count() == 1
+
+
+@pytest.mark.asyncio
+@mock.patch("app.controllers.order.place_order")
+async def test_create_order_deduplicates_a_key_missing_from_the_cache(mock_place_order, client):
+    # Arrange
+    headers = {"Idempotency-Key": str(uuid4())}
+    order_id = client.post("/orders", json=ORDER_DATA, headers=headers).json()["data"]["id"]
+    idempotency_cache.clear()
+
+    # Act
+    response = client.post("/orders", json=ORDER_DATA, headers=headers)
+
+    # Assert
+    assert response.status_code == 201
+    assert response.json()["data"]["id"] == order_id
+    assert await Order.filter(idempotency_key=stored_key(headers["Idempotency-Key"])).count() == 1
+
+
+@pytest.mark.parametrize("cached", [True, False])
+@pytest.mark.asyncio
+@mock.patch("app.controllers.order.place_order")
+async def test_create_order_rejects_a_key_reused_for_another_order(mock_place_order, client, cached):
+    # Arrange
+    headers = {"Idempotency-Key": str(uuid4())}
+    client.post("/orders", json=ORDER_DATA, headers=headers)
+    if not cached:
+        idempotency_cache.clear()
+
+    # Act
+    response = client.post("/orders", json={**ORDER_DATA, "quantity": 4}, headers=headers)
+
+    # Assert
+    assert response.status_code == 409
+    assert response.json()["success"] is False
+    assert await Order.filter(idempotency_key=stored_key(headers["Idempotency-Key"])).count() == 1
+
+
+@pytest.mark.asyncio
+@mock.patch("app.controllers.order.place_order")
+async def test_create_order_without_key_is_not_deduplicated(mock_place_order, client):
+    # Act
+    first = client.post("/orders", json=ORDER_DATA)
+    second = client.post("/orders", json=ORDER_DATA)
+
+    # Assert
+    assert first.status_code == second.status_code == 201
+    assert first.json()["data"]["id"] != second.json()["data"]["id"]
+
+
+@pytest.mark.parametrize("cached", [True, False])
+@pytest.mark.asyncio
+@mock.patch.object(settings, "RATE_LIMIT_CLIENT_HEADER", "X-Api-Key")
+@mock.patch("app.controllers.order.place_order")
+async def test_create_order_scopes_keys_to_the_client(mock_place_order, client, cached):
+    # Arrange
+    key = str(uuid4())
+    first = client.post("/orders", json=ORDER_DATA, headers={"Idempotency-Key": key, "X-Api-Key": "alice"})
+    if not cached:
+        idempotency_cache.clear()
+
+    # Act
+    second = client.post(
+        "/orders", json={**ORDER_DATA, "quantity": 4}, headers={"Idempotency-Key": key, "X-Api-Key": "bob"}
+    )
+
+    # Assert
+    assert first.status_code == second.status_code == 201
+    assert first.json()["data"]["id"] != second.json()["data"]["id"]
+    assert await Order.filter(idempotency_key=scoped_idempotency_key("alice", key)).count() == 1
+    assert await Order.filter(idempotency_key=scoped_idempotency_key("bob", key)).count() == 1
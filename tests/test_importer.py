@@ -0,0 +1,83 @@
+from decimal import Decimal
+
+import pytest
+
+from app.importer import FORMAT_CSV, FORMAT_NDJSON, import_orders, read_chunks
+from app.models.order import Order
+
+NDJSON_ORDERS = b"""{"type": "market", "side": "buy", "instrument": "LNKUSDT00001", "quantity": 5}
+{"type": "limit", "side": "sell", "instrument": "LNKUSDT00001", "limit_price": "7.25", "quantity": 2}
+
+{"type": "market", "side": "buy", "instrument": "LNKUSDT00001", "limit_price": "7.25", "quantity": 1}
+not json
+{"type": "limit", "side": "buy", "instrument": "LNKUSDT00001", "limit_price": "7.10", "quantity": 4}
+"""
+
+CSV_ORDERS = """type,side,instrument,limit_price,quantity
+market,buy,LNKUSDT00002,,5
+limit,sell,LNKUSDT00002,7.25,2
+limit,sell,LNKUSDT00002,,2
+"""
+
+
+def test_chunks_keep_the_valid_orders_and_report_the_invalid_lines(tmp_path):
+    # Arrange
+    path = tmp_path / "orders.ndjson"
+    path.write_bytes(NDJSON_ORDERS)
+
+    # Act
+    chunks = list(read_chunks(str(path), FORMAT_NDJSON, chunk_size=2))
+
+    # Assert
+    assert [len(orders) for orders, _ in chunks] == [2, 0, 1]
+    assert [line for _, errors in chunks for line, _ in errors] == [4, 5]
+
+
+def test_csv_rows_are_validated_with_the_order_rules(tmp_path):
+    # Arrange
+    path = tmp_path / "orders.csv"
+    path.write_text(CSV_ORDERS)
+
+    # Act
+    [(orders, errors)] = list(read_chunks(str(path), FORMAT_CSV, chunk_size=10))
+
+    # Assert
+    assert [(order.type, order.limit_price, order.quantity) for order in orders] == [
+        ("market", None, 5),
+        ("limit", Decimal("7.25"), 2),
+    ]
+    assert [line for line, _ in errors] == [4]
+
+
+@pytest.mark.asyncio
+async def test_imported_orders_are_recorded_as_placed_unless_enqueued(tmp_path):
+    # Arrange
+    ndjson_path, csv_path = tmp_path / "orders.ndjson", tmp_path / "orders.csv"
+    ndjson_path.write_bytes(NDJSON_ORDERS)
+    csv_path.write_text(CSV_ORDERS)
+
+    # Act
+    placed = await import_orders(Order._meta.db, str(ndjson_path), FORMAT_NDJSON, enqueue=False, chunk_size=2)
+    enqueued = await import_orders(Order._meta.db, str(csv_path), FORMAT_CSV, enqueue=True, chunk_size=2)
+
+    # Assert
+    assert placed == (3, 2)
+    assert enqueued == (2, 1)
+    assert await Order.filter(instrument="LNKUSDT00001", order_placed_at__isnull=False).count() == 3
+    assert await Order.filter(instrument="LNKUSDT00002", order_placed_at__isnull=True).count() == 2
+
+
+@pytest.mark.asyncio
+async def test_imported_orders_keep_the_order_of_the_file(tmp_path):
+    # Arrange
+    path = tmp_path / "orders.csv"
+    quantities = list(range(1, 8))
+    path.write_text("type,side,instrument,quantity\n" + "".join(f"market,buy,LNKUSDT00003,{q}\n" for q in quantities))
+
+    # Act
+    await import_orders(Order._meta.db, str(path), FORMAT_CSV, enqueue=True, chunk_size=3)
+
+    # Assert
+    orders = await Order.filter(instrument="LNKUSDT00003").order_by("created_at")
+    assert [order.quantity for order in orders] == quantities
+    assert len({order.created_at for order in orders}) == len(quantities)
@@ -0,0 +1,150 @@
+from datetime import datetime
+from decimal import Decimal
+from unittest import mock
+
+import pytest
+
+from app.controllers.exchange_adapters import OrderRejectedError
+from app.controllers.instrument_stats import InstrumentStatsStore
+from app.controllers.order import OrderController, instrument_stats, order_event_hub, rebuild_instrument_stats
+from app.controllers.order_events import order_placed_event, orders_created_events
+from app.controllers.stock_exchange import OrderPlacementError
+from app.models.order import CreateOrderModel, Order, OrderSide, OrderType
+
+INSTRUMENT = "ADAUSDT00001"
+
+
+def make_order(side: str = "buy", quantity: int = 10, limit_price: str = None, instrument: str = INSTRUMENT) -> Order:
+    return Order(
+        type=OrderType.MARKET if limit_price is None else OrderType.LIMIT,
+        side=OrderSide(side),
+        instrument=instrument,
+        limit_price=None if limit_price is None else Decimal(limit_price),
+        quantity=quantity,
+    )
+
+
+def test_counters_follow_created_and_placed_orders():
+    # Arrange
+    store = InstrumentStatsStore()
+    limit_order, market_order = make_order(quantity=4, limit_price="2.50"), make_order(quantity=6)
+
+    # Act
+    for event in orders_created_events(
+        [limit_order, market_order, make_order(side="sell", quantity=1, limit_price="3.00")]
+    ):
+        store.record_created(event)
+    limit_order.order_placed_at = datetime.utcnow()
+    store.record_placed(order_placed_event(limit_order))
+
+    # Assert
+    stats = store.get(INSTRUMENT)
+    assert stats["buy"] == {
+        "orders": 2,
+        "quantity": 10,
+        "unplaced_orders": 1,
+        "unplaced_quantity": 6,
+        "unplaced_limit_notional": "0.00",
+    }
+    assert stats["sell"]["unplaced_limit_notional"] == "3.00"
+    assert stats["rebuilt_at"] is None
+    assert store.get("XRPUSDT00001")["buy"]["orders"] == 0
+
+
+def test_placements_of_other_processes_are_counted_from_their_events():
+    # Arrange
+    instrument = "ADAUSDT00002"
+    order = make_order(quantity=3, limit_price="1.50", instrument=instrument)
+    for event in orders_created_events([order, make_order(quantity=2, instrument=instrument)]):
+        instrument_stats.record_created(event)
+    order.order_placed_at = datetime.utcnow()
+    legacy_event = {
+        key: value for key, value in order_placed_event(order).items() if key in ("event", "id", "instrument")
+    }
+
+    # Act
+    # The events of the placement trigger, as received from Postgres; the first one predates the side in the payload.
+    order_event_hub.publish({**legacy_event, "order_placed_at": "2026-10-18T12:00:00+00:00"})
+    order_event_hub.publish({**order_placed_event(order), "order_placed_at": "2026-10-18T12:00:00+00:00"})
+
+    # Assert
+    stats = instrument_stats.get(instrument)["buy"]
+    assert (stats["unplaced_orders"], stats["unplaced_quantity"], stats["unplaced_limit_notional"]) == (1, 2, "0.00")
+
+
+def test_orders_created_by_other_processes_are_counted_from_their_events():
+    # Arrange
+    instrument = "ADAUSDT00003"
+    subscription = order_event_hub.subscribe(instruments=[instrument])
+    # The notification of the creation trigger for one insert of two buy orders, as received from Postgres.
+    event = {
+        "event": "orders_created",
+        "instrument": instrument,
+        "side": "buy",
+        "first_id": "0b6e2c1d-6f3a-4f0e-9a57-2d8c1e4b7a10",
+        "orders": 2,
+        "quantity": 7,
+        "unplaced_orders": 2,
+        "unplaced_quantity": 7,
+        "unplaced_limit_notional": "12.5000",
+    }
+
+    # Act
+    order_event_hub.publish(event)
+    order_event_hub.publish(event)
+    order_event_hub.unsubscribe(subscription)
+
+    # Assert
+    stats = instrument_stats.get(instrument)["buy"]
+    assert (stats["orders"], stats["unplaced_quantity"], stats["unplaced_limit_notional"]) == (4, 14, "25.00")
+    assert subscription._queue.empty()
+
+
+@pytest.mark.asyncio
+@mock.patch("app.controllers.order.place_order")
+async def test_rebuild_matches_the_incrementally_maintained_counters(mock_place_order):
+    # Arrange
+    await Order.all().delete()
+    await rebuild_instrument_stats()
+    for data in (
+        {"type": "limit", "side": "buy", "limit_price": "1.25", "quantity": 8},
+        {"type": "market", "side": "buy", "quantity": 5},
+        {"type": "limit", "side": "sell", "limit_price": "2.10", "quantity": 3},
+    ):
+        await OrderController.create(CreateOrderModel(instrument=INSTRUMENT, **data))
+    await OrderController.create_many(
+        [CreateOrderModel(instrument=INSTRUMENT, type="market", side="sell", quantity=2)]
+    )
+
+    def place_buy_orders_only(order: Order) -> None:
+        if order.side == OrderSide.SELL and order.type == OrderType.LIMIT:
+            raise OrderRejectedError("Sell limit orders are rejected")
+        if order.side == OrderSide.SELL:
+            raise OrderPlacementError("Sell orders are not available")
+
+    mock_place_order.side_effect = place_buy_orders_only
+    await OrderController.place_failed_orders()
+    incremental = instrument_stats.get(INSTRUMENT)
+
+    # Act
+    await rebuild_instrument_stats()
+
+    # Assert
+    rebuilt = instrument_stats.get(INSTRUMENT)
+    assert rebuilt["rebuilt_at"] is not None
+    assert {side: rebuilt[side] for side in ("buy", "sell")} == {side: incremental[side] for side in ("buy", "sell")}
+    assert rebuilt["buy"]["unplaced_orders"] == 0
+    assert (rebuilt["sell"]["unplaced_orders"], rebuilt["sell"]["unplaced_quantity"]) == (1, 2)
+    assert rebuilt["sell"]["unplaced_limit_notional"] == "0.00"
+
+
+def test_stats_endpoint(client):
+    # Act
+    response = client.get(f"/instruments/{INSTRUMENT}/stats")
+    invalid = client.get("/instruments/ADA/stats")
+
+    # Assert
+    assert response.status_code == 200
+    assert response.json()["data"]["instrument"] == INSTRUMENT
+    assert set(response.json()["data"]) == {"instrument", "buy", "sell", "rebuilt_at"}
+    assert invalid.status_code == 400
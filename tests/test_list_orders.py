@@ -0,0 +1,81 @@
+from uuid import uuid4
+
+import orjson
+import pytest
+
+from app.controllers.order import OrderController
+from app.models.order import CreateOrderModel, OrderListQueryModel
+
+
+@pytest.fixture
+def instrument() -> str:
+    return f"LST{uuid4().hex[:9].upper()}"
+
+
+@pytest.fixture
+def order_ids(client, instrument) -> list[str]:
+    return [
+        client.post(
+            "/orders", json={"type": "market", "side": side, "instrument": instrument, "quantity": quantity}
+        ).json()["data"]["id"]
+        for quantity, side in enumerate(["buy", "sell", "buy", "buy", "sell"], start=1)
+    ]
+
+
+def test_list_orders_pages_through_all_orders(client, instrument, order_ids):
+    # Act
+    pages, cursor = [], None
+    while True:
+        params = {"instrument": instrument, "limit": 2, **({"cursor": cursor} if cursor else {})}
+        data = client.get("/orders", params=params).json()["data"]
+        pages.append([order["id"] for order in data["orders"]])
+        cursor = data["next_cursor"]
+        if cursor is None:
+            break
+
+    # Assert
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert sum(pages, []) == order_ids
+
+
+def test_list_orders_filters(client, instrument, order_ids):
+    # Act
+    response = client.get("/orders", params={"instrument": instrument, "side": "sell", "placed": False})
+
+    # Assert
+    assert response.status_code == 200
+    orders = response.json()["data"]["orders"]
+    assert [order["id"] for order in orders] == [order_ids[1], order_ids[4]]
+    assert {order["side"] for order in orders} == {"sell"}
+
+
+def test_list_orders_streams_ndjson(client, instrument, order_ids):
+    # Act
+    response = client.get("/orders", params={"instrument": instrument}, headers={"Accept": "application/x-ndjson"})
+
+    # Assert
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [orjson.loads(line) for line in response.content.splitlines()]
+    assert [row["id"] for row in rows] == order_ids
+
+
+@pytest.mark.asyncio
+async def test_iter_orders_loads_in_chunks(instrument, order_ids):
+    # Arrange
+    await OrderController.create(CreateOrderModel(type="market", side="buy", instrument=instrument, quantity=9))
+    query = OrderListQueryModel(instrument=instrument)
+
+    # Act
+    rows = [row async for row in OrderController.iter_orders(query, chunk_size=2)]
+
+    # Assert
+    assert [str(row["id"]) for row in rows][:5] == order_ids
+    assert len(rows) == 6
+
+
+def test_list_orders_invalid_cursor(client):
+    # Act
+    response = client.get("/orders", params={"cursor": "not-a-cursor"})
+
+    # Assert
+    assert response.status_code == 400
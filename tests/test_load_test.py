@@ -0,0 +1,69 @@
+from unittest import mock
+
+import httpx
+import pytest
+
+from app.api import app
+from app.controllers.stock_exchange import OrderPlacementError
+from benchmarks.exchange_simulator import LATENCY_FIXED, ExchangeSimulator
+from benchmarks.load_test import build_payloads, run_level
+
+
+def outcomes(simulator: ExchangeSimulator, calls: int) -> list[bool]:
+    results = []
+    for _ in range(calls):
+        try:
+            simulator(object())
+        except OrderPlacementError:
+            results.append(False)
+        else:
+            results.append(True)
+    return results
+
+
+def test_exchange_simulator_is_deterministic_for_a_seed():
+    # Arrange
+    first = ExchangeSimulator(seed=7, latency_ms=0, failure_rate=0.3)
+    second = ExchangeSimulator(seed=7, latency_ms=0, failure_rate=0.3)
+
+    # Act
+    first_outcomes = outcomes(first, 200)
+    second_outcomes = outcomes(second, 200)
+
+    # Assert
+    assert first_outcomes == second_outcomes
+    assert first.failures == first_outcomes.count(False)
+    assert 0 < first.failures < 200
+
+
+def test_exchange_simulator_fails_in_bursts():
+    # Arrange
+    simulator = ExchangeSimulator(
+        latency=LATENCY_FIXED, latency_ms=0, failure_rate=0, burst_probability=1, burst_length=5
+    )
+
+    # Act
+    results = outcomes(simulator, 10)
+
+    # Assert
+    assert results == [False] * 10
+    assert simulator.calls == simulator.failures == 10
+
+
+@pytest.mark.asyncio
+@mock.patch("app.controllers.order.place_order", ExchangeSimulator(latency_ms=0, failure_rate=0))
+async def test_load_test_reports_throughput_and_percentiles():
+    # Arrange
+    payloads = build_payloads(20, seed=1)
+    transport = httpx.ASGITransport(app=app)
+
+    # Act
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        result = await run_level(client, payloads, concurrency=4)
+
+    # Assert
+    assert payloads == build_payloads(20, seed=1)
+    assert result["requests"] == 20
+    assert result["status_codes"] == {"201": 20}
+    assert result["rps"] > 0
+    assert set(result["latency"]) == {"p50_ms", "p95_ms", "p99_ms", "max_ms"}
@@ -0,0 +1,71 @@
+from unittest import mock
+
+import pytest
+from prometheus_client import REGISTRY
+
+from app.controllers.order import OrderController, _timed_place_order
+from app.controllers.stock_exchange import OrderPlacementError
+from app.db import TimedPool
+from app.models.order import Order
+
+
+def sample(name: str, labels: dict) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def test_metrics_endpoint_reports_route_latency(client):
+    # Arrange
+    labels = {"method": "GET", "route": "/healthcheck", "status": "200"}
+    before = sample("quiktrade_http_request_duration_seconds_count", labels)
+
+    # Act
+    client.get("/healthcheck")
+    response = client.get("/metrics")
+
+    # Assert
+    assert response.status_code == 200
+    assert sample("quiktrade_http_request_duration_seconds_count", labels) == before + 1
+    assert b'quiktrade_http_request_duration_seconds_count{method="GET",route="/healthcheck"' in response.content
+
+
+@pytest.mark.parametrize(
+    "side_effect, outcome",
+    [(None, "success"), (OrderPlacementError("Connection not available"), "placement_error"), (ValueError, "error")],
+)
+def test_place_order_duration_is_recorded_by_outcome(side_effect, outcome):
+    # Arrange
+    before = sample("quiktrade_exchange_place_order_duration_seconds_count", {"outcome": outcome})
+
+    # Act
+    with mock.patch("app.controllers.order.place_order", side_effect=side_effect):
+        try:
+            _timed_place_order(Order())
+        except (OrderPlacementError, ValueError):
+            pass
+
+    # Assert
+    assert sample("quiktrade_exchange_place_order_duration_seconds_count", {"outcome": outcome}) == before + 1
+
+
+@pytest.mark.asyncio
+async def test_timed_pool_records_acquire_wait():
+    # Arrange
+    pool = mock.Mock(acquire=mock.AsyncMock(return_value="connection"), get_size=mock.Mock(return_value=3))
+    timed_pool = TimedPool(pool, "test")
+
+    # Act
+    connection = await timed_pool.acquire()
+
+    # Assert
+    assert connection == "connection"
+    assert timed_pool.get_size() == 3
+    assert sample("quiktrade_db_pool_acquire_duration_seconds_count", {"connection": "test"}) == 1
+
+
+@pytest.mark.asyncio
+async def test_count_unplaced_orders():
+    # Act
+    count = await OrderController.count_unplaced_orders()
+
+    # Assert
+    assert count == await Order.filter(order_placed_at__isnull=True).count()
@@ -0,0 +1,198 @@
+"""
+Checks of the order table migrations against a real Postgres database.
+
+They apply every migration to an empty database, seed orders, and then move the schema down and
+up across the partitioning migration. The bulk importer, which copies orders with the COPY
+protocol that SQLite does not have, is checked against the migrated schema. They are skipped unless `MIGRATION_TESTS=true`, which the
+`migrations` CI job sets, and need the `DB_*` settings of an empty database:
+
+    MIGRATION_TESTS=true DB_PASSWORD=secret DB_NAME=postgres pytest tests/test_migrations.py
+"""
+
+import asyncio
+import os
+import subprocess
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from uuid import UUID, uuid4
+
+import asyncpg
+import httpx
+import orjson
+import pytest
+import pytest_asyncio
+from tortoise import Tortoise
+
+from app.api import app
+from app.controllers.partitions import partition_name
+from app.importer import FORMAT_NDJSON, import_orders
+from app.models.order import Order
+from app.settings import DB_CONFIG, settings
+
+pytestmark = pytest.mark.skipif(
+    os.getenv("MIGRATION_TESTS", "false").lower() != "true", reason="Needs an empty Postgres database"
+)
+
+ROOT = Path(__file__).parent.parent
+
+PRIMARY_KEY_SQL = """
+    SELECT array_agg(att.attname ORDER BY array_position(idx.indkey::INT2[], att.attnum)) AS columns
+    FROM pg_index idx
+    JOIN pg_attribute att ON att.attrelid = idx.indrelid AND att.attnum = ANY(idx.indkey)
+    WHERE idx.indrelid = 'public."order"'::regclass AND idx.indisprimary
+"""
+IS_PARTITIONED_SQL = "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = 'public.\"order\"'::regclass)"
+IMPORTED_ORDERS = b"""{"type": "market", "side": "buy", "instrument": "IMPUSDT00001", "quantity": 5}
+{"type": "limit", "side": "sell", "instrument": "IMPUSDT00001", "limit_price": "7.25", "quantity": 2}
+{"type": "limit", "side": "buy", "instrument": "IMPUSDT00001", "limit_price": "7.10", "quantity": 4}
+"""
+INSERT_ORDER_SQL = """
+    INSERT INTO "order" ("id", "created_at", "type", "side", "instrument", "quantity", "idempotency_key")
+    VALUES ($1, $2, 'market', 'buy', 'BTCUSDT00001', 1, $3)
+"""
+
+
+@pytest_asyncio.fixture(scope="module", autouse=True)
+async def initialize_tests():
+    # Replaces the SQLite database of the other tests: the schema is built by the migrations.
+    yield
+
+
+def aerich(*args: str) -> None:
+    subprocess.run(["aerich", *args], cwd=ROOT, check=True)
+
+
+async def connect() -> asyncpg.Connection:
+    return await asyncpg.connect(
+        host=settings.POSTGRES_HOST,
+        port=int(settings.POSTGRES_PORT),
+        user=settings.POSTGRES_USER,
+        password=settings.POSTGRES_PASSWORD,
+        database=settings.POSTGRES_DB,
+        # The migrations replace the tables between the statements.
+        statement_cache_size=0,
+    )
+
+
+async def insert_order(connection: asyncpg.Connection, created_at: datetime, key: str = None) -> UUID:
+    order_id = uuid4()
+    await connection.execute(INSERT_ORDER_SQL, order_id, created_at, key)
+    return order_id
+
+
+@pytest.mark.asyncio
+async def test_partitioning_migration_keeps_the_orders_and_their_idempotency_keys():
+    # Arrange
+    now = datetime.now(timezone.utc)
+    last_month = (now.replace(day=1) - timedelta(days=1)).replace(day=15)
+    aerich("upgrade")
+    connection = await connect()
+    try:
+        old_order = await insert_order(connection, last_month, "key-old")
+        recent_order = await insert_order(connection, now, "key-recent")
+        await insert_order(connection, now)
+
+        # Act / Assert
+        assert await connection.fetchval(IS_PARTITIONED_SQL)
+        assert await connection.fetchval(PRIMARY_KEY_SQL) == ["id", "created_at"]
+        with pytest.raises(asyncpg.UniqueViolationError):
+            await insert_order(connection, now, "key-recent")
+
+        # Reverts the claim index, order event and failed orders migrations, then the partitioning.
+        for _ in range(6):
+            aerich("downgrade", "--yes")
+        assert not await connection.fetchval(IS_PARTITIONED_SQL)
+        assert await connection.fetchval(PRIMARY_KEY_SQL) == ["id"]
+        assert await connection.fetchval('SELECT COUNT(*) FROM "order"') == 3
+        assert await connection.fetchval("SELECT to_regclass('public.order_idempotency_key')") is None
+        with pytest.raises(asyncpg.UniqueViolationError):
+            await insert_order(connection, now, "key-old")
+
+        aerich("upgrade")
+        assert await connection.fetchval(IS_PARTITIONED_SQL)
+        assert await connection.fetchval(PRIMARY_KEY_SQL) == ["id", "created_at"]
+        assert await connection.fetchval('SELECT COUNT(*) FROM "order"') == 3
+        assert await connection.fetchval(
+            'SELECT tableoid::regclass::TEXT FROM "order" WHERE "id" = $1', old_order
+        ) == partition_name(last_month.date())
+        keys = await connection.fetch('SELECT "key", "order_id" FROM "order_idempotency_key" ORDER BY "key"')
+        assert [(key["key"], key["order_id"]) for key in keys] == [("key-old", old_order), ("key-recent", recent_order)]
+        with pytest.raises(asyncpg.UniqueViolationError) as exc_info:
+            await insert_order(connection, now, "key-old")
+        assert exc_info.value.table_name == "order_idempotency_key"
+
+        notifications = asyncio.Queue()
+        await connection.add_listener("order_events", lambda *args: notifications.put_nowait(args[-1]))
+        await connection.execute('UPDATE "order" SET "order_placed_at" = now() WHERE "id" = $1', recent_order)
+        event = orjson.loads(await asyncio.wait_for(notifications.get(), timeout=5))
+        assert {key: event[key] for key in ("event", "id", "side", "quantity", "limit_price")} == {
+            "event": "order_placed",
+            "id": str(recent_order),
+            "side": "buy",
+            "quantity": 1,
+            "limit_price": None,
+        }
+        await connection.execute(
+            'UPDATE "order" SET "failed_at" = now(), "last_error" = $2 WHERE "id" = $1', old_order, "Rejected"
+        )
+        event = orjson.loads(await asyncio.wait_for(notifications.get(), timeout=5))
+        assert {key: event[key] for key in ("event", "id", "error")} == {
+            "event": "order_failed",
+            "id": str(old_order),
+            "error": "Rejected",
+        }
+        await insert_order(connection, now)
+        event = orjson.loads(await asyncio.wait_for(notifications.get(), timeout=5))
+        assert {key: event[key] for key in ("event", "instrument", "orders", "unplaced_orders", "unplaced_quantity")} == {
+            "event": "orders_created",
+            "instrument": "BTCUSDT00001",
+            "orders": 1,
+            "unplaced_orders": 1,
+            "unplaced_quantity": 1,
+        }
+    finally:
+        await connection.close()
+
+    await Tortoise.init(config=DB_CONFIG)
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            response = await client.get(f"/orders/{old_order}")
+            missing = await client.get(f"/orders/{uuid4()}")
+    finally:
+        await Tortoise.close_connections()
+    assert response.status_code == 200
+    assert response.json()["data"]["id"] == str(old_order)
+    assert missing.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_importer_copies_orders_into_the_partitioned_table(tmp_path):
+    # Arrange
+    path = tmp_path / "orders.ndjson"
+    path.write_bytes(IMPORTED_ORDERS)
+    aerich("upgrade")
+
+    # Act
+    await Tortoise.init(config=DB_CONFIG)
+    try:
+        imported = await import_orders(Order._meta.db, str(path), FORMAT_NDJSON, enqueue=True, chunk_size=2)
+    finally:
+        await Tortoise.close_connections()
+
+    # Assert
+    assert imported == (3, 0)
+    connection = await connect()
+    try:
+        rows = await connection.fetch(
+            'SELECT "type", "side", "limit_price"::TEXT AS "limit_price", "quantity", "order_placed_at", "attempts", '
+            'tableoid::regclass::TEXT AS "partition" FROM "order" WHERE "instrument" = $1 ORDER BY "created_at"',
+            "IMPUSDT00001",
+        )
+    finally:
+        await connection.close()
+    month = datetime.now(timezone.utc).date()
+    assert [tuple(row) for row in rows] == [
+        ("market", "buy", None, 5, None, 0, partition_name(month)),
+        ("limit", "sell", "7.25", 2, None, 0, partition_name(month)),
+        ("limit", "buy", "7.10", 4, None, 0, partition_name(month)),
+    ]
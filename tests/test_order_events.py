@@ -0,0 +1,196 @@
+import asyncio
+import uuid
+from contextlib import asynccontextmanager
+from unittest import mock
+
+import httpx
+import pytest
+import uvicorn
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+
+from app.api import stream_orders
+from app.controllers.order import OrderController, order_event_hub, order_response_cache
+from app.controllers.order_events import EVENT_ORDER_PLACED, OrderEventHub, sse_stream
+from app.models.order import CreateOrderModel, Order
+
+ORDER_DATA = {
+    "type": "market",
+    "side": "buy",
+    "instrument": "DOTUSDT00001",
+    "quantity": 10,
+}
+
+
+def make_event(instrument: str = "DOTUSDT00001") -> dict:
+    return {
+        "event": EVENT_ORDER_PLACED,
+        "id": str(uuid.uuid4()),
+        "instrument": instrument,
+        "order_placed_at": "2026-10-18T12:00:00+00:00",
+    }
+
+
+@pytest.mark.asyncio
+async def test_events_are_delivered_to_the_matching_subscribers_only():
+    # Arrange
+    hub = OrderEventHub(max_subscribers=10, max_queue=10, reconnect_delay=1)
+    by_id_event, by_instrument_event, other_event = make_event(), make_event("SOLUSDT00001"), make_event()
+    by_id = hub.subscribe(order_ids=[by_id_event["id"]])
+    by_instrument = hub.subscribe(instruments=["SOLUSDT00001"])
+    everything = hub.subscribe()
+
+    # Act
+    for event in (by_id_event, by_instrument_event, other_event):
+        hub.publish(event)
+
+    # Assert
+    assert [await by_id.get(timeout=0)] == [by_id_event]
+    assert await by_id.get(timeout=0) is None
+    assert [await by_instrument.get(timeout=0)] == [by_instrument_event]
+    assert [await everything.get(timeout=0) for _ in range(3)] == [by_id_event, by_instrument_event, other_event]
+
+
+@pytest.mark.asyncio
+async def test_a_subscriber_that_falls_behind_is_dropped():
+    # Arrange
+    hub = OrderEventHub(max_subscribers=10, max_queue=2, reconnect_delay=1)
+    subscription = hub.subscribe()
+    events = [make_event() for _ in range(3)]
+
+    # Act
+    for event in events:
+        hub.publish(event)
+
+    # Assert
+    assert await subscription.get(timeout=0) == events[1]
+    with pytest.raises(EOFError):
+        await subscription.get(timeout=0)
+
+
+@pytest.mark.asyncio
+async def test_the_stream_renders_events_and_keep_alives_and_unsubscribes_at_the_end():
+    # Arrange
+    hub = OrderEventHub(max_subscribers=1, max_queue=10, reconnect_delay=1)
+    subscription = hub.subscribe()
+    event = make_event()
+    hub.publish(event)
+    stream = sse_stream(hub, subscription, keepalive=0.01)
+
+    # Act
+    messages = [await anext(stream) for _ in range(3)]
+    await stream.aclose()
+
+    # Assert
+    assert messages[0] == b": connected\n\n"
+    assert messages[1].startswith(b"event: order_placed\ndata: {")
+    assert event["id"].encode() in messages[1]
+    assert messages[2] == b": keep-alive\n\n"
+    assert not hub.full
+
+
+@pytest.mark.asyncio
+async def test_the_stream_ends_after_its_max_age():
+    # Arrange
+    hub = OrderEventHub(max_subscribers=1, max_queue=10, reconnect_delay=1)
+    subscription = hub.subscribe()
+
+    # Act
+    messages = [message async for message in sse_stream(hub, subscription, keepalive=0.01, max_age=0.05)]
+
+    # Assert
+    assert messages[0] == b": connected\n\n"
+    assert set(messages[1:]) == {b": keep-alive\n\n"}
+    assert not hub.full
+
+
+@pytest.mark.asyncio
+async def test_a_stopping_server_ends_the_open_streams_and_then_closes_the_hub():
+    # Arrange
+    hub = OrderEventHub(max_subscribers=1, max_queue=10, reconnect_delay=1)
+    hub_closed = asyncio.Event()
+
+    @asynccontextmanager
+    async def lifespan(app):
+        yield
+        await hub.close()
+        hub_closed.set()
+
+    app = FastAPI(lifespan=lifespan)
+
+    @app.get("/stream")
+    async def stream():
+        return StreamingResponse(sse_stream(hub, hub.subscribe(), keepalive=0.05, max_age=0.5))
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=0, log_level="warning"))
+    server.install_signal_handlers = lambda: None
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    port = server.servers[0].sockets[0].getsockname()[1]
+
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}") as client:
+        async with client.stream("GET", "/stream") as response:
+            messages = response.aiter_bytes()
+            assert await anext(messages) == b": connected\n\n"
+
+            # Act
+            server.should_exit = True
+            remaining = [message async for message in messages]
+
+    # Assert
+    await asyncio.wait_for(serving, timeout=5)
+    assert hub_closed.is_set()
+    assert set(remaining) <= {b": keep-alive\n\n"}
+    assert not hub.full
+
+
+@pytest.mark.asyncio
+@mock.patch("app.controllers.order.place_order")
+async def test_placing_an_order_publishes_its_event_and_invalidates_its_cached_response(mock_place_order):
+    # Arrange
+    await Order.filter(order_placed_at__isnull=True).delete()
+    order = await OrderController.create(CreateOrderModel(**ORDER_DATA))
+    order_response_cache.set(order.id, b"pending", ttl=60)
+    subscription = order_event_hub.subscribe(order_ids=[str(order.id)])
+
+    # Act
+    # SQLite has no LISTEN/NOTIFY, the event is published by the placing process itself.
+    await OrderController.place_failed_orders()
+
+    # Assert
+    event = await subscription.get(timeout=1)
+    order_event_hub.unsubscribe(subscription)
+    assert event["id"] == str(order.id)
+    assert event["instrument"] == ORDER_DATA["instrument"]
+    assert order_response_cache.get(order.id) is None
+
+
+@pytest.mark.asyncio
+@mock.patch("app.controllers.order.place_order")
+async def test_orders_placed_before_subscribing_are_reported_right_away(mock_place_order):
+    # Arrange
+    await Order.filter(order_placed_at__isnull=True).delete()
+    order = await OrderController.create(CreateOrderModel(**ORDER_DATA))
+    await OrderController.place_failed_orders()
+
+    # Act
+    response = await stream_orders(order_id=[order.id], instrument=None)
+    messages = [await anext(response.body_iterator) for _ in range(2)]
+    await response.body_iterator.aclose()
+
+    # Assert
+    assert response.media_type == "text/event-stream"
+    assert str(order.id).encode() in messages[1]
+
+
+def test_stream_rejects_invalid_filters_and_subscribers_over_the_limit(client):
+    # Act
+    invalid = client.get("/orders/stream", params={"order_id": "not-a-uuid"})
+    with mock.patch.object(order_event_hub, "max_subscribers", 0):
+        full = client.get("/orders/stream")
+
+    # Assert
+    assert invalid.status_code == 400
+    assert full.status_code == 503
+    assert full.json()["success"] is False
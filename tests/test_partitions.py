@@ -0,0 +1,184 @@
+import re
+from contextlib import asynccontextmanager
+from datetime import date
+from unittest import mock
+from uuid import UUID
+
+import pytest
+
+from app.controllers.partitions import (
+    NIL_UUID,
+    OrderPartitionMaintainer,
+    add_months,
+    partition_month,
+    partition_name,
+    partitions_to_archive,
+    partitions_to_create,
+)
+from app.metrics import ORDER_PARTITION_ARCHIVE_BLOCKING_ORDERS
+from app.models.order import Order
+
+
+class FakePostgres:
+    """Records the statements of the maintainer and answers its queries about the partitions."""
+
+    def __init__(
+        self,
+        partitions: list[str],
+        unplaced: dict[str, int],
+        orders: dict[str, list[UUID]] = None,
+        archived: list[str] = None,
+        misplaced: dict[str, int] = None,
+    ) -> None:
+        self.capabilities = mock.Mock(dialect="postgres")
+        self.connection_name = "models"
+        self.partitions = partitions
+        self.unplaced = unplaced
+        self.orders = orders or {}
+        self.archived = archived or []
+        self.misplaced = misplaced or {}
+        self.statements: list[str] = []
+
+    async def execute_query(self, sql: str, values: list = None) -> tuple[int, list[dict]]:
+        if "pg_partitioned_table" in sql:
+            return 1, [{"?column?": 1}]
+        if "to_regclass" in sql:
+            return 1, [{"exists": values[0].split('"')[1] in self.partitions}]
+        if "pg_inherits" in sql:
+            return len(self.partitions), [{"name": name} for name in self.partitions]
+        if "pg_namespace" in sql:
+            return len(self.archived), [{"name": name} for name in self.archived]
+        if "misplaced" in sql:
+            month = re.search(r"'(\d{4})-(\d{2})-01", sql)
+            return 1, [{"misplaced": f"order_p{month.group(1)}_{month.group(2)}" in self.misplaced}]
+        if '"moved"' in sql:
+            name = re.search(r'INSERT INTO "(\w+)"', sql).group(1)
+            self.statements.append(f"move {self.misplaced[name]} orders into {name}")
+            return 1, [{"moved": self.misplaced[name]}]
+        if "idempotency_key" in sql:
+            name = re.search(r'FROM "order_archive"\."(\w+)"', sql).group(1)
+            limit = int(re.search(r"LIMIT (\d+)", sql).group(1))
+            batch = [order_id for order_id in self.orders[name] if order_id > values[0]][:limit]
+            self.statements.append(f"release {len(batch)} keys of {name}")
+            return 1, [{"last_id": batch[-1] if batch else None, "released": len(batch)}]
+        name = re.search(r'FROM "(\w+)"', sql).group(1)
+        self.statements.append(f"count unplaced of {name}")
+        unplaced = self.unplaced.get(name, 0)
+        return min(unplaced, 1), [{"id": NIL_UUID, "unplaced": unplaced}][:unplaced]
+
+    async def execute_script(self, sql: str) -> None:
+        self.statements.append(sql)
+
+
+def test_partition_names_and_months():
+    # Assert
+    assert add_months(date(2026, 11, 18), 2) == date(2027, 1, 1)
+    assert add_months(date(2026, 1, 31), -1) == date(2025, 12, 1)
+    assert partition_name(date(2026, 3, 1)) == "order_p2026_03"
+    assert partition_month("order_p2026_03") == date(2026, 3, 1)
+    assert partition_month("order_default") is None
+    assert partitions_to_create(date(2026, 12, 5), 2) == [date(2026, 12, 1), date(2027, 1, 1), date(2027, 2, 1)]
+
+
+def test_only_partitions_past_the_retention_are_archived_oldest_first():
+    # Arrange
+    partitions = ["order_default", "order_p2026_07", "order_p2026_05", "order_p2026_06", "order_p2026_10"]
+
+    # Act
+    expired = partitions_to_archive(partitions, today=date(2026, 10, 18), retention_months=3)
+
+    # Assert
+    assert expired == [("order_p2026_05", date(2026, 5, 1)), ("order_p2026_06", date(2026, 6, 1))]
+
+
+@pytest.mark.asyncio
+async def test_maintenance_creates_upcoming_partitions_and_archives_placed_ones():
+    # Arrange
+    db = FakePostgres(
+        partitions=["order_default", "order_p2026_05", "order_p2026_06", "order_p2026_10"],
+        unplaced={"order_p2026_06": 3},
+        orders={
+            "order_p2026_04": [UUID(int=order_id) for order_id in range(1, 3)],
+            "order_p2026_05": [UUID(int=order_id) for order_id in range(1, 6)],
+        },
+        archived=["order_p2026_04"],
+    )
+    maintainer = OrderPartitionMaintainer(
+        months_ahead=1, retention_months=3, archive_schema="order_archive", key_release_batch_size=2
+    )
+
+    @asynccontextmanager
+    async def in_transaction(connection_name):
+        db.statements.append("BEGIN")
+        yield db
+        db.statements.append("COMMIT")
+
+    # Act
+    with mock.patch("app.controllers.partitions.in_transaction", in_transaction):
+        await maintainer.run(db, today=date(2026, 10, 18))
+
+    # Assert
+    assert db.statements == [
+        'CREATE TABLE "order_p2026_11" PARTITION OF "order" '
+        "FOR VALUES FROM ('2026-11-01T00:00:00+00:00') TO ('2026-12-01T00:00:00+00:00')",
+        "release 2 keys of order_p2026_04",
+        "release 0 keys of order_p2026_04",
+        'COMMENT ON TABLE "order_archive"."order_p2026_04" IS \'idempotency keys released\'',
+        "BEGIN",
+        "SET LOCAL lock_timeout = '5s'",
+        'LOCK TABLE ONLY "order", "order_p2026_05" IN ACCESS EXCLUSIVE MODE',
+        "count unplaced of order_p2026_05",
+        'ALTER TABLE "order" DETACH PARTITION "order_p2026_05"',
+        'ALTER TABLE "order_p2026_05" SET SCHEMA "order_archive"',
+        "COMMIT",
+        "release 2 keys of order_p2026_05",
+        "release 2 keys of order_p2026_05",
+        "release 1 keys of order_p2026_05",
+        "release 0 keys of order_p2026_05",
+        'COMMENT ON TABLE "order_archive"."order_p2026_05" IS \'idempotency keys released\'',
+        "BEGIN",
+        "SET LOCAL lock_timeout = '5s'",
+        'LOCK TABLE ONLY "order", "order_p2026_06" IN ACCESS EXCLUSIVE MODE',
+        "count unplaced of order_p2026_06",
+        "COMMIT",
+    ]
+    assert ORDER_PARTITION_ARCHIVE_BLOCKING_ORDERS._value.get() == 3
+
+
+@pytest.mark.asyncio
+async def test_partition_takes_over_its_orders_from_the_default_partition():
+    # Arrange
+    db = FakePostgres(partitions=["order_default"], unplaced={}, misplaced={"order_p2026_11": 4})
+    maintainer = OrderPartitionMaintainer(months_ahead=1, retention_months=3, archive_schema="order_archive")
+
+    @asynccontextmanager
+    async def in_transaction(connection_name):
+        db.statements.append("BEGIN")
+        yield db
+        db.statements.append("COMMIT")
+
+    # Act
+    with mock.patch("app.controllers.partitions.in_transaction", in_transaction):
+        await maintainer.create_partition(db, date(2026, 11, 1))
+
+    # Assert
+    assert db.statements == [
+        "BEGIN",
+        "SET LOCAL lock_timeout = '5s'",
+        'LOCK TABLE ONLY "order", "order_default" IN ACCESS EXCLUSIVE MODE',
+        'CREATE TABLE "order_p2026_11" (LIKE "order" INCLUDING DEFAULTS INCLUDING CONSTRAINTS)',
+        "move 4 orders into order_p2026_11",
+        'ALTER TABLE "order" ATTACH PARTITION "order_p2026_11" '
+        "FOR VALUES FROM ('2026-11-01T00:00:00+00:00') TO ('2026-12-01T00:00:00+00:00')",
+        "COMMIT",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_maintenance_does_nothing_without_postgres():
+    # Arrange
+    maintainer = OrderPartitionMaintainer(months_ahead=1, retention_months=3, archive_schema="order_archive")
+
+    # Act / Assert
+    # The test database is SQLite, which has no partitions.
+    await maintainer.run(Order._meta.db)
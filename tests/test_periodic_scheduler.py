@@ -0,0 +1,137 @@
+import asyncio
+from contextlib import asynccontextmanager
+from unittest import mock
+
+import pytest
+
+from app.controllers.periodic_scheduler import (
+    JOB_OUTCOME_ERROR,
+    JOB_OUTCOME_SKIPPED,
+    JOB_OUTCOME_SUCCESS,
+    PeriodicScheduler,
+    advisory_lock_key,
+)
+from app.models.order import Order
+
+
+def make_scheduler() -> PeriodicScheduler:
+    return PeriodicScheduler(connection=lambda: Order._meta.db)
+
+
+def cluster_lock():
+    """Stand-in of `advisory_lock` shared by several schedulers, as Postgres is for several instances."""
+    held = set()
+
+    @asynccontextmanager
+    async def advisory_lock(name, client):
+        if name in held:
+            yield False
+            return
+        held.add(name)
+        try:
+            yield True
+        finally:
+            held.discard(name)
+
+    return advisory_lock
+
+
+@pytest.mark.asyncio
+async def test_run_job_reports_the_outcome_of_the_job():
+    # Arrange
+    scheduler = make_scheduler()
+    scheduler.register("ok", mock.AsyncMock(), interval=60)
+    scheduler.register("broken", mock.AsyncMock(side_effect=RuntimeError("boom")), interval=60)
+
+    # Act
+    # SQLite has no advisory locks, so the lock is always granted.
+    outcomes = [await scheduler.run_job("ok"), await scheduler.run_job("broken")]
+
+    # Assert
+    assert outcomes == [JOB_OUTCOME_SUCCESS, JOB_OUTCOME_ERROR]
+
+
+@pytest.mark.asyncio
+async def test_an_exclusive_job_runs_on_one_instance_at_a_time():
+    # Arrange
+    running = 0
+    peak = 0
+    runs = 0
+
+    async def sweep():
+        nonlocal running, peak, runs
+        running += 1
+        runs += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.03)
+        running -= 1
+
+    instances = [make_scheduler() for _ in range(4)]
+    for scheduler in instances:
+        scheduler.register("sweep", sweep, interval=0.005, jitter=0.005)
+
+    # Act
+    with mock.patch("app.controllers.periodic_scheduler.advisory_lock", cluster_lock()):
+        for scheduler in instances:
+            scheduler.start()
+        await asyncio.sleep(0.15)
+        await asyncio.gather(*(scheduler.close() for scheduler in instances))
+
+    # Assert
+    assert runs >= 2
+    assert peak == 1
+    assert running == 0
+
+
+@pytest.mark.asyncio
+async def test_an_exclusive_job_is_skipped_while_another_instance_holds_the_lock():
+    # Arrange
+    job = mock.AsyncMock()
+    scheduler = make_scheduler()
+    scheduler.register("sweep", job, interval=60)
+    lock = cluster_lock()
+
+    # Act
+    with mock.patch("app.controllers.periodic_scheduler.advisory_lock", lock):
+        async with lock("sweep", None):
+            outcome = await scheduler.run_job("sweep")
+
+    # Assert
+    assert outcome == JOB_OUTCOME_SKIPPED
+    job.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_close_waits_for_the_run_in_progress_and_stops_scheduling():
+    # Arrange
+    started = asyncio.Event()
+    finished = []
+
+    async def job():
+        started.set()
+        await asyncio.sleep(0.02)
+        finished.append(True)
+
+    scheduler = make_scheduler()
+    scheduler.register("sweep", job, interval=0.001)
+    scheduler.start()
+    await started.wait()
+
+    # Act
+    await scheduler.close(timeout=1)
+    await asyncio.sleep(0.01)
+
+    # Assert
+    assert finished == [True]
+    assert not scheduler.running
+
+
+def test_register_rejects_duplicate_names_and_lock_keys_are_stable():
+    # Arrange
+    scheduler = make_scheduler()
+    scheduler.register("sweep", mock.AsyncMock(), interval=60)
+
+    # Act / Assert
+    with pytest.raises(ValueError):
+        scheduler.register("sweep", mock.AsyncMock(), interval=60)
+    assert advisory_lock_key("sweep") == advisory_lock_key("sweep") != advisory_lock_key("archive")
@@ -0,0 +1,143 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+import pytest
+from prometheus_client import REGISTRY
+
+from app.controllers.placement_scheduler import PlacementScheduler
+from app.controllers.stock_exchange import OrderPlacementError
+from app.models.order import Order
+
+VENUE = mock.Mock(max_batch_size=1)
+
+
+def make_order(instrument: str) -> Order:
+    return Order(
+        type="market",
+        side="buy",
+        instrument=instrument,
+        quantity=1,
+        created_at=datetime.now(timezone.utc) - timedelta(seconds=30),
+    )
+
+
+def make_scheduler(attempt, shard_count: int = 8) -> tuple[PlacementScheduler, mock.AsyncMock, mock.AsyncMock]:
+    record = mock.AsyncMock(return_value=True)
+    defer = mock.AsyncMock()
+    scheduler = PlacementScheduler(
+        shard_count=shard_count, route=lambda order: VENUE, attempt=attempt, record=record, defer=defer
+    )
+    return scheduler, record, defer
+
+
+@pytest.mark.asyncio
+async def test_orders_are_placed_in_order_within_an_instrument_and_in_parallel_across_instruments():
+    # Arrange
+    placed: list[Order] = []
+    in_flight = []
+    peak = 0
+
+    async def attempt(adapter, orders):
+        nonlocal peak
+        in_flight.append(orders[0])
+        peak = max(peak, len(in_flight))
+        # The first order of an instrument is the slowest one.
+        await asyncio.sleep(0.02 if orders[0].quantity == 1 else 0.001)
+        in_flight.remove(orders[0])
+        placed.extend(orders)
+        return [None]
+
+    scheduler, record, _ = make_scheduler(attempt)
+    first = "BTCUSDT00001"
+    second = next(
+        instrument
+        for instrument in (f"ETHUSDT{i:05d}" for i in range(100))
+        if scheduler.shard_of(instrument) != scheduler.shard_of(first)
+    )
+    orders = [make_order(instrument) for instrument in (first, second, first, second)]
+    orders[2].quantity = orders[3].quantity = 2
+
+    # Act
+    await scheduler.run(orders)
+
+    # Assert
+    assert [order for order in placed if order.instrument == first] == [orders[0], orders[2]]
+    assert [order for order in placed if order.instrument == second] == [orders[1], orders[3]]
+    assert peak == 2
+    assert record.await_count == 4
+
+
+@pytest.mark.asyncio
+async def test_later_orders_of_a_failed_instrument_are_deferred():
+    # Arrange
+    async def attempt(adapter, orders):
+        if orders[0].instrument == "BTCUSDT00001":
+            return [OrderPlacementError("Connection not available")]
+        return [None]
+
+    scheduler, record, defer = make_scheduler(attempt, shard_count=1)
+    failed, later, other = make_order("BTCUSDT00001"), make_order("BTCUSDT00001"), make_order("ETHUSDT00001")
+
+    # Act
+    await scheduler.run([failed, later, other])
+
+    # Assert
+    defer.assert_awaited_once_with(later, failed)
+    recorded = {call.args[0].id: call.args[1] for call in record.await_args_list}
+    assert isinstance(recorded[failed.id], OrderPlacementError)
+    assert recorded[other.id] is None
+    assert later.id not in recorded
+
+
+@pytest.mark.asyncio
+async def test_a_venue_batch_holds_one_order_per_instrument():
+    # Arrange
+    batches = []
+
+    async def attempt(adapter, orders):
+        batches.append([order.instrument for order in orders])
+        return [None] * len(orders)
+
+    scheduler, _, _ = make_scheduler(attempt, shard_count=1)
+    orders = [make_order(instrument) for instrument in ("BTCUSDT00001", "ETHUSDT00001", "BTCUSDT00001")]
+
+    # Act
+    with mock.patch.object(VENUE, "max_batch_size", 10):
+        await scheduler.run(orders)
+
+    # Assert
+    assert batches == [["BTCUSDT00001", "ETHUSDT00001"], ["BTCUSDT00001"]]
+
+
+@pytest.mark.asyncio
+async def test_shard_lag_is_exposed_while_placing():
+    # Arrange
+    lags = []
+
+    async def attempt(adapter, orders):
+        shard = str(scheduler.shard_of(orders[0].instrument))
+        lags.append(REGISTRY.get_sample_value("quiktrade_placement_shard_lag_seconds", {"shard": shard}))
+        return [None]
+
+    scheduler, _, _ = make_scheduler(attempt)
+
+    # Act
+    await scheduler.run([make_order("SOLUSDT00001")])
+
+    # Assert
+    assert lags[0] >= 30
+    shard = str(scheduler.shard_of("SOLUSDT00001"))
+    assert REGISTRY.get_sample_value("quiktrade_placement_shard_lag_seconds", {"shard": shard}) == 0
+
+
+def test_shard_of_is_stable():
+    # Arrange
+    scheduler, _, _ = make_scheduler(mock.AsyncMock(), shard_count=16)
+
+    # Act
+    shards = {scheduler.shard_of(f"BTCUSDT{i:05d}") for i in range(200)}
+
+    # Assert
+    assert scheduler.shard_of("BTCUSDT00001") == scheduler.shard_of("BTCUSDT00001")
+    assert shards == set(range(16))
@@ -0,0 +1,37 @@
+import orjson
+import pytest
+
+from app.models.order import CreateOrderResponseModel, Order
+from app.response_types import APIResponse
+from app.serializers import created_order_body, success_body
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        {"type": "market", "side": "sell", "instrument": "XRPUSDT00006", "quantity": 500},
+        {"type": "limit", "side": "buy", "instrument": "ETHUSDT00004", "quantity": 2, "limit_price": "1800.25"},
+        {"type": "limit", "side": "buy", "instrument": "ETHUSDT00004", "quantity": 2, "limit_price": "12.50"},
+    ],
+)
+def test_created_order_body_matches_the_response_model(data):
+    # Arrange
+    order = Order(**data)
+    expected = APIResponse(CreateOrderResponseModel.model_validate(order).model_dump(mode="json")).body
+
+    # Act
+    body = created_order_body(order)
+
+    # Assert
+    assert body == expected
+
+
+def test_success_body_matches_api_response():
+    # Arrange
+    data = {"orders": [1, 2], "next_cursor": None}
+
+    # Act
+    body = success_body(orjson.dumps(data))
+
+    # Assert
+    assert body == APIResponse(data).body
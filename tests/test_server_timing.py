@@ -0,0 +1,75 @@
+import os
+import re
+from unittest import mock
+
+from starlette.testclient import TestClient
+
+from app.api import app
+from app.middleware import ServerTimingMiddleware
+from app.settings import PLACEMENT_MODE_INLINE, settings
+from app.timing import phase, server_timing_header, start_request_timing, stop_request_timing
+
+ORDER_DATA = {
+    "type": "limit",
+    "side": "sell",
+    "instrument": "LTCUSDT00001",
+    "limit_price": "64.10",
+    "quantity": 3,
+}
+
+
+def test_phases_add_up_and_are_only_recorded_while_timing():
+    # Arrange
+    with phase("decode"):
+        pass
+    phases, token = start_request_timing()
+
+    # Act
+    for _ in range(2):
+        with phase("serialize"):
+            pass
+    stop_request_timing(token)
+    with phase("decode"):
+        pass
+
+    # Assert
+    assert list(phases) == ["serialize"]
+    assert server_timing_header({"decode": 0.0012}, 0.003, {"profile": "a.folded"}) == (
+        'decode;dur=1.200, total;dur=3.000, profile;desc="a.folded"'
+    )
+
+
+@mock.patch.object(settings, "PLACEMENT_MODE", PLACEMENT_MODE_INLINE)
+@mock.patch("app.controllers.order.place_order")
+def test_server_timing_header_reports_the_phases_of_an_order(mock_place_order):
+    # Arrange
+    client = TestClient(ServerTimingMiddleware(app, enabled=True))
+
+    # Act
+    response = client.post("/orders", json=ORDER_DATA)
+
+    # Assert
+    assert response.status_code == 201
+    metrics = dict(metric.split(";dur=") for metric in response.headers["Server-Timing"].split(", "))
+    assert list(metrics) == ["decode", "db_insert", "exchange", "db_ack", "serialize", "total"]
+    assert float(metrics["total"]) >= sum(float(value) for name, value in metrics.items() if name != "total")
+
+
+def test_requests_with_the_profile_header_are_profiled_to_folded_stacks(tmp_path):
+    # Arrange
+    profiled = TestClient(
+        ServerTimingMiddleware(app, enabled=False, profile_header_enabled=True, profile_dir=str(tmp_path))
+    )
+
+    # Act
+    plain = profiled.get("/healthcheck")
+    response = profiled.get("/healthcheck", headers={"X-Profile": "true"})
+
+    # Assert
+    assert "Server-Timing" not in plain.headers
+    [file_name] = re.findall(r'profile;desc="([^"]+)"', response.headers["Server-Timing"])
+    assert os.listdir(tmp_path) == [file_name]
+    with open(tmp_path / file_name) as f:
+        lines = f.read().splitlines()
+    assert lines
+    assert all(re.fullmatch(r".+ \d+", line) for line in lines)